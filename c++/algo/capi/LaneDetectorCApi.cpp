@@ -0,0 +1,80 @@
+// Standard Includes
+#include <exception>
+#include <memory>
+#include <vector>
+
+// Third-Party Includes
+#include "spdlog/spdlog.h"
+#include "spdlog/sinks/null_sink.h"
+
+// Local Includes
+#include "LaneDetectorCApi.h"
+
+namespace
+{
+    // Detection runs without logging; callers time and log on their side of the interface
+    std::shared_ptr<spdlog::logger> getNullLogger()
+    {
+        static std::shared_ptr<spdlog::logger> logger = std::make_shared<spdlog::logger>(
+            "LaneDetectorCApi", std::make_shared<spdlog::sinks::null_sink_mt>());
+        return logger;
+    }
+}
+
+void * laneDetectorCreate(
+    const float * cameraMatrix,
+    const float * cameraToRoadTransform,
+    const LaneDetectorCConfig * config,
+    const int32_t * roiPolygon,
+    const int32_t nRoiVertex)
+{
+    try {
+        algo::LaneDetectorConfig detectorConfig;
+        detectorConfig.blurKernelShape = cv::Size(config->blurKernelWidth, config->blurKernelHeight);
+        detectorConfig.cannyLowThreshold = config->cannyLowThreshold;
+        detectorConfig.cannyHighThreshold = config->cannyHighThreshold;
+        detectorConfig.houghRhoRes = config->houghRhoRes;
+        detectorConfig.houghThetaResDeg = config->houghThetaResDeg;
+        detectorConfig.houghAccumulatorThreshold = config->houghAccumulatorThreshold;
+        detectorConfig.houghMinLineLength = config->houghMinLineLength;
+        detectorConfig.houghMaxLineGap = config->houghMaxLineGap;
+        detectorConfig.roiPolygon.clear();
+        for (int32_t i = 0; i < nRoiVertex; ++i) {
+            detectorConfig.roiPolygon.push_back(cv::Point(roiPolygon[2 * i], roiPolygon[2 * i + 1]));
+        }
+
+        const Eigen::MatrixXf cameraMatrixEigen =
+            Eigen::Map<const Eigen::Matrix<float, 3, 3, Eigen::RowMajor>>(cameraMatrix);
+        const Eigen::MatrixXf cameraToRoadEigen =
+            Eigen::Map<const Eigen::Matrix<float, 3, 4, Eigen::RowMajor>>(cameraToRoadTransform);
+        return new algo::LaneDetector(cameraMatrixEigen, cameraToRoadEigen, detectorConfig);
+    }
+    catch (const std::exception &) {
+        return nullptr;
+    }
+}
+
+int32_t laneDetectorRun(
+    const void * detector,
+    const uint8_t * image,
+    const int32_t nRow,
+    const int32_t nCol,
+    const size_t rowStride,
+    algo::LaneDetectorOutput * output)
+{
+    try {
+        // Wrap caller's pixels without copying; run() only reads its input image
+        const cv::Mat imageMat(nRow, nCol, CV_8UC3, const_cast<uint8_t *>(image), rowStride);
+        *output = static_cast<const algo::LaneDetector *>(detector)->run(
+            imageMat, getNullLogger(), false);
+        return 0;
+    }
+    catch (const std::exception &) {
+        return 1;
+    }
+}
+
+void laneDetectorDestroy(void * detector)
+{
+    delete static_cast<algo::LaneDetector *>(detector);
+}
@@ -0,0 +1,67 @@
+/********************************************//**
+C interface to algo::LaneDetector for foreign function interfaces (e.g. Python ctypes)
+************************************************/
+#ifndef ALGO_CAPI_LANEDETECTORCAPI_H
+#define ALGO_CAPI_LANEDETECTORCAPI_H
+
+// Standard Imports
+#include <stddef.h>
+#include <stdint.h>
+
+// Local Imports
+#include "algo/LaneDetector.h"
+
+extern "C"
+{
+    // Plain-data mirror of algo::LaneDetectorConfig; see lane_detection_cpp.py for the Python side
+    struct LaneDetectorCConfig
+    {
+        int32_t blurKernelWidth;
+        int32_t blurKernelHeight;
+        double cannyLowThreshold;
+        double cannyHighThreshold;
+        double houghRhoRes;
+        double houghThetaResDeg;
+        int32_t houghAccumulatorThreshold;
+        double houghMinLineLength;
+        double houghMaxLineGap;
+    };
+
+    /*! Create a lane detector; free it with laneDetectorDestroy()
+        \param cameraMatrix (3, 3) row-major camera matrix
+        \param cameraToRoadTransform (3, 4) row-major [R | t] transformation from camera to road
+        \param config Algorithm parameters
+        \param roiPolygon (nRoiVertex, 2) row-major (x, y) pixel coordinates of the ROI polygon
+        \param nRoiVertex Number of ROI polygon vertices
+        \return detector Opaque detector handle; NULL on failure
+    */
+    void * laneDetectorCreate(
+        const float * cameraMatrix,
+        const float * cameraToRoadTransform,
+        const LaneDetectorCConfig * config,
+        const int32_t * roiPolygon,
+        const int32_t nRoiVertex);
+
+    /*! Run lane detection on one BGR image
+        \param detector Handle from laneDetectorCreate()
+        \param image (nRow, nCol, 3) uint8 BGR pixels; rows may be padded
+        \param nRow Number of image rows
+        \param nCol Number of image columns
+        \param rowStride Bytes between the starts of consecutive rows
+        \param output Output lane angles (radians); NaN for lanes which were not found
+        \return status 0 on success; nonzero if an exception was raised
+    */
+    int32_t laneDetectorRun(
+        const void * detector,
+        const uint8_t * image,
+        const int32_t nRow,
+        const int32_t nCol,
+        const size_t rowStride,
+        algo::LaneDetectorOutput * output);
+
+    /*! Free a lane detector
+        \param detector Handle from laneDetectorCreate(); may be NULL
+    */
+    void laneDetectorDestroy(void * detector);
+}
+#endif // ALGO_CAPI_LANEDETECTORCAPI_H
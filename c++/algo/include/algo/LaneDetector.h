@@ -5,6 +5,7 @@ Encapsulation and functions relating to lane line detection algorithm
 #define ALGO_INCLUDE_ALGO_LANEDETECTOR_H
 
 // Standard Imports
+#include <vector>
 
 // Third-Party Imports
 #include "Eigen/Dense"
@@ -21,6 +22,21 @@ namespace algo
         float rightLaneAngle;  // Angle (degrees) of right lane line in road coordinate frame; 0 to pi radians
     };
 
+    // Algorithm parameters; defaults match config/algo/lane_line_detector_config.json
+    struct LaneDetectorConfig
+    {
+        cv::Size blurKernelShape = cv::Size(5, 5);  // (width, length) of Gaussian kernel in pixels
+        double cannyLowThreshold = 130.0;  // 0-255 lower threshold for Canny edge detection
+        double cannyHighThreshold = 200.0;  // 0-255 upper threshold for Canny edge detection
+        std::vector<cv::Point> roiPolygon = {
+            cv::Point(398, 375), cv::Point(493, 181), cv::Point(1231, 357)};  // (x, y) ROI vertices
+        double houghRhoRes = 2.0;  // Hough transform distance resolution (pixels)
+        double houghThetaResDeg = 2.0;  // Hough transform angle resolution (degrees)
+        int houghAccumulatorThreshold = 10;  // min # of points along line
+        double houghMinLineLength = 20.0;  // minimum length of line in pixels
+        double houghMaxLineGap = 10.0;  // largest allowable pixel gap between points on line
+    };
+
     class LaneDetector {
         public:
             /*! Constructor function.  
@@ -28,10 +44,12 @@ namespace algo
                     and skewness parameters
                 \param cameraToRoadTransform (3, 4) Transformation matrix in form [R | t] from
                     camera to road coordinate frame
+                \param config Algorithm parameters
             */  
             LaneDetector(
                 const Eigen::MatrixXf cameraMatrix,
-                const Eigen::MatrixXf cameraToRoadTransform);
+                const Eigen::MatrixXf cameraToRoadTransform,
+                const LaneDetectorConfig config = LaneDetectorConfig());
 
             /*! Run algorithm on an incoming image
                 \param image (nRow, nCol, 3) RGB image.
@@ -50,6 +68,7 @@ namespace algo
         private:
             Eigen::MatrixXf cameraMatrix;  // (3, 3) camera projection matrix w/ focal lengths, principal point, etc.
             Eigen::MatrixXf cameraToRoadTransform;  // [R | t] (3, 4) extrinsic transformation from camera to road coords
+            LaneDetectorConfig config;  // algorithm parameters
     };
 
     // Enum describing possible lane line sides
@@ -72,5 +91,18 @@ namespace algo
         const size_t nRow,
         const size_t nCol
     );
+
+    /*! Check which side of road a line segment is on by extending it to the bottom image row;
+        matches classify_lines() of the Python LaneLineDetector
+        \param line Line segment (x1, y1, x2, y2) in pixels, e.g. from cv::HoughLinesP
+        \param nRow Number of rows in image (height) in pixels
+        \param nCol Number of cols in image (width) in pixels
+        \return side Side of road; UNKNOWN for horizontal segments which never reach the bottom
+    */
+    const LaneSide checkSegmentSide(
+        const cv::Vec4i line,
+        const size_t nRow,
+        const size_t nCol
+    );
 };
 #endif // ALGO_INCLUDE_ALGO_LANEDETECTOR_H
@@ -2,6 +2,7 @@
 #include <iostream>
 #include <vector>
 #include <math.h>
+#include <limits>
 
 // Third-Party Includes
 #include "spdlog/spdlog.h"
@@ -12,10 +13,12 @@
 
 algo::LaneDetector::LaneDetector(
     const Eigen::MatrixXf cameraMatrix,
-    const Eigen::MatrixXf cameraToRoadTransform)
+    const Eigen::MatrixXf cameraToRoadTransform,
+    const algo::LaneDetectorConfig config)
 {
     this->cameraMatrix = cameraMatrix;
     this->cameraToRoadTransform = cameraToRoadTransform;
+    this->config = config;
 }
 
 const algo::LaneDetectorOutput algo::LaneDetector::run(
@@ -38,7 +41,7 @@ const algo::LaneDetectorOutput algo::LaneDetector::run(
     cv::GaussianBlur(
         singleChannel,
         singleChannel,
-        cv::Size(5, 5),  // size of kernel (x, y)
+        this->config.blurKernelShape,  // size of kernel (x, y)
         0.0  // Sigma X for Gaussian kernel
     );
     if (isDebugPlot) cv::imshow("Gaussian Blur", singleChannel);
@@ -46,19 +49,15 @@ const algo::LaneDetectorOutput algo::LaneDetector::run(
     cv::Canny(
         singleChannel,
         singleChannel,
-        130, // lowThreshold
-        200, // highThreshold
+        this->config.cannyLowThreshold,
+        this->config.cannyHighThreshold,
         3);  // apertureSize
     if (isDebugPlot) cv::imshow("Canny Edges", singleChannel);
 
     // Create polygon for region of interest
     cv::Mat roiMask(singleChannel.size(), CV_8U, cv::Scalar(0)); 
-    std::vector<cv::Point> polygonVertices;
-    polygonVertices.push_back(cv::Point(398, 375));
-    polygonVertices.push_back(cv::Point(493, 181));
-    polygonVertices.push_back(cv::Point(1231, 357));
     std::vector<std::vector<cv::Point>> fillContAll;
-    fillContAll.push_back(polygonVertices);
+    fillContAll.push_back(this->config.roiPolygon);
     cv::fillPoly(roiMask, fillContAll, cv::Scalar(255));
     if (isDebugPlot) cv::imshow("ROI Mask", roiMask);
 
@@ -72,44 +71,34 @@ const algo::LaneDetectorOutput algo::LaneDetector::run(
     cv::HoughLinesP(
         edgesInRoi,
         outputLines,
-        2.0,  // rho: distance resolution for hough search
-        2.0 * (M_PI / 180.0),  // theta: angle resolution for hough search
-        10,  // accumulator threshold; min # of points along line
-        20.0,  // minimum length of line in pixels
-        10.0);  // largest allowable pixel gap between consecutive points on line
+        this->config.houghRhoRes,  // rho: distance resolution for hough search
+        this->config.houghThetaResDeg * (M_PI / 180.0),  // theta: angle resolution for hough search
+        this->config.houghAccumulatorThreshold,  // min # of points along line
+        this->config.houghMinLineLength,  // minimum length of line in pixels
+        this->config.houghMaxLineGap);  // largest allowable pixel gap between consecutive points on line
 
     logger->debug("HoughLinesP found {} lines", outputLines.size());
     Eigen::Vector2f leftStartPoint, leftEndPoint, rightStartPoint, rightEndPoint;
-    size_t x1, y1, x2, y2;
-    double slope, intercept;
     
     output.isLeftFound = false;
     output.isRightFound = false;
 
     for(auto line : outputLines)
     {
-        x1 = line.val[0];
-        y1 = line.val[1];
-        x2 = line.val[2];
-        y2 = line.val[3];
-
-        slope = (y2 - y1) / (x2 - x1);
-        intercept = y2 - (x2 * slope);
-        const algo::LaneSide side = algo::checkLaneSide(
-            slope,
-            intercept,
+        const algo::LaneSide side = algo::checkSegmentSide(
+            line,
             edgesInRoi.rows,  // number rows in image
             edgesInRoi.cols  // # columns in image
         );
         if ((side == algo::LaneSide::LEFT) && !output.isLeftFound) {
             output.isLeftFound = true;
-            leftStartPoint << x1, y1;
-            leftEndPoint << x2, y2;
+            leftStartPoint << line.val[0], line.val[1];
+            leftEndPoint << line.val[2], line.val[3];
         }
         else if ((side == algo::LaneSide::RIGHT) && !output.isRightFound) {
             output.isRightFound = true;
-            rightStartPoint << x1, y1;
-            rightEndPoint << x2, y2;
+            rightStartPoint << line.val[0], line.val[1];
+            rightEndPoint << line.val[2], line.val[3];
         }
 
         // No need to keep looping once both lanes found
@@ -200,6 +189,10 @@ const algo::LaneDetectorOutput algo::LaneDetector::run(
     if (output.leftLaneAngle < 0.0) output.leftLaneAngle += M_PI;
     if (output.rightLaneAngle < 0.0) output.rightLaneAngle += M_PI;
 
+    // Angles of lanes which were not found are undefined; report NaN like the Python detector
+    if (!output.isLeftFound) output.leftLaneAngle = std::numeric_limits<float>::quiet_NaN();
+    if (!output.isRightFound) output.rightLaneAngle = std::numeric_limits<float>::quiet_NaN();
+
     logger->debug("Left angle: {} radians", output.leftLaneAngle);
     logger->debug("Right angle: {} radians", output.rightLaneAngle);
 
@@ -251,3 +244,19 @@ const algo::LaneSide algo::checkLaneSide(
     }
     return side;
 }
+
+const algo::LaneSide algo::checkSegmentSide(
+    const cv::Vec4i line,
+    const size_t nRow,
+    const size_t nCol
+)
+{
+    // Signed, floating point arithmetic: segments may point up or down and left or right
+    const double x1 = line.val[0], y1 = line.val[1], x2 = line.val[2], y2 = line.val[3];
+    const double dy = y2 - y1;
+    if (dy == 0.0) return LaneSide::UNKNOWN;
+
+    // Check x-coordinate (column) where line intersects at bottom of image
+    const double xBottom = x1 + (x2 - x1) * (static_cast<double>(nRow) - y1) / dy;
+    return (xBottom < (static_cast<double>(nCol) / 2.0)) ? LaneSide::LEFT : LaneSide::RIGHT;
+}
@@ -0,0 +1,205 @@
+"""Inverse perspective (bird's eye view) warp of camera images using precomputed remap tables"""
+# Standard Imports
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+
+# %% ENCAPSULATIONS
+class BevRemap:
+    """Lookup tables warping camera images onto a metric grid on the road plane
+
+    The tables are built once per calibration and resolution, so warping a frame is a single
+    cv2.remap with fixed-point maps instead of a per-frame cv2.warpPerspective. BEV image columns
+    run along the road frame +x axis (right) and rows along -z, i.e. row 0 is the farthest
+    distance ahead and lanes ahead of the vehicle are vertical.
+    """
+
+    def __init__(
+        self,
+        image_shape: tuple,
+        tr_cam_to_road: np.ndarray,
+        camera_matrix: np.ndarray,
+        lateral_range_m: typing.Sequence[float] = (-10.0, 10.0),
+        forward_range_m: typing.Sequence[float] = (6.0, 46.0),
+        meters_per_pixel: float = 0.05,
+        roi_polygon: list = None,
+    ):
+        """Initialize instance
+
+        Args:
+            image_shape: (n_row, n_col, ...) camera image shape
+            tr_cam_to_road: (3, 4) transformation matrix from camera to road; [R | t]
+            camera_matrix: (3, 3) intrinsic camera matrix
+            lateral_range_m: (min, max) road frame x (right) covered by the BEV image (m)
+            forward_range_m: (min, max) road frame z (forward) covered by the BEV image (m); must
+                             be in front of the camera
+            meters_per_pixel: BEV image resolution (m/pixel)
+            roi_polygon: Optional (n_vertex,) list of (x, y) camera pixel coordinates; if given,
+                         roi_rows only spans BEV rows which see the inside of this polygon
+        """
+        self.key = self.make_key(
+            image_shape=image_shape,
+            tr_cam_to_road=tr_cam_to_road,
+            camera_matrix=camera_matrix,
+            lateral_range_m=lateral_range_m,
+            forward_range_m=forward_range_m,
+            meters_per_pixel=meters_per_pixel,
+            roi_polygon=roi_polygon,
+        )
+        n_row, n_col = image_shape[:2]
+        self.image_shape = (n_row, n_col)
+        self.meters_per_pixel = meters_per_pixel
+
+        x_min, x_max = lateral_range_m
+        z_min, z_max = forward_range_m
+        n_bev_col = int(round((x_max - x_min) / meters_per_pixel))
+        n_bev_row = int(round((z_max - z_min) / meters_per_pixel))
+        self.bev_shape = (n_bev_row, n_bev_col)
+
+        # BEV pixel (u, v, 1) -> road plane (x, z, 1) -> camera pixel (homogeneous)
+        self.bev_to_road = np.array(
+            [
+                [meters_per_pixel, 0.0, x_min],
+                [0.0, -meters_per_pixel, z_max],
+                [0.0, 0.0, 1.0],
+            ]
+        )
+        self.road_to_image = compute_road_to_image_homography(
+            tr_cam_to_road=tr_cam_to_road, camera_matrix=camera_matrix
+        )
+        self.bev_to_image = self.road_to_image @ self.bev_to_road
+
+        # initUndistortRectifyMap maps destination pixel p to K * dehomogenize(inv(R) * p) when
+        # the new camera matrix is identity, so choose inv(R) = inv(K) * bev_to_image
+        camera_matrix = np.asarray(camera_matrix, dtype=np.float64)[:3, :3]
+        rectify = np.linalg.inv(np.linalg.solve(camera_matrix, self.bev_to_image))
+        self.map_xy, self.map_interp = cv2.initUndistortRectifyMap(
+            camera_matrix, None, rectify, np.eye(3), (n_bev_col, n_bev_row), cv2.CV_16SC2
+        )
+
+        # BEV rows whose source pixels fall inside the ROI
+        self.roi_rows = slice(0, n_bev_row)
+        if roi_polygon is not None:
+            roi_mask = np.zeros((n_row, n_col), dtype=np.uint8)
+            cv2.fillPoly(roi_mask, np.array([roi_polygon]), 255)
+            src_x = self.map_xy[..., 0].astype(np.intp)
+            src_y = self.map_xy[..., 1].astype(np.intp)
+            is_inside = (src_x >= 0) & (src_x < n_col) & (src_y >= 0) & (src_y < n_row)
+            is_roi = np.zeros(self.bev_shape, dtype=bool)
+            is_roi[is_inside] = roi_mask[src_y[is_inside], src_x[is_inside]] > 0
+            roi_row_indices = np.flatnonzero(is_roi.any(axis=1))
+            if roi_row_indices.size > 0:
+                self.roi_rows = slice(int(roi_row_indices[0]), int(roi_row_indices[-1]) + 1)
+
+    @staticmethod
+    def make_key(
+        image_shape: tuple,
+        tr_cam_to_road: np.ndarray,
+        camera_matrix: np.ndarray,
+        lateral_range_m: typing.Sequence[float] = (-10.0, 10.0),
+        forward_range_m: typing.Sequence[float] = (6.0, 46.0),
+        meters_per_pixel: float = 0.05,
+        roi_polygon: list = None,
+    ) -> tuple:
+        """Make hashable key identifying the inputs remap tables were computed from
+
+        Args:
+            image_shape: (n_row, n_col, ...) camera image shape
+            tr_cam_to_road: (3, 4) transformation matrix from camera to road; [R | t]
+            camera_matrix: (3, 3) intrinsic camera matrix
+            lateral_range_m: (min, max) road frame x covered by the BEV image (m)
+            forward_range_m: (min, max) road frame z covered by the BEV image (m)
+            meters_per_pixel: BEV image resolution (m/pixel)
+            roi_polygon: Optional (n_vertex,) list of (x, y) camera pixel coordinates
+
+        Returns:
+            key: Tuple which compares equal only for identical inputs
+        """
+        key = (
+            tuple(image_shape[:2]),
+            np.asarray(tr_cam_to_road, dtype=np.float64).tobytes(),
+            np.asarray(camera_matrix, dtype=np.float64)[:3, :3].tobytes(),
+            tuple(lateral_range_m),
+            tuple(forward_range_m),
+            meters_per_pixel,
+            None if roi_polygon is None else tuple(tuple(vertex) for vertex in roi_polygon),
+        )
+        return key
+
+    def warp(
+        self, image: np.ndarray, roi_only: bool = False, dst: np.ndarray = None
+    ) -> np.ndarray:
+        """Warp a camera image to the bird's eye view
+
+        Args:
+            image: (n_row, n_col, ...) camera image
+            roi_only: If True, only warp the BEV rows in roi_rows
+            dst: Optional output array of the BEV (or BEV ROI strip) shape
+
+        Returns:
+            image_bev: (n_bev_row, n_bev_col, ...) BEV image, or only its roi_rows if roi_only;
+                       pixels outside the camera image are 0
+        """
+        rows = self.roi_rows if roi_only else slice(None)
+        image_bev = cv2.remap(
+            image,
+            self.map_xy[rows],
+            self.map_interp[rows],
+            interpolation=cv2.INTER_LINEAR,
+            dst=dst,
+            borderMode=cv2.BORDER_CONSTANT,
+        )
+        return image_bev
+
+    def bev_to_road_points(self, points: np.ndarray) -> np.ndarray:
+        """Convert BEV image pixel coordinates to road plane coordinates
+
+        Args:
+            points: (..., 2) BEV pixel coordinates (u, v) of the full BEV image
+
+        Returns:
+            points_road: (..., 2) road frame (x, z) coordinates (m)
+        """
+        return points @ self.bev_to_road[:2, :2].T + self.bev_to_road[:2, 2]
+
+    def image_to_bev_points(self, points: np.ndarray) -> np.ndarray:
+        """Convert camera pixel coordinates of road plane points to BEV pixel coordinates
+
+        Args:
+            points: (..., 2) camera pixel coordinates (x, y)
+
+        Returns:
+            points_bev: (..., 2) BEV pixel coordinates (u, v) of the full BEV image
+        """
+        image_to_bev = np.linalg.inv(self.bev_to_image)
+        points_homo = points @ image_to_bev[:, :2].T + image_to_bev[:, 2]
+        return points_homo[..., :2] / points_homo[..., 2:]
+
+
+# %% FUNCTIONS
+def compute_road_to_image_homography(
+    tr_cam_to_road: np.ndarray, camera_matrix: np.ndarray
+) -> np.ndarray:
+    """Compute the homography from road plane coordinates to camera pixels
+
+    The road plane is y = 0 in the road frame (KITTI road frame: +x right, +y down, +z forward).
+
+    Args:
+        tr_cam_to_road: (3, 4) transformation matrix from camera to road; [R | t]
+        camera_matrix: (3, 3) intrinsic camera matrix
+
+    Returns:
+        road_to_image: (3, 3) homography mapping road (x, z, 1) to homogeneous camera pixels
+    """
+    cam_to_road = tr_cam_to_road[:3, :3]
+    tvec_cam_to_road = tr_cam_to_road[:3, 3]
+
+    # p_cam = R^T * (p_road - t) with p_road = (x, 0, z)
+    road_to_cam = cam_to_road.T
+    plane_to_cam = np.stack(
+        (road_to_cam[:, 0], road_to_cam[:, 2], -road_to_cam @ tvec_cam_to_road), axis=-1
+    )
+    return np.asarray(camera_matrix, dtype=np.float64)[:3, :3] @ plane_to_cam
@@ -0,0 +1,155 @@
+"""Canny edge detection with fixed or per-frame adaptive thresholds"""
+# Standard Imports
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.common import profiling
+
+# How Canny thresholds are chosen per frame; see detect_canny_edges()
+CANNY_MODES = ("fixed", "median", "otsu")
+
+# Defaults of the optional adaptive Canny config keys
+ADAPTIVE_CANNY_DEFAULTS = {
+    "canny_sigma": 0.33,
+    "canny_low_high_ratio": 0.5,
+    "canny_sample_step": 4,
+    "canny_edge_density_range": (0.01, 0.06),
+    "canny_max_adjustments": 3,
+    "canny_adjust_factor": 1.5,
+}
+
+# Adaptive thresholds never go below this, so scaling them always has an effect
+CANNY_MIN_THRESHOLD = 1.0
+
+
+# %% FUNCTIONS
+def compute_roi_stats(
+    roi_mask: np.ndarray, sample_step: int, origin: typing.Tuple[int, int] = (0, 0)
+) -> typing.Tuple[typing.Tuple[np.ndarray, np.ndarray], int]:
+    """Find a subsample of ROI pixels and the ROI area
+
+    Args:
+        roi_mask: (n_row, n_col) uint8 mask (0 or 255)
+        sample_step: Every sample_step-th row and column is sampled
+        origin: (row, col) of roi_mask[0, 0] in the full mask, if roi_mask is a crop; the sampled
+                rows and columns are those of the full mask, so crops sample the same pixels
+
+    Returns:
+        sample_index: (rows, cols) index arrays of the sampled ROI pixels in roi_mask
+        roi_area: Number of ROI pixels
+    """
+    row_start, col_start = (-origin[0]) % sample_step, (-origin[1]) % sample_step
+    rows, cols = np.nonzero(roi_mask[row_start::sample_step, col_start::sample_step])
+    sample_index = (rows * sample_step + row_start, cols * sample_step + col_start)
+    return sample_index, cv2.countNonZero(roi_mask)
+
+
+def compute_canny_thresholds(
+    samples: np.ndarray, mode: str, sigma: float = 0.33, low_high_ratio: float = 0.5
+) -> typing.Tuple[float, float]:
+    """Compute Canny thresholds from a sample of (blurred) intensities
+
+    Args:
+        samples: (n_sample,) uint8 intensities
+        mode: 'median' for (1 - sigma, 1 + sigma) * median, 'otsu' for (low_high_ratio, 1) *
+              Otsu threshold
+        sigma: Relative spread of the 'median' thresholds around the median
+        low_high_ratio: Ratio of low to high threshold for 'otsu'
+
+    Returns:
+        low_threshold: Lower Canny threshold; at least CANNY_MIN_THRESHOLD
+        high_threshold: Upper Canny threshold; at least CANNY_MIN_THRESHOLD
+    """
+    assert mode in ("median", "otsu"), f"Unknown adaptive Canny mode {mode}"
+    if samples.size == 0:
+        return CANNY_MIN_THRESHOLD, CANNY_MIN_THRESHOLD
+
+    if mode == "median":
+        median = float(np.median(samples))
+        low_threshold, high_threshold = (1.0 - sigma) * median, (1.0 + sigma) * median
+    else:
+        high_threshold, _ = cv2.threshold(
+            samples.reshape((1, -1)), 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU
+        )
+        low_threshold = low_high_ratio * high_threshold
+    return max(low_threshold, CANNY_MIN_THRESHOLD), max(high_threshold, CANNY_MIN_THRESHOLD)
+
+
+def detect_canny_edges(
+    image_blur: np.ndarray,
+    roi_mask: np.ndarray,
+    config: dict,
+    roi_stats: typing.Tuple[np.ndarray, int] = None,
+    edges: np.ndarray = None,
+    edges_with_mask: np.ndarray = None,
+    timer: profiling.StageTimer = profiling.NULL_TIMER,
+) -> typing.Tuple[np.ndarray, np.ndarray, typing.Tuple[float, float]]:
+    """Run Canny edge detection with fixed or per-frame adaptive thresholds and apply the ROI
+
+    In 'median' and 'otsu' mode (config 'canny_mode'), thresholds are computed from a subsample of
+    the blurred ROI pixels. If the fraction of ROI pixels which are edges then falls outside
+    'canny_edge_density_range', both thresholds are scaled by 'canny_adjust_factor' (up for too
+    many edges, down for too few) and Canny is rerun, at most 'canny_max_adjustments' times. This
+    keeps the number of edge pixels, and with it the cost of HoughLinesP, bounded on dark and
+    overexposed frames alike.
+
+    Args:
+        image_blur: (n_row, n_col) blurred value channel
+        roi_mask: (n_row, n_col) uint8 mask (0 or 255) of pixels searched for lines
+        config: LaneLineDetector configuration parameters
+        roi_stats: (sample_index, roi_area) of roi_mask from compute_roi_stats(), if precomputed
+        edges: Optional (n_row, n_col) uint8 output array for the edges
+        edges_with_mask: Optional (n_row, n_col) uint8 output array for the edges in the ROI
+        timer: Stage timer recording the duration of each processing stage
+
+    Returns:
+        image_edges: Canny edges of image_blur
+        image_edges_with_mask: image_edges intersected with the ROI mask
+        thresholds: (low, high) Canny thresholds used
+    """
+    mode = config.get("canny_mode", "fixed")
+    assert mode in CANNY_MODES, f"Unknown Canny mode {mode}"
+    if mode == "fixed":
+        thresholds = (config["canny_low_threshold"], config["canny_high_threshold"])
+        image_edges = cv2.Canny(image_blur, *thresholds, edges=edges, apertureSize=3)
+        timer.lap("canny")
+        image_edges_with_mask = cv2.bitwise_and(image_edges, roi_mask, dst=edges_with_mask)
+        timer.lap("roi_mask")
+        return image_edges, image_edges_with_mask, thresholds
+
+    params = {key: config.get(key, default) for key, default in ADAPTIVE_CANNY_DEFAULTS.items()}
+    if roi_stats is None:
+        roi_stats = compute_roi_stats(roi_mask=roi_mask, sample_step=params["canny_sample_step"])
+    sample_index, roi_area = roi_stats
+    low_threshold, high_threshold = compute_canny_thresholds(
+        samples=image_blur[sample_index],
+        mode=mode,
+        sigma=params["canny_sigma"],
+        low_high_ratio=params["canny_low_high_ratio"],
+    )
+    timer.lap("canny_thresholds")
+
+    min_density, max_density = params["canny_edge_density_range"]
+    for i_adjust in range(params["canny_max_adjustments"] + 1):
+        if i_adjust > 0:
+            low_threshold = max(low_threshold * scale, CANNY_MIN_THRESHOLD)
+            high_threshold = max(high_threshold * scale, CANNY_MIN_THRESHOLD)
+        image_edges = cv2.Canny(
+            image_blur, low_threshold, high_threshold, edges=edges, apertureSize=3
+        )
+        timer.lap("canny")
+        image_edges_with_mask = cv2.bitwise_and(image_edges, roi_mask, dst=edges_with_mask)
+        timer.lap("roi_mask")
+
+        density = cv2.countNonZero(image_edges_with_mask) / max(roi_area, 1)
+        if density > max_density:
+            scale = params["canny_adjust_factor"]
+        elif (density < min_density) and (low_threshold > CANNY_MIN_THRESHOLD):
+            scale = 1.0 / params["canny_adjust_factor"]
+        else:
+            break
+    return image_edges, image_edges_with_mask, (low_threshold, high_threshold)
@@ -0,0 +1,190 @@
+"""Preallocated work buffers of lane line detection and the image preprocessing writing into them"""
+# Standard Imports
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+
+# %% ENCAPSULATIONS
+class FrameBuffers:
+    """Preallocated single-channel work arrays for one image resolution"""
+
+    def __init__(self, image_shape: tuple, pyramid_levels: int = 0):
+        """Initialize instance
+
+        Args:
+            image_shape: (n_row, n_col, ...) image shape
+            pyramid_levels: Number of cv2.pyrDown halvings before edge and line detection
+        """
+        n_row, n_col = image_shape[:2]
+        self.image_shape = (n_row, n_col)
+        self.pyramid_levels = pyramid_levels
+        self.planes = [np.zeros((n_row, n_col), dtype=np.uint8) for _ in range(3)]
+        self.value = np.zeros((n_row, n_col), dtype=np.uint8)
+        self.pyramid = [
+            np.zeros(get_pyramid_shape(self.image_shape, level), dtype=np.uint8)
+            for level in range(1, pyramid_levels + 1)
+        ]
+
+        processing_shape = get_pyramid_shape(self.image_shape, pyramid_levels)
+        self.blur = np.zeros(processing_shape, dtype=np.uint8)
+        self.edges = np.zeros(processing_shape, dtype=np.uint8)
+        self.edges_with_mask = np.zeros(processing_shape, dtype=np.uint8)
+
+        # Crop windows the arrays are known to be zero outside of; None once fully written
+        self.crop_windows = []
+
+    def get_views(self, crop_windows: typing.List[tuple]) -> "_BufferViews":
+        """Get zero-copy views of the arrays restricted to crop windows
+
+        Arrays are zeroed whenever the windows differ from the previous call (or full frames were
+        written since), so everything outside the windows stays zero.
+
+        Args:
+            crop_windows: (row slice, col slice) per pyramid level, see compute_crop_windows()
+
+        Returns:
+            views: Same attributes as FrameBuffers, each a slice of the full array
+        """
+        if self.crop_windows != crop_windows:
+            for array in [*self.planes, self.value, *self.pyramid, self.blur, self.edges]:
+                array.fill(0)
+            self.edges_with_mask.fill(0)
+            self.crop_windows = crop_windows
+
+        processing_window = crop_windows[-1]
+        return _BufferViews(
+            planes=[plane[crop_windows[0]] for plane in self.planes],
+            value=self.value[crop_windows[0]],
+            pyramid=[
+                level_image[window] for level_image, window in zip(self.pyramid, crop_windows[1:])
+            ],
+            blur=self.blur[processing_window],
+            edges=self.edges[processing_window],
+            edges_with_mask=self.edges_with_mask[processing_window],
+        )
+
+
+class _BufferViews:
+    """Slices of FrameBuffers arrays, with the same attributes"""
+
+    def __init__(self, planes, value, pyramid, blur, edges, edges_with_mask):
+        """Initialize instance"""
+        self.planes = planes
+        self.value = value
+        self.pyramid = pyramid
+        self.blur = blur
+        self.edges = edges
+        self.edges_with_mask = edges_with_mask
+
+
+class _NoBuffers:
+    """Stand-in for FrameBuffers which lets OpenCV allocate every output"""
+
+    planes = None
+    value = None
+    pyramid = None
+    blur = None
+    edges = None
+    edges_with_mask = None
+
+
+NO_BUFFERS = _NoBuffers()
+
+
+# %% FUNCTIONS
+def compute_value_channel(
+    image: np.ndarray, planes: typing.List[np.ndarray] = None, dst: np.ndarray = None
+) -> np.ndarray:
+    """Compute the HSV value channel of a BGR image without a full HSV conversion
+
+    The value channel is max(B, G, R), so the hue and saturation work of cv2.cvtColor is skipped.
+
+    Args:
+        image: (n_row, n_col, 3) BGR image
+        planes: Optional list of three (n_row, n_col) uint8 arrays to split the B/G/R planes into
+        dst: Optional (n_row, n_col) uint8 output array
+
+    Returns:
+        image_value: (n_row, n_col) value channel
+    """
+    blue, green, red = cv2.split(image, planes)
+    image_value = cv2.max(blue, green, dst=dst)
+    return cv2.max(image_value, red, dst=image_value)
+
+
+def compute_crop_windows(
+    processing_roi_mask: np.ndarray,
+    image_shape: typing.Tuple[int, int],
+    pyramid_levels: int,
+    padding: int,
+) -> typing.List[typing.Tuple[slice, slice]]:
+    """Compute the padded ROI bounding box at every pyramid level
+
+    The box is padded at the processing resolution and scaled up, so its origin at full
+    resolution is a multiple of 2**pyramid_levels and cv2.pyrDown of the full resolution window
+    yields exactly the window of each coarser level.
+
+    Args:
+        processing_roi_mask: ROI mask at the processing resolution
+        image_shape: (n_row, n_col) full resolution image shape
+        pyramid_levels: Number of cv2.pyrDown halvings to the processing resolution
+        padding: Margin (processing resolution pixels) added around the bounding box for the
+                 support of blur, Canny and pyramid kernels
+
+    Returns:
+        crop_windows: (row slice, col slice) at full resolution, each pyramid level, and the
+                      processing resolution (last)
+    """
+    n_row, n_col = processing_roi_mask.shape[:2]
+    x, y, width, height = cv2.boundingRect(processing_roi_mask)
+    row_start, row_stop = max(y - padding, 0), min(y + height + padding, n_row)
+    col_start, col_stop = max(x - padding, 0), min(x + width + padding, n_col)
+
+    crop_windows = []
+    for level in range(pyramid_levels + 1):
+        level_shape = get_pyramid_shape(image_shape, level)
+        scale = 2 ** (pyramid_levels - level)
+        crop_windows.append(
+            (
+                slice(row_start * scale, min(row_stop * scale, level_shape[0])),
+                slice(col_start * scale, min(col_stop * scale, level_shape[1])),
+            )
+        )
+    return crop_windows
+
+
+def get_pyramid_shape(image_shape: tuple, levels: int) -> typing.Tuple[int, int]:
+    """Get the image shape after repeated cv2.pyrDown calls with default output size
+
+    Args:
+        image_shape: (n_row, n_col, ...) image shape
+        levels: Number of cv2.pyrDown calls
+
+    Returns:
+        shape: (n_row, n_col) downscaled shape
+    """
+    n_row, n_col = image_shape[:2]
+    for _ in range(levels):
+        n_row, n_col = (n_row + 1) // 2, (n_col + 1) // 2
+    return n_row, n_col
+
+
+def downscale_image(
+    image: np.ndarray, levels: int, dsts: typing.List[np.ndarray] = None
+) -> np.ndarray:
+    """Halve an image's resolution `levels` times with cv2.pyrDown (Gaussian pyramid)
+
+    Args:
+        image: (n_row, n_col) image
+        levels: Number of halvings; 0 returns the image itself
+        dsts: Optional list of `levels` output arrays, one per pyramid level
+
+    Returns:
+        image_small: Image at the last pyramid level
+    """
+    for level in range(levels):
+        image = cv2.pyrDown(image, dst=None if dsts is None else dsts[level])
+    return image
@@ -6,10 +6,28 @@ import logging
 # Third Party Imports
 import numpy as np
 import cv2
-import matplotlib.pyplot as plt
 
 # Local Imports
+from modules.algo import bev_remap
+from modules.algo import canny_edges
+from modules.algo import frame_buffers
+from modules.algo import lane_detection_cpp
 from modules.common import computer_vision as cvision
+from modules.common import profiling
+from modules.data import frame_stream
+
+# Strategies for choosing the left/right lane line among line segments; see select_lane_points()
+LANE_SELECTION_STRATEGIES = ("first", "longest", "least_squares")
+
+# Default margin (processing resolution pixels) around the ROI bounding box with 'roi_crop'
+ROI_CROP_PADDING = 16
+
+# Implementations selectable with the 'backend' config key; see make_lane_detector()
+LANE_DETECTION_BACKENDS = ("python", "cpp")
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
 
 # %% ENCAPSULATIONS
 class LaneLineDetector:
@@ -20,6 +38,9 @@ class LaneLineDetector:
         config: dict,
         tr_cam_to_road: np.ndarray,
         camera_matrix: np.ndarray,
+        collect_timings: bool = False,
+        timing_sink: typing.Callable[[dict], None] = None,
+        reuse_buffers: bool = False,
     ):
         """Initialize instance
 
@@ -28,6 +49,18 @@ class LaneLineDetector:
                 'blur_kernel_shape': (2,) tuple stored as (width, length) in pixels
                 'canny_low_threshold': int, 0-255 lower threshold for Canny edge detection
                 'canny_high_threshold': int, 0-255 upper threshold for Canny edge detection
+                'canny_mode': Optional, one of canny_edges.CANNY_MODES (default 'fixed');
+                              'median' and 'otsu' derive the thresholds of each frame from its
+                              blurred ROI pixels instead of using the two above, see
+                              canny_edges.detect_canny_edges():
+                    'canny_sigma': 'median' thresholds are (1 -/+ sigma) * median
+                    'canny_low_high_ratio': 'otsu' thresholds are (ratio, 1) * Otsu threshold
+                    'canny_sample_step': Every step-th ROI row and column is sampled
+                    'canny_edge_density_range': (min, max) target fraction of ROI pixels which
+                                                are edges
+                    'canny_max_adjustments': Maximum number of times Canny is rerun with scaled
+                                             thresholds to reach the edge density range
+                    'canny_adjust_factor': Factor thresholds are scaled by per adjustment
                 'roi_polygon': (n_vertex,) list of (x, y) pixel coordinates defining polygon ROI
                                boundaries
                 'hough_rho_res': Hough transform rho (distance from origin) resolution (pixels)
@@ -36,13 +69,187 @@ class LaneLineDetector:
                                                consider a line
                 'hough_min_line_length': Hough transform minimum line length (pixels)
                 'hough_max_line_gap': Hough transform maximum gap between two line points (pixels)
+                'lane_selection': Optional, one of LANE_SELECTION_STRATEGIES; how the lane line on
+                                  each side is chosen among Hough lines (default 'first')
+                'backend': Optional, one of LANE_DETECTION_BACKENDS; implementation created by
+                           make_lane_detector() (default 'python'); ignored by this class
+                'pyramid_levels': Optional, number of times the value channel is halved with
+                                  cv2.pyrDown before edge and line detection (default 0, full
+                                  resolution); ROI and Hough pixel parameters are rescaled
+                                  automatically, so they stay in full-resolution pixels
+                'roi_crop': Optional, whether value, blur, Canny and ROI masking only process the
+                            ROI bounding box plus padding (default False); stage images are zero
+                            outside of it and HoughLinesP still sees the full-size edge image, so
+                            lines are unchanged as long as the padding covers the blur, Canny and
+                            pyramid support (Canny hysteresis can in rare cases link edges through
+                            pixels beyond the padding); the full-size work arrays are then always
+                            reused across frames, as with reuse_buffers
+                'roi_crop_padding': Optional, padding (pixels at the processing resolution)
+                                    around the ROI bounding box (default ROI_CROP_PADDING)
+                'pyramid_refine_half_width': Optional, half width (full-resolution pixels) of the
+                                             strip around each lane line searched at full
+                                             resolution to refine lines found on a downscaled
+                                             image; 0 disables refinement (default 0)
+                'bev': Optional, bird's eye view warp settings used by warp_to_bev():
+                    'lateral_range_m': (min, max) road frame x (right) covered (m)
+                    'forward_range_m': (min, max) road frame z (forward) covered (m)
+                    'meters_per_pixel': BEV image resolution (m/pixel)
+                    'roi_only': Whether to only warp BEV rows which see the ROI polygon
             tr_cam_to_road: (3, 4) transformation matrix from road to camera; composed of rotation
                             and translation: [R | t]
             camera_matrix: (3, 3) intrinsic camera matrix
+            collect_timings: If True, run() output includes per-stage timings
+            timing_sink: Optional callable receiving each frame's {stage: duration_ns} timings,
+                         e.g. profiling.LatencyRecorder(); when neither this nor collect_timings
+                         is set, timing is disabled and costs (almost) nothing
+            reuse_buffers: If True, per-frame work arrays are preallocated for the input
+                           resolution and reused across frames so steady-state processing does
+                           (almost) no heap allocation; intermediate images returned by
+                           detect_lane_points() are then overwritten by the next frame; with
+                           'roi_crop', the work arrays of the cropped stages are always reused
         """
         self.config = config
         self.tr_cam_to_road = tr_cam_to_road
         self.camera_matrix = camera_matrix
+        self.collect_timings = collect_timings
+        self.timing_sink = timing_sink
+        self.reuse_buffers = reuse_buffers
+
+        # Geometry derived from calibration/ROI; built lazily on first frame of a given resolution
+        self._geometry = None
+        self._buffers = None
+        self._bev_remap = None
+
+    def get_geometry(self, image_shape: tuple) -> "CalibratedGeometry":
+        """Get calibrated geometry for an image shape, rebuilding it only when needed
+
+        The geometry is rebuilt whenever the image resolution, the ROI polygon, pyramid levels or
+        ROI cropping in the config or the calibration (tr_cam_to_road, camera_matrix) changes;
+        otherwise the cached instance is returned.
+
+        Args:
+            image_shape: (n_row, n_col, ...) image shape
+
+        Returns:
+            geometry: Precomputed geometry for this image shape and calibration
+        """
+        roi_crop_padding = None
+        if self.config.get("roi_crop", False):
+            roi_crop_padding = self.config.get("roi_crop_padding", ROI_CROP_PADDING)
+        key = CalibratedGeometry.make_key(
+            image_shape=image_shape,
+            roi_polygon=self.config["roi_polygon"],
+            tr_cam_to_road=self.tr_cam_to_road,
+            camera_matrix=self.camera_matrix,
+            pyramid_levels=self.config.get("pyramid_levels", 0),
+            roi_crop_padding=roi_crop_padding,
+        )
+        if (self._geometry is None) or (self._geometry.key != key):
+            self._geometry = CalibratedGeometry(
+                image_shape=image_shape,
+                roi_polygon=self.config["roi_polygon"],
+                tr_cam_to_road=self.tr_cam_to_road,
+                camera_matrix=self.camera_matrix,
+                pyramid_levels=self.config.get("pyramid_levels", 0),
+                roi_crop_padding=roi_crop_padding,
+            )
+        return self._geometry
+
+    def get_bev_remap(self, image_shape: tuple, scale: int = 1) -> bev_remap.BevRemap:
+        """Get bird's eye view remap tables for an image shape, rebuilding them only when needed
+
+        Like get_geometry(), the tables are rebuilt only when the image resolution, ROI polygon,
+        'bev' settings or calibration change.
+
+        Args:
+            image_shape: (n_row, n_col, ...) image shape
+            scale: Factor the image is downscaled by w.r.t. the calibration, e.g. the
+                   processing_scale of a geometry to warp pyramid-level edge images
+
+        Returns:
+            remap: BEV remap tables for this image shape and calibration
+        """
+        bev_config = self.config.get("bev", {})
+        camera_matrix = np.asarray(self.camera_matrix, dtype=np.float64)[:3, :3]
+        roi_polygon = self.config["roi_polygon"]
+        if scale != 1:
+            camera_matrix = np.diag([1.0 / scale, 1.0 / scale, 1.0]) @ camera_matrix
+            roi_polygon = np.round(np.array(roi_polygon) / scale).astype(int).tolist()
+        kwargs = {
+            "image_shape": image_shape,
+            "tr_cam_to_road": self.tr_cam_to_road,
+            "camera_matrix": camera_matrix,
+            "lateral_range_m": bev_config.get("lateral_range_m", (-10.0, 10.0)),
+            "forward_range_m": bev_config.get("forward_range_m", (6.0, 46.0)),
+            "meters_per_pixel": bev_config.get("meters_per_pixel", 0.05),
+            "roi_polygon": roi_polygon,
+        }
+        if (self._bev_remap is None) or (
+            self._bev_remap.key != bev_remap.BevRemap.make_key(**kwargs)
+        ):
+            self._bev_remap = bev_remap.BevRemap(**kwargs)
+        return self._bev_remap
+
+    def warp_to_bev(self, image: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
+        """Warp an image (or e.g. its edge map) to the bird's eye view with cached remap tables
+
+        Args:
+            image: (n_row, n_col, ...) camera image
+            dst: Optional output array of the BEV (or BEV ROI strip) shape
+
+        Returns:
+            image_bev: (n_bev_row, n_bev_col, ...) BEV image; only the rows which see the ROI if
+                       the 'bev' config sets 'roi_only'
+        """
+        remap = self.get_bev_remap(image.shape)
+        roi_only = self.config.get("bev", {}).get("roi_only", False)
+        return remap.warp(image, roi_only=roi_only, dst=dst)
+
+    def get_buffers(self, image_shape: tuple) -> frame_buffers.FrameBuffers:
+        """Get preallocated work arrays for an image shape, reallocating only on resolution change
+
+        Args:
+            image_shape: (n_row, n_col, ...) image shape
+
+        Returns:
+            buffers: Work arrays sized to the image
+        """
+        pyramid_levels = self.config.get("pyramid_levels", 0)
+        if (
+            (self._buffers is None)
+            or (self._buffers.image_shape != tuple(image_shape[:2]))
+            or (self._buffers.pyramid_levels != pyramid_levels)
+        ):
+            self._buffers = frame_buffers.FrameBuffers(image_shape, pyramid_levels=pyramid_levels)
+        return self._buffers
+
+    def make_timer(self) -> typing.Union[profiling.StageTimer, profiling.NullStageTimer]:
+        """Create a stage timer for one frame; a shared no-op timer when timing is disabled
+
+        Returns:
+            timer: Stage timer
+        """
+        if self.collect_timings or (self.timing_sink is not None):
+            return profiling.StageTimer()
+        return profiling.NULL_TIMER
+
+    def emit_timings(
+        self,
+        timer: typing.Union[profiling.StageTimer, profiling.NullStageTimer],
+        out: dict = None,
+    ):
+        """Publish a frame's stage timings to the output dict and/or timing sink
+
+        Args:
+            timer: Stage timer of the frame
+            out: Output dict to add 'stage_timings_ns' to if collect_timings is set
+        """
+        if timer.timings_ns is None:
+            return
+        if self.collect_timings and (out is not None):
+            out["stage_timings_ns"] = dict(timer.timings_ns)
+        if self.timing_sink is not None:
+            self.timing_sink(timer.timings_ns)
 
     def run(
         self,
@@ -61,83 +268,368 @@ class LaneLineDetector:
             out: Contains output parameters
                 'left_lane_angle': Angle of left lane w.r.t. road coordinates (rad); 0 to pi radians
                 'right_lane_angle': Angle of right lane w.r.t. road coordinates (rad); 0 to pi rad
+                'is_left_found': Whether left lane line was found; if not, angle is NaN
+                'is_right_found': Whether right lane line was found; if not, angle is NaN
+                'stage_timings_ns': Only if collect_timings is set; duration (ns) of each stage
         """
         if logger is None:
-            logger = logging.getLogger()
-            logger.addHandler(logging.NullHandler())
+            logger = LOGGER
+        timer = self.make_timer()
 
         logger.info("Beggining lane line detection")
+        geometry = self.get_geometry(image.shape)
+        timer.lap("geometry")
+        lane_points, stages = self.detect_lane_points(
+            image=image, geometry=geometry, logger=logger, timer=timer
+        )
+        left_points, right_points = lane_points
+        is_left_found = not np.isnan(left_points).any()
+        is_right_found = not np.isnan(right_points).any()
 
-        # Convert to HSV and select only the value channel
-        image_hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        image_value = image_hsv[:, :, 2]
+        # === Project to real world ===
+        logger.info("Recovering points in 3D...")
+        logger.debug("4D Camera Matrix:\n%r", geometry.camera_matrix_4d)
+        logger.debug("4D Camera Matrix - Inverted:\n%r", geometry.camera_matrix_inv)
+        logger.debug("Left Start: %r", left_points[0, :])
+        logger.debug("Left End: %r", left_points[1, :])
+        logger.debug("Right Start: %r", right_points[0, :])
+        logger.debug("Right End: %r", right_points[1, :])
+
+        p_bevs = project_to_bev(points=lane_points, geometry=geometry)
+        left_lane_angle, right_lane_angle = compute_lane_angles(p_bevs)
+        timer.lap("project")
+        logger.debug("pBev: %r", p_bevs)
+        logger.debug("Left angle: %f radians", left_lane_angle)
+        logger.debug("Right angle: %f radians", right_lane_angle)
+
+        out = {
+            "left_lane_angle": left_lane_angle,
+            "right_lane_angle": right_lane_angle,
+            "is_left_found": is_left_found,
+            "is_right_found": is_right_found,
+        }
+        self.emit_timings(timer=timer, out=out)
+
+        if fig_num is not None:
+            # Plotting pulls in matplotlib; only import it when plots are requested
+            from modules.algo import lane_detection_plots  # pylint: disable=import-outside-toplevel
+
+            lane_detection_plots.plot_lane_detection(
+                fig_num=fig_num,
+                image=image,
+                stages=stages,
+                roi_mask=geometry.roi_mask,
+                lane_points=lane_points,
+                p_bevs=p_bevs,
+                out=out,
+            )
+
+        return out
+
+    def run_batch(
+        self,
+        images: typing.Union[np.ndarray, typing.Iterable[np.ndarray]],
+        logger: logging.Logger = None,
+    ) -> dict:
+        """Run lane line detection over a stack of frames sharing this detector's calibration
+
+        Image processing runs per frame, but the lift of all N x 2 lanes x 2 endpoints from pixels
+        to the bird's eye frame is done in a single vectorized pass.
+
+        Args:
+            images: (N, n_row, n_col, 3) BGR image stack or iterable of (n_row, n_col, 3) images
+            logger: Logger
+
+        Returns:
+            out: Columnar output parameters
+                'left_lane_angle': (N,) angle of left lane w.r.t. road coordinates (rad); NaN if
+                                   not found
+                'right_lane_angle': (N,) angle of right lane w.r.t. road coordinates (rad); NaN if
+                                    not found
+                'is_left_found': (N,) whether left lane line was found
+                'is_right_found': (N,) whether right lane line was found
+                'left_bev_points': (N, 2, 3) left lane endpoints in bird's eye frame
+                'right_bev_points': (N, 2, 3) right lane endpoints in bird's eye frame
+
+            Per-frame stage timings (excluding the batched projection) are only sent to the
+            timing sink.
+        """
+        if logger is None:
+            logger = LOGGER
+
+        geometry = None
+        lane_points = []
+        for image in images:
+            timer = self.make_timer()
+            geometry = self.get_geometry(image.shape)
+            timer.lap("geometry")
+            points, _ = self.detect_lane_points(
+                image=image, geometry=geometry, logger=logger, timer=timer
+            )
+            lane_points.append(points)
+            self.emit_timings(timer=timer)
+        logger.info("Ran lane line detection on %d frames", len(lane_points))
+
+        if geometry is None:
+            lane_points = np.empty((0, 2, 2, 2))
+            p_bevs = np.empty((0, 2, 2, 3))
+        else:
+            # (N, lane, point, xy); geometry used for projection depends only on calibration
+            lane_points = np.stack(lane_points, axis=0)
+            p_bevs = project_to_bev(points=lane_points, geometry=geometry)
+        is_found = ~np.isnan(lane_points).any(axis=(-2, -1))  # (N, lane)
+        lane_angles = compute_lane_angles(p_bevs)  # (N, lane)
+
+        out = {
+            "left_lane_angle": lane_angles[:, 0],
+            "right_lane_angle": lane_angles[:, 1],
+            "is_left_found": is_found[:, 0],
+            "is_right_found": is_found[:, 1],
+            "left_bev_points": p_bevs[:, 0],
+            "right_bev_points": p_bevs[:, 1],
+        }
+        return out
+
+    def run_stream(
+        self,
+        source: typing.Union[str, int, cv2.VideoCapture],
+        max_queue_size: int = 8,
+        drop_oldest: bool = False,
+        logger: logging.Logger = None,
+    ) -> typing.Iterator[dict]:
+        """Run lane line detection on a continuous stream of frames
+
+        Frames are decoded on a background thread into a bounded queue (see
+        frame_stream.FrameStream), so decoding overlaps with detection and with whatever the caller
+        does with each result.
+
+        Args:
+            source: Video file path, image sequence glob pattern, camera index or cv2.VideoCapture
+            max_queue_size: Maximum number of decoded frames waiting to be processed
+            drop_oldest: If True, drop the oldest queued frame when detection falls behind
+                         (real-time use); otherwise decoding blocks until there is room
+            logger: Logger
+
+        Yields:
+            out: Output of run() for each frame, plus
+                'frame_index': Index of the frame in the source
+                'fps': Achieved frames per second so far
+                'queue_depth': Number of decoded frames waiting to be processed
+                'n_dropped': Total number of frames dropped so far
+        """
+        stats = frame_stream.StreamStats()
+        with frame_stream.FrameStream(
+            source=source, max_queue_size=max_queue_size, drop_oldest=drop_oldest
+        ) as frames:
+            for frame_index, image in frames:
+                out = self.run(image=image, logger=logger)
+                out["frame_index"] = frame_index
+                out["fps"] = stats.update()
+                out["queue_depth"] = frames.queue_depth
+                out["n_dropped"] = frames.n_dropped
+                yield out
+
+    def detect_edges(
+        self,
+        image: np.ndarray,
+        geometry: "CalibratedGeometry",
+        roi_mask: np.ndarray = None,
+        timer: profiling.StageTimer = profiling.NULL_TIMER,
+    ) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Run the edge detection stages shared by all lane detection engines on a single frame
+
+        Args:
+            image: (n_row, n_col, 3) BGR image
+            geometry: Calibrated geometry for this image shape
+            roi_mask: (n_row, n_col) uint8 mask (0 or 255) of pixels searched for lines; defaults
+                      to the configured ROI polygon; downscaled to the processing resolution
+                      when pyramid levels are configured
+            timer: Stage timer recording the duration of each processing stage
+
+        Returns:
+            image_value: (n_row, n_col) value channel
+            image_blur: Blurred (possibly downscaled) value channel
+            image_edges: Canny edges of image_blur
+            image_edges_with_mask: image_edges intersected with the ROI mask
+        """
+        # Stages run on the padded ROI bounding box only if cropping is configured; custom ROI
+        # masks (e.g. tracking bands) may lie anywhere, so they are always processed in full
+        crop_windows = geometry.crop_windows if roi_mask is None else None
+        if crop_windows is None:
+            # Work arrays are either reused across frames or allocated by OpenCV (dst=None)
+            buffers = (
+                self.get_buffers(image.shape) if self.reuse_buffers else frame_buffers.NO_BUFFERS
+            )
+            if self.reuse_buffers:
+                buffers.crop_windows = None  # every pixel is written below
+            views = buffers
+        else:
+            # Zero-copy slices of full-size arrays which are zero outside the windows; kept
+            # across frames even without reuse_buffers, so they are only zeroed when the windows
+            # change rather than allocated and zeroed per frame
+            buffers = self.get_buffers(image.shape)
+            views = buffers.get_views(crop_windows)
+            image = image[crop_windows[0]]
+
+        # Select the value channel (HSV) = max over B/G/R
+        image_value = frame_buffers.compute_value_channel(
+            image=image, planes=views.planes, dst=views.value
+        )
+        timer.lap("value")
+
+        # Optionally downscale so edge and line detection run on fewer pixels
+        image_processed = frame_buffers.downscale_image(
+            image=image_value, levels=geometry.pyramid_levels, dsts=views.pyramid
+        )
+        if geometry.pyramid_levels > 0:
+            timer.lap("pyramid")
 
         # Apply Gaussian blur to image
-        image_blur = cv2.GaussianBlur(image_value, self.config["blur_kernel_shape"], 0)
-
-        # Canny Edge Detection
-        image_edges = cv2.Canny(
-            image_blur,
-            self.config["canny_low_threshold"],
-            self.config["canny_high_threshold"],
-            apertureSize=3,
+        image_blur = cv2.GaussianBlur(
+            image_processed, self.config["blur_kernel_shape"], 0, dst=views.blur
+        )
+        timer.lap("blur")
+
+        # Canny edge detection intersected with the ROI mask (precomputed per image shape)
+        if roi_mask is None:
+            roi_mask = geometry.processing_roi_mask
+            if crop_windows is not None:
+                roi_mask = roi_mask[crop_windows[-1]]
+            roi_stats = geometry.get_roi_stats(
+                self.config.get(
+                    "canny_sample_step", canny_edges.ADAPTIVE_CANNY_DEFAULTS["canny_sample_step"]
+                )
+            )
+        else:
+            if roi_mask.shape != geometry.processing_shape:
+                roi_mask = cv2.resize(
+                    roi_mask, geometry.processing_shape[::-1], interpolation=cv2.INTER_NEAREST
+                )
+            roi_stats = None
+        image_edges, image_edges_with_mask, _ = canny_edges.detect_canny_edges(
+            image_blur=image_blur,
+            roi_mask=roi_mask,
+            config=self.config,
+            roi_stats=roi_stats,
+            edges=views.edges,
+            edges_with_mask=views.edges_with_mask,
+            timer=timer,
         )
 
-        # Create Region of Interest Mask
-        n_row, n_col, _ = image.shape
-        roi_mask = np.zeros_like(image, shape=(n_row, n_col))
-        cv2.fillPoly(roi_mask, np.array([self.config["roi_polygon"]]), 255)
-
-        # Intersect edges with ROI mask
-        image_edges_with_mask = image_edges * roi_mask
-
-        # Detect lines in mask
-        lines = cv2.HoughLinesP(
-            image_edges_with_mask,
-            self.config["hough_rho_res"],
-            np.deg2rad(self.config["hough_theta_res_deg"]),
-            threshold=self.config["hough_accumulator_threshold"],
-            minLineLength=self.config["hough_min_line_length"],
-            maxLineGap=self.config["hough_max_line_gap"],
+        if crop_windows is not None:
+            # Full-size images, so pixel coordinates (e.g. of Hough lines) need no offset
+            return buffers.value, buffers.blur, buffers.edges, buffers.edges_with_mask
+        return image_value, image_blur, image_edges, image_edges_with_mask
+
+    def detect_lane_points(
+        self,
+        image: np.ndarray,
+        geometry: "CalibratedGeometry",
+        logger: logging.Logger = None,
+        roi_mask: np.ndarray = None,
+        timer: profiling.StageTimer = profiling.NULL_TIMER,
+    ) -> typing.Tuple[np.ndarray, dict]:
+        """Find left/right lane line endpoints in pixel coordinates for a single frame
+
+        Args:
+            image: (n_row, n_col, 3) BGR image
+            geometry: Calibrated geometry for this image shape
+            logger: Logger
+            roi_mask: (n_row, n_col) uint8 mask (0 or 255) of pixels searched for lines; defaults
+                      to the configured ROI polygon; downscaled to the processing resolution
+                      when pyramid levels are configured
+            timer: Stage timer recording the duration of each processing stage
+
+        Returns:
+            lane_points: (2, 2, 2) = (lane, point, xy) float endpoints of the left and right lane
+                         lines; NaN for a lane which was not found
+            stages: Intermediate results keyed by stage name ('image_value', 'image_blur',
+                    'image_edges', 'image_edges_with_mask', and 'lines', the (n_line, 1, 4)
+                    HoughLinesP output ordered by confidence in full-resolution pixels); all but
+                    'image_value' are at the processing (possibly downscaled) resolution
+        """
+        if logger is None:
+            logger = LOGGER
+
+        image_value, image_blur, image_edges, image_edges_with_mask = self.detect_edges(
+            image=image, geometry=geometry, roi_mask=roi_mask, timer=timer
         )
-        logger.debug(f"HoughLinesP found %d lines", len(lines))
 
-        # Store points belonging to each line as (n_point, xy) = (2, 2) matrix:
-        left_points = None
-        right_points = None
-        n_line = lines.shape[0]
+        # Detect lines in mask; pixel parameters are configured at full resolution
+        scale = geometry.processing_scale
+        lines = detect_lines(image_edges_with_mask, config=self.config, scale=scale)
+        timer.lap("hough")
+        logger.debug("HoughLinesP found %d lines", len(lines))
+
+        # Classify and select lines per side in one vectorized pass
         n_row, n_col, _ = image.shape
-        for i_line in range(n_line):
-            # Lines ordered by confidence level
-            x1, y1, x2, y2 = lines[i_line, 0, :]
-            slope = (y2 - y1) / (x2 - x1)
-            intercept = y2 - slope * x2
-            line_side = check_lane_side(
-                slope=slope, intercept=intercept, n_row=n_row, n_col=n_col
+        lane_points = select_lane_points(
+            lines=lines,
+            n_row=n_row,
+            n_col=n_col,
+            strategy=self.config.get("lane_selection", "first"),
+        )
+        timer.lap("select")
+
+        refine_half_width = self.config.get("pyramid_refine_half_width", 0)
+        if (scale != 1) and (refine_half_width > 0):
+            lane_points = refine_lane_points(
+                image_value=image_value,
+                lane_points=lane_points,
+                half_width=refine_half_width,
             )
+            timer.lap("refine")
+        logger.debug("Left lane line found? %r", not np.isnan(lane_points[0]).any())
+        logger.debug("Right lane line found? %r", not np.isnan(lane_points[1]).any())
 
-            # If this line is on left and left lane not yet found...
-            if (line_side == "left") and (left_points is None):
-                left_points = np.stack((np.array([x1, y1]), np.array([x2, y2])), axis=0)
+        stages = {
+            "image_value": image_value,
+            "image_blur": image_blur,
+            "image_edges": image_edges,
+            "image_edges_with_mask": image_edges_with_mask,
+            "lines": lines,
+        }
+        return lane_points, stages
 
-            # If this line is on right and right lane not yet found...
-            elif (line_side == "right") and (right_points is None):
-                right_points = np.stack(
-                    (np.array([x1, y1]), np.array([x2, y2])), axis=0
-                )
 
-            # If both left/right lanes are found, stop looking
-            if (left_points is not None) and (right_points is not None):
-                break
+class CalibratedGeometry:
+    """Geometry derived from fixed calibration and ROI, computed once instead of per frame"""
+
+    def __init__(
+        self,
+        image_shape: tuple,
+        roi_polygon: list,
+        tr_cam_to_road: np.ndarray,
+        camera_matrix: np.ndarray,
+        pyramid_levels: int = 0,
+        roi_crop_padding: int = None,
+    ):
+        """Initialize instance
 
-        logger.debug("Left lane line found? %r", left_points is not None)
-        logger.debug("Right lane line found? %r", right_points is not None)
+        Args:
+            image_shape: (n_row, n_col, ...) image shape
+            roi_polygon: (n_vertex,) list of (x, y) pixel coordinates defining polygon ROI
+            tr_cam_to_road: (3, 4) transformation matrix from road to camera; [R | t]
+            camera_matrix: (3, 3) intrinsic camera matrix
+            pyramid_levels: Number of cv2.pyrDown halvings between the image and the resolution
+                            edges and lines are detected at
+            roi_crop_padding: Padding (processing resolution pixels) of the ROI bounding box
+                              stages are cropped to; None disables cropping
+        """
+        self.key = self.make_key(
+            image_shape=image_shape,
+            roi_polygon=roi_polygon,
+            tr_cam_to_road=tr_cam_to_road,
+            camera_matrix=camera_matrix,
+            pyramid_levels=pyramid_levels,
+            roi_crop_padding=roi_crop_padding,
+        )
+        n_row, n_col = image_shape[:2]
+        self.image_shape = (n_row, n_col)
+        self.roi_polygon = np.array(roi_polygon)  # (n_vertex, xy)
 
-        # === Project to real world ===
-        # Left line: sample two points on line, rotate into road coordiante frame (centered at camera)
-        # where x/y in road and +z out of road. Drop z coordinate and fit road-frame line
-        cam_to_road = self.tr_cam_to_road[:3, :3]  # (3, 3) rotation matrix
-        tvec_cam_to_road = self.tr_cam_to_road[
+        cam_to_road = tr_cam_to_road[:3, :3]  # (3, 3) rotation matrix
+        tvec_cam_to_road = tr_cam_to_road[
             :3, 3
         ]  # (3,) translation vector = -cam_to_road * p_road_in_cam_frame
 
@@ -147,170 +639,362 @@ class LaneLineDetector:
         p_roadorigin_cam = -np.linalg.solve(
             cam_to_road, tvec_cam_to_road
         )  # road coord frame origin in camera frame
-        camera_height = p_roadorigin_cam[1]  # y-value
-
-        # Define bird's eye frame. Note: This is similar to the "Road" coordinate frame, but chosen such
-        # that the +z axis points directly downward instead of +y
-        ux_road_cam = cam_to_road[
-            0, :
-        ]  # get the road frame basis vectors in the camera frame
-        uy_road_cam = cam_to_road[1, :]
-        uz_road_cam = cam_to_road[2, :]
-        cam_to_bev = np.stack((uz_road_cam, ux_road_cam, uy_road_cam), axis=0)
-
-        # Rotate to equivalent bird's eye frame (still centered at camera)
-        p_bevs = []  # list for each left/right lane, each have 2 points with xyz coords
+        self.camera_height = p_roadorigin_cam[1]  # y-value
+
+        # Define bird's eye frame. Note: This is similar to the "Road" coordinate frame, but chosen
+        # such that the +z axis points directly downward instead of +y; rows of cam_to_road are the
+        # road frame basis vectors in the camera frame
+        ux_road_cam, uy_road_cam, uz_road_cam = cam_to_road
+        self.cam_to_bev = np.stack((uz_road_cam, ux_road_cam, uy_road_cam), axis=0)
+
         # Invert perspective transform
         camera_matrix_4d = np.eye(4)
-        camera_matrix_4d[:3, :3] = self.camera_matrix[
+        camera_matrix_4d[:3, :3] = camera_matrix[
             :3, :3
         ]  # see kitti documentation; this is cam matrix
-        camera_matrix_inv = np.linalg.inv(camera_matrix_4d)
-        logger.debug("4D Camera Matrix:\n%r", camera_matrix_4d)
-        logger.debug("4D Camera Matrix - Inverted:\n%r", camera_matrix_inv)
-
-        logger.info("Recovering points in 3D...")
-
-        logger.debug("Left Start: %r", left_points[0, :])
-        logger.debug("Left End: %r", left_points[1, :])
-        logger.debug("Right Start: %r", right_points[0, :])
-        logger.debug("Right End: %r", right_points[1, :])
-        for ii, cam_pix in enumerate([left_points, right_points]):
-            bev_pix = cvision.apply_perspective_transform(
-                v=cam_pix, transform=cam_to_bev
+        self.camera_matrix_4d = camera_matrix_4d
+        self.camera_matrix_inv = np.linalg.inv(camera_matrix_4d)
+
+        # Region of Interest Mask
+        self.roi_mask = np.zeros((n_row, n_col), dtype=np.uint8)
+        cv2.fillPoly(self.roi_mask, np.array([roi_polygon]), 255)
+
+        # Resolution edges and lines are detected at, with the ROI mask rescaled to match
+        self.pyramid_levels = pyramid_levels
+        self.processing_scale = 2**pyramid_levels
+        self.processing_shape = frame_buffers.get_pyramid_shape(self.image_shape, pyramid_levels)
+        if pyramid_levels == 0:
+            self.processing_roi_mask = self.roi_mask
+        else:
+            self.processing_roi_mask = np.zeros(self.processing_shape, dtype=np.uint8)
+            roi_polygon_scaled = np.round(self.roi_polygon / self.processing_scale)
+            cv2.fillPoly(
+                self.processing_roi_mask, np.array([roi_polygon_scaled], dtype=np.int32), 255
             )
 
-            # Augment pixel to 4D so we can recover point with inverse depth
-            depth = camera_height
-            bev_pix_aug = cvision.augment(bev_pix)
-            bev_pix_aug_4d = cvision.augment(bev_pix_aug)
-            bev_pix_aug_4d[..., -1] /= depth
-            p_bev_homo = np.einsum(
-                "ij, ...j -> ...i", camera_matrix_inv, bev_pix_aug_4d
+        # Padded ROI bounding box per pyramid level, if stages are cropped to it
+        self.crop_windows = None
+        if roi_crop_padding is not None:
+            self.crop_windows = frame_buffers.compute_crop_windows(
+                processing_roi_mask=self.processing_roi_mask,
+                image_shape=self.image_shape,
+                pyramid_levels=pyramid_levels,
+                padding=roi_crop_padding,
             )
-            p_bev = cvision.homo_to_cart(p_bev_homo)
-            p_bevs.append(p_bev)
+        self._roi_stats = {}
 
-            logger.debug("augmented4d: %r", bev_pix_aug_4d)
-            logger.debug("pBevHomo: %r", p_bev_homo)
-            logger.debug("pBev: %r", p_bev)
+    def get_roi_stats(self, sample_step: int) -> typing.Tuple[np.ndarray, int]:
+        """Get the ROI pixel sample and area used by adaptive Canny thresholds, computed once
 
-        # Forget about +z coord which is height off ground; care only about angle of x/y coords
-        p_bev_left, p_bev_right = p_bevs
-        v_left_lane = (
-            p_bev_left[1, :] - p_bev_left[0, :]
-        )  # left lane vector from point (x1, y1, z1) to (x2, y2, z2)
-        v_right_lane = p_bev_right[1, :] - p_bev_right[0, :]
+        Args:
+            sample_step: Every sample_step-th row and column of the processing ROI is sampled
 
-        logger.debug("v_left_lane: (%f, %f, %f)", *v_left_lane)
-        logger.debug("v_right_lane: (%f, %f, %f)", *v_right_lane)
+        Returns:
+            roi_stats: See canny_edges.compute_roi_stats(); relative to the processing crop
+                       window, if any
+        """
+        if sample_step not in self._roi_stats:
+            if self.crop_windows is None:
+                roi_stats = canny_edges.compute_roi_stats(
+                    roi_mask=self.processing_roi_mask, sample_step=sample_step
+                )
+            else:
+                rows, cols = self.crop_windows[-1]
+                roi_stats = canny_edges.compute_roi_stats(
+                    roi_mask=self.processing_roi_mask[rows, cols],
+                    sample_step=sample_step,
+                    origin=(rows.start, cols.start),
+                )
+            self._roi_stats[sample_step] = roi_stats
+        return self._roi_stats[sample_step]
 
-        left_lane_angle = np.arctan2(v_left_lane[1], v_left_lane[0])
-        right_lane_angle = np.arctan2(v_right_lane[1], v_right_lane[0])
+    @staticmethod
+    def make_key(
+        image_shape: tuple,
+        roi_polygon: list,
+        tr_cam_to_road: np.ndarray,
+        camera_matrix: np.ndarray,
+        pyramid_levels: int = 0,
+        roi_crop_padding: int = None,
+    ) -> tuple:
+        """Make hashable key identifying the inputs a geometry was computed from
 
-        # Ensure angles are in quadrant 1 or 2 (0 to pi radians)
-        if left_lane_angle < 0.0:
-            left_lane_angle += np.pi
-        if right_lane_angle < 0.0:
-            right_lane_angle += np.pi
+        Args:
+            image_shape: (n_row, n_col, ...) image shape
+            roi_polygon: (n_vertex,) list of (x, y) pixel coordinates defining polygon ROI
+            tr_cam_to_road: (3, 4) transformation matrix from road to camera; [R | t]
+            camera_matrix: (3, 3) intrinsic camera matrix
+            pyramid_levels: Number of cv2.pyrDown halvings before edge and line detection
+            roi_crop_padding: Padding of the ROI bounding box stages are cropped to; None if not
 
-        logger.debug("Left angle: %f radians", left_lane_angle)
-        logger.debug("Right angle: %f radians", right_lane_angle)
+        Returns:
+            key: Tuple which compares equal only for identical inputs
+        """
+        key = (
+            tuple(image_shape[:2]),
+            tuple(tuple(vertex) for vertex in roi_polygon),
+            np.asarray(tr_cam_to_road, dtype=np.float64).tobytes(),
+            np.asarray(camera_matrix, dtype=np.float64)[:3, :3].tobytes(),
+            pyramid_levels,
+            roi_crop_padding,
+        )
+        return key
 
-        out = {"left_lane_angle": left_lane_angle, "right_lane_angle": right_lane_angle}
 
-        if fig_num is not None:
-            # Plot lines onto original image
-            is_left_found = left_points is not None
-            is_right_found = right_points is not None
-
-            image_infos = [
-                {
-                    "image": image,
-                    "title": "Original",
-                    "kwargs": {}
-                },
-                {
-                    "image": image_value,
-                    "title": "HSV - Value",
-                    "kwargs": {"cmap": "gray"},
-                },
-                {
-                    "image": image_blur,
-                    "title": "Value - Gaussian Blur",
-                    "kwargs": {"cmap": "gray"},
-                },
-                {
-                    "image": image_edges,
-                    "title": "Canny Edges",
-                    "kwargs": {"cmap": "gray"},
-                },
-                {
-                    "image": roi_mask,
-                    "title": "ROI Mask",
-                    "kwargs": {"cmap": "gray"}
-                },
-                {
-                    "image": image_edges_with_mask,
-                    "title": "Edges w/ ROI Mask",
-                    "kwargs": {"cmap": "gray"},
-                },
-                {
-                    "image": image,
-                    "title": f"Image w/ Lane Lines\nLeft/Right found? {is_left_found}/{is_right_found}",
-                    "kwargs": {},
-                },
-            ]
-            plt.figure(fig_num, clear=True, figsize=(12, 8))
-            for ii, image_info in enumerate(image_infos):
-                plt.subplot(3, 3, ii + 1)
-                plt.imshow(image_info["image"], aspect="auto", **image_info["kwargs"])
-                plt.title(image_info["title"])
-
-            # Assuming last plot was final image, plot lines on top
-            if left_points is not None:
-                plt.plot(left_points[:, 0], left_points[:, 1], "r")
-
-            if right_points is not None:
-                plt.plot(right_points[:, 0], right_points[:, 1], "r")
-
-            plt.xlim([0, n_col - 1])
-            plt.ylim([n_row - 1, 0])
-
-            # Plot real-world left/right lane line points
-            plt.subplot(3, 3, 9)
-            labels = [
-                f"left: {left_lane_angle:.2f} rad",
-                f"right: {right_lane_angle:.2f} rad",
-            ]
-            styles = ["r-x", "b-x"]
-            for ii, p_bev in enumerate(p_bevs):  # go through right and left side
-                plt.plot(p_bev[:, 0], p_bev[:, 1], styles[ii], label=labels[ii])
-
-            plt.title("Bird's Eye Frame (Cartesian; not image)")
-            plt.grid()
-            plt.legend()
-            plt.axis('equal')
-
-            plt.tight_layout()
+# %% FUNCTIONS
+def make_lane_detector(
+    config: dict, tr_cam_to_road: np.ndarray, camera_matrix: np.ndarray, **kwargs
+) -> typing.Union[LaneLineDetector, lane_detection_cpp.CppLaneLineDetector]:
+    """Create a lane line detector of the backend selected by config['backend']
 
-        return out
+    Both backends share the run() interface, so callers switch backends through the config only.
 
+    Args:
+        config: Configuration parameters; see LaneLineDetector
+        tr_cam_to_road: (3, 4) transformation matrix from road to camera; [R | t]
+        camera_matrix: (3, 3) intrinsic camera matrix
+        kwargs: Passed to the backend's constructor, e.g. collect_timings or timing_sink
 
-# %% FUNCTIONS
-def check_lane_side(slope: float, intercept: float, n_row: int, n_col: int):
-    """Check whether lane line is a left lane line or right lane line
+    Returns:
+        detector: LaneLineDetector ('python') or lane_detection_cpp.CppLaneLineDetector ('cpp')
+    """
+    backend = config.get("backend", "python")
+    assert backend in LANE_DETECTION_BACKENDS, f"Unknown lane detection backend {backend}"
+    if backend == "cpp":
+        return lane_detection_cpp.CppLaneLineDetector(
+            config=config, tr_cam_to_road=tr_cam_to_road, camera_matrix=camera_matrix, **kwargs
+        )
+    return LaneLineDetector(
+        config=config, tr_cam_to_road=tr_cam_to_road, camera_matrix=camera_matrix, **kwargs
+    )
+
+
+def detect_lines(image_edges_with_mask: np.ndarray, config: dict, scale: int = 1) -> np.ndarray:
+    """Detect line segments in an edge image with HoughLinesP
+
+    Args:
+        image_edges_with_mask: (n_row, n_col) uint8 edges at the processing resolution
+        config: LaneLineDetector configuration; Hough pixel parameters at full resolution
+        scale: Full-resolution pixels per processing resolution pixel
+
+    Returns:
+        lines: (n_line, 1, 4) (x1, y1, x2, y2) full-resolution segments ordered by confidence
+    """
+    lines = cv2.HoughLinesP(
+        image_edges_with_mask,
+        max(config["hough_rho_res"] / scale, 1.0),
+        np.deg2rad(config["hough_theta_res_deg"]),
+        threshold=max(round(config["hough_accumulator_threshold"] / scale), 1),
+        minLineLength=config["hough_min_line_length"] / scale,
+        maxLineGap=config["hough_max_line_gap"] / scale,
+    )
+    if lines is None:
+        return np.empty((0, 1, 4), dtype=np.int32)
+    return lines * np.float32(scale) if scale != 1 else lines  # full-resolution pixels
+
+
+def refine_lane_points(
+    image_value: np.ndarray, lane_points: np.ndarray, half_width: int
+) -> np.ndarray:
+    """Refine coarse lane lines against the full-resolution image
+
+    Every row spanned by a lane line is searched within +/- half_width columns of the line for
+    the strongest horizontal intensity gradient, located to sub-pixel precision by fitting a
+    parabola through the peak and its neighbours. A line x = a * y + b is then fit to the peaks
+    and evaluated at the original endpoint rows. Lanes which are not found or have too few
+    usable rows are returned unchanged.
+
+    Args:
+        image_value: (n_row, n_col) full-resolution single-channel image
+        lane_points: (2, 2, 2) = (lane, point, xy) coarse endpoints in full-resolution pixels;
+                     NaN for a lane which was not found
+        half_width: Half width (pixels) of the searched strip around each line
+
+    Returns:
+        lane_points: (2, 2, 2) refined endpoints
+    """
+    n_row, n_col = image_value.shape[:2]
+    offsets = np.arange(-half_width, half_width + 1)
+    lane_points = lane_points.copy()
+    for i_lane, points in enumerate(lane_points):
+        (x1, y1), (x2, y2) = points
+        if np.isnan(points).any() or (y1 == y2):
+            continue
+
+        # Strip around the line, (n_y, n_offset) columns; gradient needs one column either side
+        y_values = np.arange(
+            max(np.ceil(min(y1, y2)), 0), min(np.floor(max(y1, y2)), n_row - 1) + 1
+        )
+        x_centers = np.round(x1 + (x2 - x1) * (y_values - y1) / (y2 - y1))
+        cols = (x_centers[:, None] + offsets).astype(np.intp)
+        is_inside = (cols[:, 0] >= 1) & (cols[:, -1] <= n_col - 2)
+        y_values, cols = y_values[is_inside], cols[is_inside]
+        if len(y_values) < 2:
+            continue
+
+        rows = y_values.astype(np.intp)[:, None]
+        gradient = np.abs(
+            image_value[rows, cols + 1].astype(np.int16)
+            - image_value[rows, cols - 1].astype(np.int16)
+        ).astype(np.float64)
+
+        # Sub-pixel peak per row from a parabola through the peak and its neighbours
+        i_peak = np.clip(np.argmax(gradient, axis=1), 1, len(offsets) - 2)
+        i_rows = np.arange(len(y_values))
+        g_left = gradient[i_rows, i_peak - 1]
+        g_peak = gradient[i_rows, i_peak]
+        g_right = gradient[i_rows, i_peak + 1]
+        curvature = g_left - 2.0 * g_peak + g_right
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift = np.where(curvature < 0.0, 0.5 * (g_left - g_right) / curvature, 0.0)
+        x_peaks = cols[i_rows, i_peak] + np.clip(shift, -0.5, 0.5)
+
+        is_edge = g_peak > 0.0
+        if np.count_nonzero(is_edge) < 2:
+            continue
+        slope, intercept = np.polyfit(y_values[is_edge], x_peaks[is_edge], deg=1)
+        lane_points[i_lane, :, 0] = slope * points[:, 1] + intercept
+    return lane_points
+
+
+def check_lane_side(
+    slope: typing.Union[float, np.ndarray],
+    intercept: typing.Union[float, np.ndarray],
+    n_row: int,
+    n_col: int,
+) -> typing.Union[str, np.ndarray]:
+    """Check whether lane line(s) are left lane lines or right lane lines
+
+    Thin wrapper over classify_lines() for lines y = slope * x + intercept.
 
     Args:
-        slope: Line slope
-        intercept: Line intercept
+        slope: Line slope(s)
+        intercept: Line intercept(s)
         n_row: Number of image rows
         n_col: Number of image columns
 
     Returns:
-        line_type: 'left' or 'right'
+        line_type: 'left' or 'right', or 'none' for horizontal lines; array of these for array
+                   input
     """
-    # Find x for where y = (bottom image) = slope * x + intercept
-    x_bottom = (n_row - intercept) / slope
-    line_side = "left" if x_bottom < (n_col / 2) else "right"
-    return line_side
+    slope, intercept = np.broadcast_arrays(
+        np.asarray(slope, dtype=np.float64), np.asarray(intercept, dtype=np.float64)
+    )
+    # Segment through the line's points at x = 0 and x = 1
+    lines = np.stack((np.zeros_like(slope), intercept, np.ones_like(slope), intercept + slope), -1)
+    is_left, is_right = classify_lines(lines=lines, n_row=n_row, n_col=n_col)
+    line_side = np.select([is_left, is_right], ["left", "right"], "none").reshape(slope.shape)
+    return str(line_side) if line_side.ndim == 0 else line_side
+
+
+def classify_lines(
+    lines: np.ndarray, n_row: int, n_col: int
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Classify line segments as left or right lane line candidates in one vectorized pass
+
+    Segments are extended to the bottom image row and classified by which half of the image they
+    hit. Vertical segments are handled exactly; horizontal segments never reach the bottom row and
+    are neither left nor right.
+
+    Args:
+        lines: (n_line, 1, 4) or (n_line, 4) segments as (x1, y1, x2, y2), e.g. from HoughLinesP
+        n_row: Number of image rows
+        n_col: Number of image columns
+
+    Returns:
+        is_left: (n_line,) whether each segment is a left lane line candidate
+        is_right: (n_line,) whether each segment is a right lane line candidate
+    """
+    x1, y1, x2, y2 = np.reshape(lines, (-1, 4)).astype(np.float64).T
+    d_y = y2 - y1
+    is_valid = d_y != 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_bottom = x1 + (x2 - x1) * (n_row - y1) / d_y
+    is_left = is_valid & (x_bottom < (n_col / 2))
+    is_right = is_valid & (x_bottom >= (n_col / 2))
+    return is_left, is_right
+
+
+def select_lane_points(
+    lines: np.ndarray, n_row: int, n_col: int, strategy: str = "first"
+) -> np.ndarray:
+    """Select the left and right lane lines among candidate line segments
+
+    Args:
+        lines: (n_line, 1, 4) segments as (x1, y1, x2, y2) ordered by confidence, e.g. from
+               HoughLinesP
+        n_row: Number of image rows
+        n_col: Number of image columns
+        strategy: One of LANE_SELECTION_STRATEGIES:
+            'first': Most confident segment per side
+            'longest': Longest segment per side
+            'least_squares': Line x = a * y + b fit to the endpoints of all segments on each side,
+                             spanning the rows covered by those segments
+
+    Returns:
+        lane_points: (2, 2, 2) = (lane, point, xy) float endpoints of the left and right lane
+                     lines; NaN for a lane without any candidate segment
+    """
+    assert strategy in LANE_SELECTION_STRATEGIES, f"Unknown lane selection {strategy}"
+    segments = np.reshape(lines, (-1, 2, 2)).astype(np.float64)  # (n_line, point, xy)
+    side_masks = classify_lines(lines=lines, n_row=n_row, n_col=n_col)
+
+    lane_points = np.full((2, 2, 2), np.nan)
+    for i_lane, side_mask in enumerate(side_masks):
+        if not side_mask.any():
+            continue
+
+        if strategy == "first":
+            lane_points[i_lane] = segments[np.argmax(side_mask)]
+        elif strategy == "longest":
+            lengths = np.linalg.norm(segments[:, 1] - segments[:, 0], axis=-1)
+            lane_points[i_lane] = segments[np.argmax(np.where(side_mask, lengths, -1.0))]
+        else:
+            x_values, y_values = segments[side_mask].reshape((-1, 2)).T
+            design = np.stack((y_values, np.ones_like(y_values)), axis=-1)
+            (slope, intercept), *_ = np.linalg.lstsq(design, x_values, rcond=None)
+            y_ends = np.array([y_values.max(), y_values.min()])
+            lane_points[i_lane] = np.stack((slope * y_ends + intercept, y_ends), axis=-1)
+
+    return lane_points
+
+
+def project_to_bev(points: np.ndarray, geometry: CalibratedGeometry) -> np.ndarray:
+    """Recover 3D bird's eye frame points from lane line pixel coordinates
+
+    Pixels are rotated into the bird's eye frame (similar to the road frame, centered at the
+    camera) and lifted to 3D using the camera height as depth. All leading dimensions are
+    processed in one vectorized pass (see computer_vision.project_points()).
+
+    Args:
+        points: (..., 2) pixel coordinates (x, y)
+        geometry: Calibrated geometry providing camera height, BEV rotation and inverse intrinsics
+
+    Returns:
+        p_bev: (..., 3) points in the bird's eye frame
+    """
+    return cvision.project_points(
+        points=points,
+        K_inv=geometry.camera_matrix_inv[:3, :3],
+        R=geometry.cam_to_bev,
+        depth=geometry.camera_height,
+    )
+
+
+def compute_lane_angles(p_bev: np.ndarray) -> np.ndarray:
+    """Compute lane angle(s) in the road plane from bird's eye frame lane endpoints
+
+    Args:
+        p_bev: (..., 2, 3) start/end points of lane line(s) in the bird's eye frame
+
+    Returns:
+        angles: (...,) lane angle(s) in quadrant 1 or 2 (0 to pi radians); NaN where endpoints
+                are NaN
+    """
+    # Forget about +z coord which is height off ground; care only about angle of x/y coords
+    v_lane = p_bev[..., 1, :] - p_bev[..., 0, :]  # lane vector from (x1, y1, z1) to (x2, y2, z2)
+    angles = np.arctan2(v_lane[..., 1], v_lane[..., 0])
+
+    # Ensure angles are in quadrant 1 or 2 (0 to pi radians)
+    angles = np.where(angles < 0.0, angles + np.pi, angles)
+    return angles
@@ -0,0 +1,412 @@
+"""C++ backend of lane line detection: algo::LaneDetector (c++/algo) loaded through ctypes
+
+The shared library is built with the C++ project (target lane_detector_capi):
+
+    cmake -S c++ -B c++/build && cmake --build c++/build --target lane_detector_capi
+
+and looked up at LIBRARY_ENV_VAR if set, otherwise in c++/build/algo/ of the repository. The
+backend implements the straight-line Hough pipeline with fixed Canny thresholds and the 'first'
+lane selection at full resolution; configurations using other options are rejected so both
+backends always run the same algorithm. Select it with 'backend': 'cpp' in the LaneLineDetector
+config and create detectors with lane_detection.make_lane_detector().
+"""
+
+# Standard Imports
+import ctypes
+import functools
+import logging
+import math
+import os
+import pathlib
+import sys
+import time
+import typing
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.common import profiling
+from modules.data import kitti
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+# Environment variable overriding the shared library path
+LIBRARY_ENV_VAR = "AUTONOMOUS_LANE_DETECTOR_LIB"
+
+LIBRARY_NAMES = {
+    "linux": "liblane_detector_capi.so",
+    "darwin": "liblane_detector_capi.dylib",
+    "win32": "lane_detector_capi.dll",
+}
+
+# Default library location; AUTONOMOUS_PATH is the repository root, as for the C++ tests
+REPO_DIR = pathlib.Path(
+    os.environ.get("AUTONOMOUS_PATH", pathlib.Path(__file__).resolve().parents[3])
+)
+DEFAULT_LIBRARY_DIR = REPO_DIR / "c++" / "build" / "algo"
+
+
+# %% ENCAPSULATIONS
+class _LaneDetectorCConfig(ctypes.Structure):
+    """Mirror of LaneDetectorCConfig in c++/algo/capi/LaneDetectorCApi.h"""
+
+    _fields_ = [
+        ("blurKernelWidth", ctypes.c_int32),
+        ("blurKernelHeight", ctypes.c_int32),
+        ("cannyLowThreshold", ctypes.c_double),
+        ("cannyHighThreshold", ctypes.c_double),
+        ("houghRhoRes", ctypes.c_double),
+        ("houghThetaResDeg", ctypes.c_double),
+        ("houghAccumulatorThreshold", ctypes.c_int32),
+        ("houghMinLineLength", ctypes.c_double),
+        ("houghMaxLineGap", ctypes.c_double),
+    ]
+
+
+class _LaneDetectorOutput(ctypes.Structure):
+    """Mirror of algo::LaneDetectorOutput in c++/algo/include/algo/LaneDetector.h"""
+
+    _fields_ = [
+        ("isLeftFound", ctypes.c_bool),
+        ("isRightFound", ctypes.c_bool),
+        ("leftLaneAngle", ctypes.c_float),
+        ("rightLaneAngle", ctypes.c_float),
+    ]
+
+
+class CppLaneLineDetector:
+    """Lane line detector with the run() interface of LaneLineDetector, backed by C++"""
+
+    def __init__(
+        self,
+        config: dict,
+        tr_cam_to_road: np.ndarray,
+        camera_matrix: np.ndarray,
+        collect_timings: bool = False,
+        timing_sink: typing.Callable[[dict], None] = None,
+        library_path: typing.Union[str, pathlib.Path] = None,
+    ):
+        """Initialize instance
+
+        Args:
+            config: LaneLineDetector configuration parameters; see make_c_config() for the
+                    supported subset
+            tr_cam_to_road: (3, 4) transformation matrix from road to camera; [R | t]
+            camera_matrix: (3, 3) intrinsic camera matrix
+            collect_timings: If True, run() output includes the timing of the 'detect' stage
+            timing_sink: Optional callable receiving each frame's {stage: duration_ns} timings
+            library_path: Shared library path; defaults to get_library_path()
+
+        Raises:
+            OSError: If the shared library cannot be loaded
+            ValueError: If config uses options the C++ detector does not implement
+        """
+        self._library = load_library(library_path)
+        self.config = config
+        self.tr_cam_to_road = tr_cam_to_road
+        self.camera_matrix = camera_matrix
+        self.collect_timings = collect_timings
+        self.timing_sink = timing_sink
+
+        self._c_config = make_c_config(config)
+        self._roi_polygon = np.ascontiguousarray(config["roi_polygon"], dtype=np.int32)
+        self._handle = None
+        self._handle_key = None
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Free the C++ detector"""
+        if getattr(self, "_handle", None) is not None:
+            self._library.laneDetectorDestroy(self._handle)
+            self._handle = None
+            self._handle_key = None
+
+    def get_handle(self) -> ctypes.c_void_p:
+        """Get the C++ detector for the current calibration, recreating it if it changed
+
+        Returns:
+            handle: Opaque algo::LaneDetector pointer
+        """
+        camera_matrix = np.ascontiguousarray(self.camera_matrix[:3, :3], dtype=np.float32)
+        tr_cam_to_road = np.ascontiguousarray(self.tr_cam_to_road[:3, :4], dtype=np.float32)
+        key = (camera_matrix.tobytes(), tr_cam_to_road.tobytes())
+        if key != self._handle_key:
+            self.close()
+            float_p = ctypes.POINTER(ctypes.c_float)
+            handle = self._library.laneDetectorCreate(
+                camera_matrix.ctypes.data_as(float_p),
+                tr_cam_to_road.ctypes.data_as(float_p),
+                ctypes.byref(self._c_config),
+                self._roi_polygon.ctypes.data_as(ctypes.POINTER(ctypes.c_int32)),
+                len(self._roi_polygon),
+            )
+            if not handle:
+                raise RuntimeError("C++ lane detector could not be created")
+            self._handle = handle
+            self._handle_key = key
+        return self._handle
+
+    def run(
+        self,
+        image: np.ndarray,
+        fig_num: typing.Union[int, str] = None,
+        logger: logging.Logger = None,
+    ) -> dict:
+        """Run algorithm for lane line detection
+
+        Args:
+            image : (n_row, n_col, 3) uint8 BGR image
+            fig_num: Must be None; plots are only available with the Python backend
+            logger: Logger
+
+        Returns:
+            out: Same keys as LaneLineDetector.run(); angles are computed in single precision
+        """
+        assert fig_num is None, "Plotting is only supported by the python backend"
+        if logger is None:
+            logger = LOGGER
+        timer = (
+            profiling.StageTimer()
+            if self.collect_timings or (self.timing_sink is not None)
+            else profiling.NULL_TIMER
+        )
+
+        # The C++ side wraps the pixels without copying; only rows may be strided
+        assert image.ndim == 3 and image.shape[2] == 3, "Expected a (n_row, n_col, 3) image"
+        if image.dtype != np.uint8 or image.strides[1:] != (3, 1):
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+        n_row, n_col = image.shape[:2]
+
+        logger.info("Beggining lane line detection (C++)")
+        c_out = _LaneDetectorOutput()
+        status = self._library.laneDetectorRun(
+            self.get_handle(),
+            image.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8)),
+            n_row,
+            n_col,
+            image.strides[0],
+            ctypes.byref(c_out),
+        )
+        if status != 0:
+            raise RuntimeError(f"C++ lane detection failed with status {status}")
+        timer.lap("detect")
+
+        out = {
+            "left_lane_angle": np.float64(c_out.leftLaneAngle),
+            "right_lane_angle": np.float64(c_out.rightLaneAngle),
+            "is_left_found": bool(c_out.isLeftFound),
+            "is_right_found": bool(c_out.isRightFound),
+        }
+        if timer.timings_ns is not None:
+            if self.collect_timings:
+                out["stage_timings_ns"] = dict(timer.timings_ns)
+            if self.timing_sink is not None:
+                self.timing_sink(timer.timings_ns)
+        return out
+
+
+# %% FUNCTIONS
+def get_library_path() -> pathlib.Path:
+    """Get the path the C++ lane detector shared library is loaded from
+
+    Returns:
+        library_path: LIBRARY_ENV_VAR if set, otherwise the default build location
+    """
+    if os.environ.get(LIBRARY_ENV_VAR):
+        return pathlib.Path(os.environ[LIBRARY_ENV_VAR])
+    return DEFAULT_LIBRARY_DIR / LIBRARY_NAMES.get(sys.platform, LIBRARY_NAMES["linux"])
+
+
+@functools.lru_cache(maxsize=None)
+def _load_library(library_path: str) -> ctypes.CDLL:
+    """Load the shared library once per path and declare the C function signatures"""
+    library = ctypes.CDLL(library_path)
+    library.laneDetectorCreate.restype = ctypes.c_void_p
+    library.laneDetectorCreate.argtypes = [
+        ctypes.POINTER(ctypes.c_float),
+        ctypes.POINTER(ctypes.c_float),
+        ctypes.POINTER(_LaneDetectorCConfig),
+        ctypes.POINTER(ctypes.c_int32),
+        ctypes.c_int32,
+    ]
+    library.laneDetectorRun.restype = ctypes.c_int32
+    library.laneDetectorRun.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_uint8),
+        ctypes.c_int32,
+        ctypes.c_int32,
+        ctypes.c_size_t,
+        ctypes.POINTER(_LaneDetectorOutput),
+    ]
+    library.laneDetectorDestroy.restype = None
+    library.laneDetectorDestroy.argtypes = [ctypes.c_void_p]
+    return library
+
+
+def load_library(library_path: typing.Union[str, pathlib.Path] = None) -> ctypes.CDLL:
+    """Load the C++ lane detector shared library
+
+    Args:
+        library_path: Shared library path; defaults to get_library_path()
+
+    Returns:
+        library: Loaded library with argument/return types declared
+
+    Raises:
+        OSError: If the library does not exist or cannot be loaded
+    """
+    if library_path is None:
+        library_path = get_library_path()
+    return _load_library(str(library_path))
+
+
+def is_available(library_path: typing.Union[str, pathlib.Path] = None) -> bool:
+    """Check whether the C++ backend can be loaded
+
+    Args:
+        library_path: Shared library path; defaults to get_library_path()
+
+    Returns:
+        is_available: Whether load_library() succeeds
+    """
+    try:
+        load_library(library_path)
+    except OSError:
+        return False
+    return True
+
+
+def make_c_config(config: dict) -> _LaneDetectorCConfig:
+    """Convert a LaneLineDetector config to the parameters of the C++ detector
+
+    Args:
+        config: LaneLineDetector configuration parameters
+
+    Returns:
+        c_config: C++ detector parameters
+
+    Raises:
+        ValueError: If config uses options the C++ detector does not implement
+    """
+    if config.get("lane_selection", "first") != "first":
+        raise ValueError("The cpp backend only supports the 'first' lane selection")
+    if config.get("canny_mode", "fixed") != "fixed":
+        raise ValueError("The cpp backend only supports fixed Canny thresholds")
+    if config.get("pyramid_levels", 0) != 0:
+        raise ValueError("The cpp backend only supports full resolution (pyramid_levels = 0)")
+
+    blur_width, blur_height = config["blur_kernel_shape"]
+    return _LaneDetectorCConfig(
+        blurKernelWidth=blur_width,
+        blurKernelHeight=blur_height,
+        cannyLowThreshold=config["canny_low_threshold"],
+        cannyHighThreshold=config["canny_high_threshold"],
+        houghRhoRes=config["hough_rho_res"],
+        houghThetaResDeg=config["hough_theta_res_deg"],
+        houghAccumulatorThreshold=config["hough_accumulator_threshold"],
+        houghMinLineLength=config["hough_min_line_length"],
+        houghMaxLineGap=config["hough_max_line_gap"],
+    )
+
+
+def compare_outputs(out_a: dict, out_b: dict, tolerance: float = 1e-3) -> typing.Tuple[bool, float]:
+    """Compare the lane angles of two run() outputs, e.g. of the python and cpp backends
+
+    Args:
+        out_a: run() output
+        out_b: run() output
+        tolerance: Largest allowed angle difference (rad); angles pi apart are equal
+
+    Returns:
+        is_match: Whether both found the same lanes with angles within tolerance
+        max_diff: Largest angle difference (rad) over lanes found by both; 0 if none
+    """
+    is_match = True
+    max_diff = 0.0
+    for side in ("left", "right"):
+        is_found = out_a[f"is_{side}_found"]
+        if is_found != out_b[f"is_{side}_found"]:
+            is_match = False
+            continue
+        if not is_found:
+            continue
+
+        diff = abs(out_a[f"{side}_lane_angle"] - out_b[f"{side}_lane_angle"]) % math.pi
+        diff = min(diff, math.pi - diff)
+        max_diff = max(max_diff, diff)
+        is_match &= diff <= tolerance
+    return is_match, max_diff
+
+
+def time_run(detector: typing.Any, image: np.ndarray, n_repeat: int) -> typing.Tuple[dict, float]:
+    """Run a detector repeatedly on one image
+
+    Args:
+        detector: Detector of either backend
+        image: (n_row, n_col, 3) BGR image
+        n_repeat: Number of timed runs
+
+    Returns:
+        out: run() output
+        latency_ms: Median latency (ms)
+    """
+    out = detector.run(image)  # warm-up; e.g. geometry or C++ detector creation
+    latencies_ms = []
+    for _ in range(n_repeat):
+        start_ns = time.perf_counter_ns()
+        detector.run(image)
+        latencies_ms.append((time.perf_counter_ns() - start_ns) / 1e6)
+    return out, float(np.median(latencies_ms))
+
+
+def compare_backends(
+    data_road_path: pathlib.Path,
+    frames: typing.Sequence[typing.Tuple[str, int]],
+    detectors: typing.Dict[str, typing.Any],
+    data_type: str = "training",
+    tolerance: float = 1e-3,
+    n_repeat: int = 5,
+) -> typing.Iterator[dict]:
+    """Run two detectors on the same KITTI Road frames, comparing their angles and latency
+
+    Args:
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        frames: (prefix, frame_num) pairs to run on
+        detectors: Two detectors with the run() interface keyed by name, e.g. 'python' and 'cpp';
+                   their calibration is set per frame
+        data_type: 'training' or 'testing'
+        tolerance: Largest allowed angle difference (rad), see compare_outputs()
+        n_repeat: Number of timed runs per frame and detector, see time_run()
+
+    Yields:
+        row: Per frame 'prefix', 'frame_num', '<name>_latency_ms' and
+             '<name>_<side>_lane_angle' per detector, 'max_angle_diff_deg' and 'is_match'
+    """
+    assert len(detectors) == 2, "Exactly two detectors are compared"
+    for prefix, frame_num in frames:
+        image, calib = kitti.read_kitti_road_data(
+            data_road_path=pathlib.Path(data_road_path),
+            data_type=data_type,
+            frame_num=frame_num,
+            prefix=prefix,
+        )
+        row = {"prefix": prefix, "frame_num": frame_num}
+        outs = []
+        for name, detector in detectors.items():
+            detector.tr_cam_to_road = calib["Tr_cam_to_road:"]
+            detector.camera_matrix = calib["P2:"][:3, :3]
+            out, row[f"{name}_latency_ms"] = time_run(
+                detector=detector, image=image, n_repeat=n_repeat
+            )
+            outs.append(out)
+            for side in ("left", "right"):
+                row[f"{name}_{side}_lane_angle"] = float(out[f"{side}_lane_angle"])
+
+        is_match, max_diff = compare_outputs(outs[0], outs[1], tolerance=tolerance)
+        row["max_angle_diff_deg"] = float(np.rad2deg(max_diff))
+        row["is_match"] = is_match
+        yield row
@@ -0,0 +1,105 @@
+"""Plotting for lane line detection; separate so headless runs never import matplotlib"""
+# Third Party Imports
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+# %% FUNCTIONS
+def plot_lane_detection(
+    fig_num,
+    image: np.ndarray,
+    stages: dict,
+    roi_mask: np.ndarray,
+    lane_points: np.ndarray,
+    p_bevs: np.ndarray,
+    out: dict,
+):
+    """Plot intermediate stages and results of LaneLineDetector.run()
+
+    Args:
+        fig_num: Figure number / label for plotting
+        image: (n_row, n_col, 3) BGR image
+        stages: Intermediate images keyed by stage name ('image_value', 'image_blur',
+                'image_edges', 'image_edges_with_mask')
+        roi_mask: (n_row, n_col) region of interest mask
+        lane_points: (2, 2, 2) = (lane, point, xy) pixel endpoints of left/right lane lines
+        p_bevs: (2, 2, 3) = (lane, point, xyz) endpoints of left/right lane in bird's eye frame
+        out: Output of LaneLineDetector.run()
+    """
+    # Plot lines onto original image
+    n_row, n_col, _ = image.shape
+    left_points, right_points = lane_points
+    is_left_found = out["is_left_found"]
+    is_right_found = out["is_right_found"]
+    left_lane_angle = out["left_lane_angle"]
+    right_lane_angle = out["right_lane_angle"]
+
+    image_infos = [
+        {
+            "image": image,
+            "title": "Original",
+            "kwargs": {}
+        },
+        {
+            "image": stages["image_value"],
+            "title": "HSV - Value",
+            "kwargs": {"cmap": "gray"},
+        },
+        {
+            "image": stages["image_blur"],
+            "title": "Value - Gaussian Blur",
+            "kwargs": {"cmap": "gray"},
+        },
+        {
+            "image": stages["image_edges"],
+            "title": "Canny Edges",
+            "kwargs": {"cmap": "gray"},
+        },
+        {
+            "image": roi_mask,
+            "title": "ROI Mask",
+            "kwargs": {"cmap": "gray"}
+        },
+        {
+            "image": stages["image_edges_with_mask"],
+            "title": "Edges w/ ROI Mask",
+            "kwargs": {"cmap": "gray"},
+        },
+        {
+            "image": image,
+            "title": f"Image w/ Lane Lines\nLeft/Right found? {is_left_found}/{is_right_found}",
+            "kwargs": {},
+        },
+    ]
+    plt.figure(fig_num, clear=True, figsize=(12, 8))
+    for ii, image_info in enumerate(image_infos):
+        plt.subplot(3, 3, ii + 1)
+        plt.imshow(image_info["image"], aspect="auto", **image_info["kwargs"])
+        plt.title(image_info["title"])
+
+    # Assuming last plot was final image, plot lines on top
+    if is_left_found:
+        plt.plot(left_points[:, 0], left_points[:, 1], "r")
+
+    if is_right_found:
+        plt.plot(right_points[:, 0], right_points[:, 1], "r")
+
+    plt.xlim([0, n_col - 1])
+    plt.ylim([n_row - 1, 0])
+
+    # Plot real-world left/right lane line points
+    plt.subplot(3, 3, 9)
+    labels = [
+        f"left: {left_lane_angle:.2f} rad",
+        f"right: {right_lane_angle:.2f} rad",
+    ]
+    styles = ["r-x", "b-x"]
+    for ii, p_bev in enumerate(p_bevs):  # go through right and left side
+        plt.plot(p_bev[:, 0], p_bev[:, 1], styles[ii], label=labels[ii])
+
+    plt.title("Bird's Eye Frame (Cartesian; not image)")
+    plt.grid()
+    plt.legend()
+    plt.axis('equal')
+
+    plt.tight_layout()
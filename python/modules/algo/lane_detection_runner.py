@@ -0,0 +1,160 @@
+"""Run lane line detection over an entire KITTI Road dataset split using a process pool"""
+# Standard Imports
+import concurrent.futures
+import pathlib
+import typing
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.data import frame_cache
+from modules.data import kitti
+
+# Per-process detector; created lazily by the first frame each worker handles
+_WORKER_DETECTOR = None
+_WORKER_CONFIG = None
+_WORKER_FRAME_CACHE = None
+
+# Lane line endpoints in pixels (NaN if not found), flattened so every field is a scalar
+LANE_POINT_FIELDS = tuple(
+    f"{side}_{coord}{i_point}"
+    for side in ("left", "right")
+    for i_point in (1, 2)
+    for coord in ("x", "y")
+)
+
+RESULT_FIELDS = (
+    "data_type",
+    "prefix",
+    "frame_num",
+    "left_lane_angle",
+    "right_lane_angle",
+    "is_left_found",
+    "is_right_found",
+) + LANE_POINT_FIELDS
+
+
+# %% FUNCTIONS
+def run_on_dataset(
+    data_road_path: typing.Union[str, pathlib.Path],
+    config: dict,
+    data_type: str = "training",
+    prefixes: typing.Sequence[str] = kitti.KITTI_ROAD_PREFIXES,
+    n_workers: int = None,
+    chunk_size: int = 4,
+    use_frame_cache: bool = False,
+    frame_cache_dir: typing.Union[str, pathlib.Path] = None,
+) -> typing.Iterator[dict]:
+    """Run lane line detection on every frame of a KITTI Road split
+
+    Frames are spread across a process pool where each worker owns a single LaneLineDetector;
+    its calibrated geometry is only rebuilt when a frame's calibration differs from the last one.
+    Results are yielded in frame order as soon as they are available so they can be streamed to
+    disk.
+
+    Args:
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        config: LaneLineDetector configuration parameters
+        data_type: 'training' or 'testing'
+        prefixes: Road category filename prefixes to include
+        n_workers: Number of worker processes; None uses all CPUs, 0 runs in this process
+        chunk_size: Number of frames sent to a worker at a time
+        use_frame_cache: If True, frames are decoded once into a memory-mapped
+                         frame_cache.KittiFrameCache which this and later runs read from
+        frame_cache_dir: Folder of the frame cache; defaults to data_road_path/.frame_cache
+
+    Yields:
+        result: One row per frame with the keys in RESULT_FIELDS
+    """
+    data_road_path = pathlib.Path(data_road_path)
+    cache = None
+    if use_frame_cache:
+        cache = frame_cache.KittiFrameCache(
+            data_road_path=data_road_path,
+            data_type=data_type,
+            prefixes=prefixes,
+            cache_dir=frame_cache_dir,
+        )
+        frames = cache.frames
+    else:
+        frames = kitti.list_kitti_road_frames(
+            data_road_path=data_road_path, data_type=data_type, prefixes=prefixes
+        )
+    tasks = [(data_road_path, data_type, prefix, frame_num) for prefix, frame_num in frames]
+
+    if n_workers == 0:
+        _init_worker(config, cache)
+        yield from map(_process_frame, tasks)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(config, cache)
+    ) as executor:
+        yield from executor.map(_process_frame, tasks, chunksize=chunk_size)
+
+
+def _init_worker(config: dict, cache: frame_cache.KittiFrameCache = None):
+    """Initialize worker process state
+
+    Args:
+        config: LaneLineDetector configuration parameters
+        cache: Optional frame cache to read frames from instead of decoding them
+    """
+    global _WORKER_CONFIG, _WORKER_DETECTOR, _WORKER_FRAME_CACHE  # pylint: disable=global-statement
+    _WORKER_CONFIG = config
+    _WORKER_DETECTOR = None
+    _WORKER_FRAME_CACHE = cache
+
+
+def _process_frame(task: tuple) -> dict:
+    """Run lane line detection on a single KITTI Road frame inside a worker
+
+    Args:
+        task: (data_road_path, data_type, prefix, frame_num)
+
+    Returns:
+        result: Row with the keys in RESULT_FIELDS
+    """
+    global _WORKER_DETECTOR  # pylint: disable=global-statement
+    data_road_path, data_type, prefix, frame_num = task
+    if _WORKER_FRAME_CACHE is not None:
+        image, calib = _WORKER_FRAME_CACHE.read(prefix=prefix, frame_num=frame_num)
+    else:
+        image, calib = kitti.read_kitti_road_data(
+            data_road_path=data_road_path,
+            data_type=data_type,
+            frame_num=frame_num,
+            prefix=prefix,
+        )
+    assert image is not None, f"Image for {data_type} {prefix}_{frame_num:06d} could not be read"
+
+    tr_cam_to_road = calib["Tr_cam_to_road:"]
+    camera_matrix = calib["P2:"][:3, :3]
+    if _WORKER_DETECTOR is None:
+        _WORKER_DETECTOR = lane_detection.LaneLineDetector(
+            config=_WORKER_CONFIG,
+            tr_cam_to_road=tr_cam_to_road,
+            camera_matrix=camera_matrix,
+        )
+    else:
+        _WORKER_DETECTOR.tr_cam_to_road = tr_cam_to_road
+        _WORKER_DETECTOR.camera_matrix = camera_matrix
+
+    # Same stages as LaneLineDetector.run(), keeping the pixel endpoints for evaluation
+    geometry = _WORKER_DETECTOR.get_geometry(image.shape)
+    lane_points, _ = _WORKER_DETECTOR.detect_lane_points(image=image, geometry=geometry)
+    p_bevs = lane_detection.project_to_bev(points=lane_points, geometry=geometry)
+    left_lane_angle, right_lane_angle = lane_detection.compute_lane_angles(p_bevs)
+    result = {
+        "data_type": data_type,
+        "prefix": prefix,
+        "frame_num": frame_num,
+        "left_lane_angle": float(left_lane_angle),
+        "right_lane_angle": float(right_lane_angle),
+        "is_left_found": not np.isnan(lane_points[0]).any(),
+        "is_right_found": not np.isnan(lane_points[1]).any(),
+    }
+    result.update(zip(LANE_POINT_FIELDS, lane_points.ravel().tolist()))
+    return result
@@ -0,0 +1,482 @@
+"""Long-lived asyncio lane detection service with micro-batching, and a matching client
+
+Frames are sent over a local TCP socket as length-prefixed messages. Each message is an 8-byte
+big-endian (header length, payload length) prefix followed by a JSON header and a binary payload:
+
+    request header: {'request_id': int, 'encoding': 'png' | 'jpg' | 'raw',
+                     'shape': [n_row, n_col, 3] (raw only),
+                     'tr_cam_to_road': (3, 4) nested list, 'camera_matrix': (3, 3) nested list}
+    request payload: Encoded image bytes (or raw uint8 BGR pixels)
+    response header: {'request_id', 'left_lane_angle', 'right_lane_angle', 'is_left_found',
+                      'is_right_found', 'latency_ms', 'batch_size'} or {'request_id', 'error'};
+                     'request_id' is None if the request header could not be parsed
+    response payload: Empty
+
+Concurrent requests are grouped into micro-batches which are closed after `max_batch_size`
+requests or `max_wait_ms` after their first request, whichever comes first. Batches are decoded
+and run on a thread pool (OpenCV releases the GIL), where each thread keeps a warm
+LaneLineDetector per calibration.
+"""
+
+# Standard Imports
+import asyncio
+import collections
+import concurrent.futures
+import json
+import logging
+import struct
+import threading
+import time
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import lane_detection
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+# (header length, payload length) prefix of every message
+_PREFIX = struct.Struct("!II")
+
+# Number of warm detectors (calibrations) kept per worker thread
+DETECTORS_PER_THREAD = 8
+
+
+# %% ENCAPSULATIONS
+class _Request:
+    """A decoded request waiting in the micro-batch queue"""
+
+    def __init__(self, header: dict, payload: bytes, future: asyncio.Future):
+        """Initialize instance
+
+        Args:
+            header: Request header
+            payload: Encoded frame
+            future: Resolved with the response header
+
+        Raises:
+            ValueError: If the header's calibration is missing, non-numeric or of the wrong shape
+        """
+        self.header = header
+        self.payload = payload
+        self.future = future
+        self.arrival_ns = time.perf_counter_ns()
+        try:
+            self.tr_cam_to_road = np.array(header["tr_cam_to_road"], dtype=np.float64)
+            self.camera_matrix = np.array(header["camera_matrix"], dtype=np.float64)
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Invalid calibration in request header: {error!r}") from error
+        if self.tr_cam_to_road.shape != (3, 4) or self.camera_matrix.shape != (3, 3):
+            raise ValueError(
+                f"Invalid calibration shapes {self.tr_cam_to_road.shape} and "
+                f"{self.camera_matrix.shape}; expected (3, 4) and (3, 3)"
+            )
+        self.calib_key = (self.tr_cam_to_road.tobytes(), self.camera_matrix.tobytes())
+
+
+class LaneDetectionService:
+    """Asyncio TCP server running lane detection on micro-batches of frames"""
+
+    def __init__(
+        self,
+        config: dict,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 2.0,
+        n_threads: int = None,
+    ):
+        """Initialize instance
+
+        Args:
+            config: LaneLineDetector configuration parameters
+            max_batch_size: Maximum number of requests per batch
+            max_wait_ms: Maximum time a batch stays open waiting for more requests (ms)
+            n_threads: Number of detection threads; defaults to ThreadPoolExecutor's default
+        """
+        self.config = config
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=n_threads, thread_name_prefix="lane_detection"
+        )
+        self._n_threads = self._executor._max_workers  # pylint: disable=protected-access
+        self._thread_state = threading.local()
+        self._queue = None
+        self._server = None
+        self._batch_task = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> typing.Tuple[str, int]:
+        """Start serving
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+
+        Returns:
+            address: (host, port) the service listens on
+        """
+        self._queue = asyncio.Queue()
+        self._batch_task = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        address = self._server.sockets[0].getsockname()[:2]
+        LOGGER.info("Lane detection service listening on %s:%d", *address)
+        return address
+
+    async def close(self):
+        """Stop serving and shut down the thread pool"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def detect(self, header: dict, payload: bytes) -> dict:
+        """Queue a single frame for detection and wait for its result
+
+        Args:
+            header: Request header (see module docstring)
+            payload: Encoded frame
+
+        Returns:
+            response: Response header
+
+        Raises:
+            ValueError: If the header's calibration is invalid
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Request(header=header, payload=payload, future=future))
+        return await future
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests of one connection; requests may be pipelined and answered out of order"""
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(header: dict, payload: bytes):
+            try:
+                response = await self.detect(header=header, payload=payload)
+            except ValueError as error:
+                response = {"request_id": header.get("request_id"), "error": str(error)}
+            async with write_lock:
+                try:
+                    writer.write(encode_message(response))
+                    await writer.drain()
+                except ConnectionError:
+                    LOGGER.debug("Client disconnected before request %s", header.get("request_id"))
+
+        async def respond_error(error: ValueError):
+            async with write_lock:
+                writer.write(encode_message({"request_id": None, "error": str(error)}))
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    message = await read_message(reader)
+                except ValueError as error:
+                    await respond_error(error)
+                    continue
+                if message is None:
+                    break
+                task = asyncio.create_task(respond(*message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            LOGGER.debug("Client disconnected")
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        """Group queued requests into micro-batches and dispatch them to the thread pool"""
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(self._n_threads)
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1e3
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0.0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Backpressure: at most one batch per thread in flight
+            await in_flight.acquire()
+            future = loop.run_in_executor(self._executor, self._run_batch, batch)
+            future.add_done_callback(
+                lambda done, batch=batch: self._resolve_batch(done, batch, in_flight)
+            )
+
+    def _resolve_batch(
+        self, done: asyncio.Future, batch: typing.List[_Request], in_flight: asyncio.Semaphore
+    ):
+        """Hand results of a finished batch back to the waiting requests"""
+        in_flight.release()
+        if done.exception() is not None:
+            responses = [
+                {"request_id": request.header.get("request_id"), "error": repr(done.exception())}
+                for request in batch
+            ]
+        else:
+            responses = done.result()
+        for request, response in zip(batch, responses):
+            if not request.future.done():
+                request.future.set_result(response)
+
+    def _get_detector(self, request: _Request) -> lane_detection.LaneLineDetector:
+        """Get this thread's warm detector for a request's calibration
+
+        Args:
+            request: Request
+
+        Returns:
+            detector: Lane line detector with the request's calibration
+        """
+        detectors = getattr(self._thread_state, "detectors", None)
+        if detectors is None:
+            detectors = self._thread_state.detectors = collections.OrderedDict()
+
+        detector = detectors.get(request.calib_key)
+        if detector is None:
+            detector = lane_detection.LaneLineDetector(
+                config=self.config,
+                tr_cam_to_road=request.tr_cam_to_road,
+                camera_matrix=request.camera_matrix,
+                reuse_buffers=True,
+            )
+            detectors[request.calib_key] = detector
+            if len(detectors) > DETECTORS_PER_THREAD:
+                detectors.popitem(last=False)
+        detectors.move_to_end(request.calib_key)
+        return detector
+
+    def _run_batch(self, batch: typing.List[_Request]) -> typing.List[dict]:
+        """Decode and run lane detection on a batch inside a worker thread
+
+        Requests sharing a calibration and resolution are run together with
+        LaneLineDetector.run_batch().
+
+        Args:
+            batch: Requests
+
+        Returns:
+            responses: Response header per request
+        """
+        responses = [None] * len(batch)
+        groups = collections.defaultdict(list)
+        for i_request, request in enumerate(batch):
+            try:
+                image = decode_frame(request.header, request.payload)
+            except ValueError as error:
+                responses[i_request] = {
+                    "request_id": request.header.get("request_id"),
+                    "error": str(error),
+                }
+                continue
+            groups[(request.calib_key, image.shape)].append((i_request, image))
+
+        for group in groups.values():
+            # A failing group only fails its own requests
+            try:
+                detector = self._get_detector(batch[group[0][0]])
+                out = detector.run_batch([image for _, image in group])
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.exception("Lane detection failed on a group of %d frames", len(group))
+                for i_request, _ in group:
+                    responses[i_request] = {
+                        "request_id": batch[i_request].header.get("request_id"),
+                        "error": repr(error),
+                    }
+                continue
+            done_ns = time.perf_counter_ns()
+            for i_group, (i_request, _) in enumerate(group):
+                request = batch[i_request]
+                responses[i_request] = {
+                    "request_id": request.header.get("request_id"),
+                    "left_lane_angle": float(out["left_lane_angle"][i_group]),
+                    "right_lane_angle": float(out["right_lane_angle"][i_group]),
+                    "is_left_found": bool(out["is_left_found"][i_group]),
+                    "is_right_found": bool(out["is_right_found"][i_group]),
+                    "latency_ms": (done_ns - request.arrival_ns) / 1e6,
+                    "batch_size": len(batch),
+                }
+        return responses
+
+
+class LaneDetectionClient:
+    """Asyncio client for LaneDetectionService; requests can be pipelined on one connection"""
+
+    def __init__(self):
+        """Initialize instance"""
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._next_request_id = 0
+        self._receive_task = None
+
+    async def connect(self, host: str, port: int):
+        """Connect to a service
+
+        Args:
+            host: Service host
+            port: Service port
+        """
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._receive_task = asyncio.create_task(self._receive_loop())
+
+    async def close(self):
+        """Close the connection"""
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receive_task.cancel()
+        try:
+            await self._receive_task
+        except asyncio.CancelledError:
+            pass
+
+    async def detect(
+        self,
+        payload: bytes,
+        tr_cam_to_road: np.ndarray,
+        camera_matrix: np.ndarray,
+        encoding: str = "png",
+        shape: tuple = None,
+    ) -> dict:
+        """Send one frame and wait for its result
+
+        Args:
+            payload: Encoded frame (or raw BGR pixels)
+            tr_cam_to_road: (3, 4) transformation matrix from camera to road; [R | t]
+            camera_matrix: (3, 3) intrinsic camera matrix
+            encoding: 'png', 'jpg' or 'raw'
+            shape: (n_row, n_col, 3) image shape; required for 'raw'
+
+        Returns:
+            response: Response header, plus 'round_trip_ms' measured by the client
+        """
+        request_id = self._next_request_id
+        self._next_request_id += 1
+        header = {
+            "request_id": request_id,
+            "encoding": encoding,
+            "tr_cam_to_road": np.asarray(tr_cam_to_road).tolist(),
+            "camera_matrix": np.asarray(camera_matrix)[:3, :3].tolist(),
+        }
+        if shape is not None:
+            header["shape"] = list(shape)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        start_ns = time.perf_counter_ns()
+        self._writer.write(encode_message(header, payload))
+        await self._writer.drain()
+        response = await future
+        response["round_trip_ms"] = (time.perf_counter_ns() - start_ns) / 1e6
+        return response
+
+    async def _receive_loop(self):
+        """Route responses to the requests waiting for them"""
+        while True:
+            message = await read_message(self._reader)
+            if message is None:
+                break
+            header, _ = message
+            future = self._pending.pop(header["request_id"], None)
+            if future is not None:
+                future.set_result(header)
+
+        error = ConnectionError("Service closed the connection")
+        for future in self._pending.values():
+            future.set_exception(error)
+        self._pending.clear()
+
+
+# %% FUNCTIONS
+def encode_message(header: dict, payload: bytes = b"") -> bytes:
+    """Encode a message as length prefix + JSON header + payload
+
+    Args:
+        header: JSON-serializable header
+        payload: Binary payload
+
+    Returns:
+        message: Encoded message
+    """
+    header_bytes = json.dumps(header).encode()
+    return _PREFIX.pack(len(header_bytes), len(payload)) + header_bytes + bytes(payload)
+
+
+async def read_message(
+    reader: asyncio.StreamReader,
+) -> typing.Optional[typing.Tuple[dict, bytes]]:
+    """Read one message
+
+    Args:
+        reader: Stream to read from
+
+    Returns:
+        message: (header, payload), or None if the stream ended cleanly between messages
+
+    Raises:
+        ValueError: If the header is not a JSON object; the whole message has been read, so the
+                    next message can still be read
+    """
+    try:
+        prefix = await reader.readexactly(_PREFIX.size)
+    except asyncio.IncompleteReadError as error:
+        if not error.partial:
+            return None
+        raise
+    header_length, payload_length = _PREFIX.unpack(prefix)
+    header_bytes = await reader.readexactly(header_length)
+    payload = await reader.readexactly(payload_length)
+    try:
+        header = json.loads(header_bytes)
+    except ValueError as error:  # incl. json.JSONDecodeError and UnicodeDecodeError
+        raise ValueError(f"Malformed message header: {error}") from error
+    if not isinstance(header, dict):
+        raise ValueError(f"Message header must be a JSON object, not {type(header).__name__}")
+    return header, payload
+
+
+def decode_frame(header: dict, payload: bytes) -> np.ndarray:
+    """Decode a request's frame
+
+    Args:
+        header: Request header with 'encoding' (and 'shape' for raw frames)
+        payload: Encoded frame
+
+    Returns:
+        image: (n_row, n_col, 3) BGR image
+
+    Raises:
+        ValueError: If the frame cannot be decoded
+    """
+    encoding = header.get("encoding", "png")
+    buffer = np.frombuffer(payload, dtype=np.uint8)
+    if encoding == "raw":
+        shape = tuple(header.get("shape", ()))
+        if (len(shape) != 3) or (shape[2] != 3):
+            raise ValueError(f"Raw frame shape {shape} is not (n_row, n_col, 3)")
+        if int(np.prod(shape)) != buffer.size:
+            raise ValueError(f"Raw frame of {buffer.size} bytes does not match shape {shape}")
+        return buffer.reshape(shape)
+    if encoding not in ("png", "jpg"):
+        raise ValueError(f"Unknown frame encoding {encoding}")
+
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not decode {encoding} frame")
+    return image
@@ -0,0 +1,366 @@
+"""Curved lane detection by sliding-window search and polynomial fits on the bird's eye view
+
+Second detection engine next to the straight-line Hough engine of LaneLineDetector. The masked
+Canny edge image is warped to the bird's eye view (BEV) with cached remap tables, where lanes ahead
+of the vehicle run vertically. Each lane's pixels are gathered either around the previous frame's
+fit or, for lanes without one, by a sliding-window search started from the peaks of a column
+histogram of the near-field edge pixels. Each lane is then fit as a degree-2 polynomial
+x(z) = a * z^2 + b * z + c on the road plane (road frame x right, z forward, metres), from which
+angle, curvature and lateral offset are reported.
+"""
+
+# Standard Imports
+import logging
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.common import profiling
+from modules.data import frame_stream
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+# Default 'polyfit' config values
+DEFAULT_POLYFIT_CONFIG = {
+    "n_windows": 10,
+    "window_half_width_m": 1.0,
+    "search_margin_m": 0.4,
+    "min_window_pixels": 10,
+    "min_fit_pixels": 50,
+    "histogram_fraction": 0.25,
+    "eval_distance_m": None,
+}
+
+
+# %% ENCAPSULATIONS
+class PolyfitLaneDetector:
+    """Stateful lane detector fitting a degree-2 polynomial per lane on the bird's eye view
+
+    Wraps a LaneLineDetector for its configuration, calibration, cached geometry, work buffers,
+    edge detection and BEV remap; only the line search differs. Consecutive frames of a sequence
+    should be run through the same instance so each lane's search is seeded by its previous fit;
+    call reset() between unrelated frames or sequences.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize instance
+
+        Takes the arguments of LaneLineDetector. In addition to its configuration parameters, the
+        config may contain:
+            'polyfit': Optional, sliding window search settings (defaults in
+                       DEFAULT_POLYFIT_CONFIG):
+                'n_windows': Number of windows stacked along the BEV height
+                'window_half_width_m': Half width of each search window (m)
+                'search_margin_m': Half width of the band searched around the previous fit (m)
+                'min_window_pixels': Minimum pixels in a window to recenter the next window
+                'min_fit_pixels': Minimum pixels of a lane to fit it; otherwise it is not found
+                'histogram_fraction': Fraction of BEV rows (nearest first) in the histogram
+                'eval_distance_m': Road frame z (m) angle and curvature are evaluated at;
+                                   defaults to the near end of the BEV 'forward_range_m'
+        """
+        self.detector = lane_detection.LaneLineDetector(*args, **kwargs)
+        self.config = self.detector.config
+        self._fits = [None, None]  # previous (3,) fit per lane, or None
+        self._histogram = None
+
+    def reset(self):
+        """Forget the previous frame's fits"""
+        self._fits = [None, None]
+
+    def run(
+        self,
+        image: np.ndarray,
+        fig_num: typing.Union[int, str] = None,
+        logger: logging.Logger = None,
+    ) -> dict:
+        """Run curved lane detection on the next frame
+
+        Args:
+            image : (n_row, n_col, 3) BGR image
+            fig_num: Must be None; plotting is not supported
+            logger: Logger
+
+        Returns:
+            out: Contains output parameters
+                'left_lane_angle': Angle of left lane w.r.t. road +x axis at eval_distance_m
+                                   (rad); 0 to pi radians
+                'right_lane_angle': Angle of right lane w.r.t. road +x axis (rad); 0 to pi rad
+                'left_curvature': Signed curvature of left lane at eval_distance_m (1/m);
+                                  positive when bending right
+                'right_curvature': Signed curvature of right lane (1/m)
+                'left_lateral_offset': Road frame x (m) of left lane extrapolated to z = 0
+                'right_lateral_offset': Road frame x (m) of right lane extrapolated to z = 0
+                'left_fit': (3,) coefficients (a, b, c) of left lane x(z) = a z^2 + b z + c (m)
+                'right_fit': (3,) coefficients of right lane
+                'is_left_found': Whether left lane was found; if not, values are NaN
+                'is_right_found': Whether right lane was found; if not, values are NaN
+                'is_left_tracked': Whether left lane was searched around the previous fit
+                'is_right_tracked': Whether right lane was searched around the previous fit
+                'stage_timings_ns': Only if collect_timings is set; duration (ns) of each stage
+        """
+        assert fig_num is None, "Plotting is not supported by PolyfitLaneDetector"
+        if logger is None:
+            logger = LOGGER
+        timer = self.detector.make_timer()
+
+        geometry = self.detector.get_geometry(image.shape)
+        timer.lap("geometry")
+        _, _, _, image_edges_with_mask = self.detector.detect_edges(
+            image=image, geometry=geometry, timer=timer
+        )
+
+        remap = self.detector.get_bev_remap(
+            image_edges_with_mask.shape, scale=geometry.processing_scale
+        )
+        edges_bev = remap.warp(image_edges_with_mask, roi_only=True)
+        timer.lap("bev")
+
+        fits, is_tracked = self.fit_lanes(
+            edges_bev=edges_bev, remap=remap, prev_fits=self._fits, timer=timer
+        )
+        self._fits = [None if np.isnan(fit).any() else fit for fit in fits]
+        logger.debug("Lane fits: %r (tracked: %r)", fits, is_tracked)
+
+        polyfit_config = self.get_polyfit_config()
+        eval_distance_m = polyfit_config["eval_distance_m"]
+        if eval_distance_m is None:
+            eval_distance_m = self.config.get("bev", {}).get("forward_range_m", (6.0, 46.0))[0]
+        angles, curvatures, offsets = evaluate_lane_fits(fits, z=eval_distance_m)
+        timer.lap("evaluate")
+
+        out = {}
+        for i_lane, side in enumerate(("left", "right")):
+            out[f"{side}_lane_angle"] = angles[i_lane]
+            out[f"{side}_curvature"] = curvatures[i_lane]
+            out[f"{side}_lateral_offset"] = offsets[i_lane]
+            out[f"{side}_fit"] = fits[i_lane]
+            out[f"is_{side}_found"] = not np.isnan(fits[i_lane]).any()
+            out[f"is_{side}_tracked"] = is_tracked[i_lane]
+        self.detector.emit_timings(timer=timer, out=out)
+        return out
+
+    def run_stream(
+        self,
+        source: typing.Union[str, int, cv2.VideoCapture],
+        max_queue_size: int = 8,
+        drop_oldest: bool = False,
+        logger: logging.Logger = None,
+    ) -> typing.Iterator[dict]:
+        """Run curved lane detection on a continuous stream of frames
+
+        The previous fits are forgotten first, then each frame's search is seeded by the fits of
+        the frame before it. Frames are decoded on a background thread, see
+        LaneLineDetector.run_stream().
+
+        Args:
+            source: Video file path, image sequence glob pattern, camera index or cv2.VideoCapture
+            max_queue_size: Maximum number of decoded frames waiting to be processed
+            drop_oldest: If True, drop the oldest queued frame when detection falls behind
+            logger: Logger
+
+        Yields:
+            out: Output of run() for each frame, plus 'frame_index', 'fps', 'queue_depth' and
+                 'n_dropped' as in LaneLineDetector.run_stream()
+        """
+        self.reset()
+        stats = frame_stream.StreamStats()
+        with frame_stream.FrameStream(
+            source=source, max_queue_size=max_queue_size, drop_oldest=drop_oldest
+        ) as frames:
+            for frame_index, image in frames:
+                out = self.run(image=image, logger=logger)
+                out["frame_index"] = frame_index
+                out["fps"] = stats.update()
+                out["queue_depth"] = frames.queue_depth
+                out["n_dropped"] = frames.n_dropped
+                yield out
+
+    def get_polyfit_config(self) -> dict:
+        """Get the 'polyfit' config with defaults filled in"""
+        return {**DEFAULT_POLYFIT_CONFIG, **self.config.get("polyfit", {})}
+
+    def fit_lanes(
+        self,
+        edges_bev: np.ndarray,
+        remap,
+        prev_fits: typing.Sequence[typing.Optional[np.ndarray]] = (None, None),
+        timer: profiling.StageTimer = profiling.NULL_TIMER,
+    ) -> typing.Tuple[np.ndarray, typing.List[bool]]:
+        """Find each lane's edge pixels in a BEV edge image and fit them
+
+        Args:
+            edges_bev: (n_roi_row, n_bev_col) BEV edge image of the remap's ROI rows
+            remap: bev_remap.BevRemap the edge image was warped with
+            prev_fits: Per lane, the previous (3,) fit to search around, or None to search from
+                       scratch
+            timer: Stage timer recording the duration of each processing stage
+
+        Returns:
+            fits: (2, 3) = (lane, coefficient) fits x(z) = a z^2 + b z + c; NaN if not found
+            is_tracked: Per lane, whether pixels were searched around the previous fit
+        """
+        polyfit_config = self.get_polyfit_config()
+        mpp = remap.meters_per_pixel
+
+        # Edge pixels in row-major order, i.e. sorted by BEV row, converted to road x / z
+        # cv2.findNonZero is several times faster than np.nonzero on 8-bit images
+        nonzero = cv2.findNonZero(edges_bev)
+        if nonzero is None:
+            nonzero = np.empty((0, 1, 2), dtype=np.int32)
+        cols, rows = nonzero[:, 0, 0], nonzero[:, 0, 1]
+        (x_scale, _, x_min), (_, z_scale, z_max), _ = remap.bev_to_road
+        x_road = cols * x_scale + x_min
+        z_road = (rows + remap.roi_rows.start) * z_scale + z_max
+        timer.lap("pixels")
+
+        fits = np.full((2, 3), np.nan)
+        is_tracked = [False, False]
+        lane_indices = [None, None]
+        for i_lane, fit in enumerate(prev_fits):
+            if fit is None:
+                continue
+            # Targeted search: pixels within a band around the previous fit
+            is_near = np.abs(x_road - np.polyval(fit, z_road)) < polyfit_config["search_margin_m"]
+            indices = np.flatnonzero(is_near)
+            if indices.size >= polyfit_config["min_fit_pixels"]:
+                lane_indices[i_lane] = indices
+                is_tracked[i_lane] = True
+
+        lost_lanes = [i_lane for i_lane in range(2) if lane_indices[i_lane] is None]
+        if lost_lanes:
+            bases = self.find_lane_bases(rows=rows, cols=cols, remap=remap, edges_bev=edges_bev)
+            for i_lane in lost_lanes:
+                if bases[i_lane] is not None:
+                    lane_indices[i_lane] = sliding_window_search(
+                        rows=rows,
+                        cols=cols,
+                        n_rows=edges_bev.shape[0],
+                        base_col=bases[i_lane],
+                        n_windows=polyfit_config["n_windows"],
+                        half_width=polyfit_config["window_half_width_m"] / mpp,
+                        min_window_pixels=polyfit_config["min_window_pixels"],
+                    )
+        timer.lap("search")
+
+        for i_lane, indices in enumerate(lane_indices):
+            if (indices is not None) and (indices.size >= polyfit_config["min_fit_pixels"]):
+                fits[i_lane] = np.polyfit(z_road[indices], x_road[indices], deg=2)
+        timer.lap("fit")
+        return fits, is_tracked
+
+    def find_lane_bases(
+        self, rows: np.ndarray, cols: np.ndarray, remap, edges_bev: np.ndarray
+    ) -> typing.List[typing.Optional[int]]:
+        """Find the starting BEV column of each lane from a column histogram of near edge pixels
+
+        The histogram array is kept between frames and only refilled when a lane has to be
+        searched from scratch.
+
+        Args:
+            rows: (n_pixel,) BEV ROI row of each edge pixel, ascending
+            cols: (n_pixel,) BEV column of each edge pixel
+            remap: bev_remap.BevRemap the edge image was warped with
+            edges_bev: (n_roi_row, n_bev_col) BEV edge image
+
+        Returns:
+            bases: Per lane, the histogram peak column left / right of the road origin, or None
+        """
+        n_roi_row, n_bev_col = edges_bev.shape
+        if (self._histogram is None) or (self._histogram.size != n_bev_col):
+            self._histogram = np.zeros(n_bev_col, dtype=np.intp)
+
+        # Nearest (bottom) rows only, where lanes are closest to straight
+        fraction = self.get_polyfit_config()["histogram_fraction"]
+        first_row = int(n_roi_row * (1.0 - fraction))
+        near_cols = cols[np.searchsorted(rows, first_row) :]
+        self._histogram[:] = np.bincount(near_cols, minlength=n_bev_col)
+
+        # Column of road frame x = 0
+        center_col = int(
+            np.clip(round(-remap.bev_to_road[0, 2] / remap.meters_per_pixel), 0, n_bev_col)
+        )
+        bases = []
+        for histogram, offset in [
+            (self._histogram[:center_col], 0),
+            (self._histogram[center_col:], center_col),
+        ]:
+            if (histogram.size == 0) or (histogram.max() == 0):
+                bases.append(None)
+            else:
+                bases.append(offset + int(np.argmax(histogram)))
+        return bases
+
+
+# %% FUNCTIONS
+def sliding_window_search(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    n_rows: int,
+    base_col: int,
+    n_windows: int,
+    half_width: float,
+    min_window_pixels: int,
+) -> np.ndarray:
+    """Collect one lane's edge pixels with windows stacked from the bottom of the BEV image up
+
+    Each window is centered on the mean column of the previous window's pixels if it had at
+    least min_window_pixels, and otherwise shifted by the last recentering step, so the search
+    follows curves and bridges gaps between dashes. Pixels are sorted by row, so the
+    pixels of a window's rows are a contiguous slice found by binary search.
+
+    Args:
+        rows: (n_pixel,) BEV row of each edge pixel, ascending
+        cols: (n_pixel,) BEV column of each edge pixel
+        n_rows: Number of BEV rows searched
+        base_col: Center column of the bottom window
+        n_windows: Number of windows
+        half_width: Window half width (pixels)
+        min_window_pixels: Minimum pixels in a window to recenter the next window
+
+    Returns:
+        indices: Indices into rows / cols of the lane's pixels
+    """
+    window_edges = np.linspace(n_rows, 0, n_windows + 1).round().astype(np.intp)
+    slice_bounds = np.searchsorted(rows, window_edges)  # descending rows -> descending bounds
+
+    center = float(base_col)
+    step = 0.0
+    lane_indices = []
+    for i_window in range(n_windows):
+        start, stop = slice_bounds[i_window + 1], slice_bounds[i_window]
+        window_cols = cols[start:stop]
+        in_window = np.flatnonzero(np.abs(window_cols - center) < half_width)
+        lane_indices.append(start + in_window)
+        if in_window.size >= min_window_pixels:
+            new_center = float(window_cols[in_window].mean())
+            step = new_center - center
+            center = new_center
+        else:
+            center += step  # keep following the lane's drift across gaps (e.g. dashes)
+    return np.concatenate(lane_indices)
+
+
+def evaluate_lane_fits(
+    fits: np.ndarray, z: float
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute angle, curvature and lateral offset of lane fits x(z) = a z^2 + b z + c
+
+    Args:
+        fits: (..., 3) polynomial coefficients (a, b, c); NaN for lanes which were not found
+        z: Road frame forward distance (m) angle and curvature are evaluated at
+
+    Returns:
+        angles: (...,) lane angle w.r.t. road +x axis at z (rad); 0 to pi radians
+        curvatures: (...,) signed curvature at z (1/m); positive when bending right (+x)
+        offsets: (...,) lateral offset x(0) (m)
+    """
+    a, b, c = fits[..., 0], fits[..., 1], fits[..., 2]
+    slope = 2.0 * a * z + b  # dx/dz
+    angles = np.arctan2(1.0, slope)
+    curvatures = 2.0 * a / (1.0 + slope**2) ** 1.5
+    return angles, curvatures, c
@@ -0,0 +1,413 @@
+"""Columnar storage of per-frame lane detection results and bulk scoring against KITTI ground truth
+
+Results are kept as structured NumPy records (RESULT_DTYPE, one field per
+lane_detection_runner.RESULT_FIELDS) and appended to a folder of fixed-size chunk files, either
+.npz or .parquet, so thousands of frames never live in memory as Python dicts. The evaluator reads
+one chunk at a time and scores every frame of it in bulk: the area between the lane lines is
+rasterized as one column span per image row, and overlap with the memory-mapped ground truth masks
+is counted from per-row cumulative sums instead of drawing and comparing a mask per frame.
+"""
+
+# Standard Imports
+import os
+import pathlib
+import typing
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection_runner
+from modules.data import frame_cache
+from modules.data import kitti
+
+# Field types of the lane_detection_runner.RESULT_FIELDS
+_FIELD_DTYPES = {
+    "data_type": "U8",
+    "prefix": "U4",
+    "frame_num": np.int32,
+    "is_left_found": np.bool_,
+    "is_right_found": np.bool_,
+}
+RESULT_DTYPE = np.dtype(
+    [(name, _FIELD_DTYPES.get(name, np.float64)) for name in lane_detection_runner.RESULT_FIELDS]
+)
+
+METRIC_DTYPE = np.dtype(
+    [
+        ("data_type", "U8"),
+        ("prefix", "U4"),
+        ("frame_num", np.int32),
+        ("has_gt", np.bool_),
+        ("iou", np.float64),
+        ("precision", np.float64),
+        ("recall", np.float64),
+        ("n_lane_pixel", np.int64),
+        ("n_gt_pixel", np.int64),
+        ("n_intersection", np.int64),
+    ]
+)
+
+CHUNK_FORMATS = ("npz", "parquet")
+
+# Frames scored at once; bounds the (n_frame, n_row, n_col) cumulative sum work array
+EVALUATION_BATCH_SIZE = 32
+
+
+# %% ENCAPSULATIONS
+class ResultChunkWriter:
+    """Append-only writer of result records to a folder of chunk files
+
+    Rows are copied into a preallocated structured array and written as one file per
+    `chunk_size` rows. Chunks are numbered after the highest numbered chunk already in the folder,
+    so reopening a folder appends to it. Each chunk is written to a temporary file and hard linked
+    into place, so readers never see a partial chunk and existing chunks are never overwritten.
+    """
+
+    def __init__(
+        self,
+        output_dir: typing.Union[str, pathlib.Path],
+        chunk_size: int = 1024,
+        file_format: str = "npz",
+    ):
+        """Initialize instance
+
+        Args:
+            output_dir: Folder to write chunk files to; created if missing
+            chunk_size: Number of rows per chunk file
+            file_format: One of CHUNK_FORMATS; 'parquet' requires pyarrow
+        """
+        assert file_format in CHUNK_FORMATS, f"Unknown chunk format {file_format}"
+        self.output_dir = pathlib.Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.file_format = file_format
+        self.n_written = 0
+
+        self._chunk = np.zeros(chunk_size, dtype=RESULT_DTYPE)
+        self._n_buffered = 0
+        chunk_indices = [get_chunk_index(path) for path in list_result_chunks(self.output_dir)]
+        self._next_chunk_index = max(chunk_indices, default=-1) + 1
+
+    def __enter__(self) -> "ResultChunkWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, row: dict):
+        """Append a single result row
+
+        Args:
+            row: Row with the keys in lane_detection_runner.RESULT_FIELDS
+        """
+        self._chunk[self._n_buffered] = tuple(row[name] for name in RESULT_DTYPE.names)
+        self._n_buffered += 1
+        if self._n_buffered == self._chunk.size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a chunk file
+
+        Raises:
+            FileExistsError: If the chunk file was created by someone else in the meantime
+        """
+        if self._n_buffered == 0:
+            return
+        records = self._chunk[: self._n_buffered]
+        path = self.output_dir / f"results_{self._next_chunk_index:05d}.{self.file_format}"
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        if self.file_format == "npz":
+            with open(tmp_path, "wb") as chunk_file:
+                np.savez(chunk_file, records=records)
+        else:
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+            table = pyarrow.table({name: records[name] for name in RESULT_DTYPE.names})
+            pyarrow.parquet.write_table(table, str(tmp_path))
+        try:
+            os.link(tmp_path, path)  # unlike os.replace, fails if the chunk exists
+        finally:
+            os.unlink(tmp_path)
+
+        self.n_written += self._n_buffered
+        self._n_buffered = 0
+        self._next_chunk_index += 1
+
+    def close(self):
+        """Write remaining buffered rows"""
+        self.flush()
+
+
+# %% FUNCTIONS
+def list_result_chunks(output_dir: typing.Union[str, pathlib.Path]) -> typing.List[pathlib.Path]:
+    """List the chunk files of a results folder in write order
+
+    Args:
+        output_dir: Results folder
+
+    Returns:
+        paths: Chunk file paths sorted by chunk number
+    """
+    output_dir = pathlib.Path(output_dir)
+    paths = [
+        path
+        for file_format in CHUNK_FORMATS
+        for path in output_dir.glob(f"results_*.{file_format}")
+        if path.stem[len("results_") :].isdigit()
+    ]
+    return sorted(paths, key=lambda path: (get_chunk_index(path), path.name))
+
+
+def get_chunk_index(path: pathlib.Path) -> int:
+    """Get the number of a chunk file, e.g. 12 for results_00012.npz
+
+    Args:
+        path: Chunk file path
+
+    Returns:
+        chunk_index: Chunk number
+    """
+    return int(path.stem[len("results_") :])
+
+
+def read_result_chunks(output_dir: typing.Union[str, pathlib.Path]) -> typing.Iterator[np.ndarray]:
+    """Read the chunks of a results folder one at a time
+
+    Args:
+        output_dir: Results folder written by ResultChunkWriter
+
+    Yields:
+        records: (n_row,) RESULT_DTYPE records of one chunk
+    """
+    for path in list_result_chunks(output_dir):
+        if path.suffix == ".npz":
+            with np.load(path) as chunk:
+                yield chunk["records"]
+        else:
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+            table = pyarrow.parquet.read_table(str(path))
+            records = np.empty(table.num_rows, dtype=RESULT_DTYPE)
+            for name in RESULT_DTYPE.names:
+                records[name] = table.column(name).to_numpy()
+            yield records
+
+
+def read_results(output_dir: typing.Union[str, pathlib.Path]) -> np.ndarray:
+    """Read all records of a results folder
+
+    Args:
+        output_dir: Results folder written by ResultChunkWriter
+
+    Returns:
+        records: (n_row,) RESULT_DTYPE records
+    """
+    chunks = list(read_result_chunks(output_dir))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=RESULT_DTYPE)
+
+
+def get_lane_points(records: np.ndarray) -> np.ndarray:
+    """Gather the lane endpoints of result records
+
+    Args:
+        records: (n_frame,) RESULT_DTYPE records
+
+    Returns:
+        lane_points: (n_frame, 2, 2, 2) = (frame, lane, point, xy) endpoints; NaN if not found
+    """
+    fields = lane_detection_runner.LANE_POINT_FIELDS
+    return np.stack([records[name] for name in fields], axis=-1).reshape((-1, 2, 2, 2))
+
+
+def compute_lane_spans(
+    lane_points: np.ndarray, image_shape: tuple
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Rasterize the area between left and right lane lines as one column span per image row
+
+    The area spans from the bottom image row up to the lower of the two lines' top endpoints,
+    with both lines extended linearly.
+
+    Args:
+        lane_points: (n_frame, 2, 2, 2) = (frame, lane, point, xy) endpoints; NaN if not found
+        image_shape: (n_row, n_col, ...) image shape
+
+    Returns:
+        col_start: (n_frame, n_row) first column of each row's span
+        col_stop: (n_frame, n_row) column after the last one of each row's span; rows outside
+                  the area (and frames missing a lane) have col_stop == col_start
+    """
+    n_row, n_col = image_shape[:2]
+    (x1, y1), (x2, y2) = np.moveaxis(lane_points, (-2, -1), (0, 1))  # (n_frame, lane) each
+    rows = np.arange(n_row, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Column of each lane line at every row: (n_frame, lane, n_row)
+        cols = x1[..., None] + (x2 - x1)[..., None] * (rows - y1[..., None]) / (y2 - y1)[..., None]
+        y_top = np.minimum(y1, y2).max(axis=-1)  # (n_frame,) lower of the two top endpoints
+        is_valid = np.isfinite(cols).all(axis=(1, 2))  # both lanes found and not horizontal
+
+    col_start = np.clip(np.round(cols[:, 0]), 0, n_col)
+    col_stop = np.clip(np.round(cols[:, 1]) + 1, 0, n_col)
+    is_inside = is_valid[:, None] & (rows >= np.round(y_top)[:, None]) & (col_stop > col_start)
+    col_start = np.where(is_inside, col_start, 0).astype(np.intp)
+    col_stop = np.where(is_inside, col_stop, 0).astype(np.intp)
+    return col_start, col_stop
+
+
+def score_lane_spans(
+    col_start: np.ndarray, col_stop: np.ndarray, gt_masks: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count lane, ground truth and overlapping pixels of a batch of frames
+
+    Args:
+        col_start: (n_frame, n_row) first column of each row's lane span
+        col_stop: (n_frame, n_row) column after the last one of each row's lane span
+        gt_masks: (n_frame, n_row, n_col) bool ground truth masks; (1, n_row, n_col) scores
+                  every frame's spans against the same mask
+
+    Returns:
+        n_lane_pixel: (n_frame,) pixels between the lane lines
+        n_gt_pixel: (n_frame,) ground truth pixels
+        n_intersection: (n_frame,) ground truth pixels between the lane lines
+    """
+    n_frame, n_row, n_col = gt_masks.shape
+    cumsum = np.zeros((n_frame, n_row, n_col + 1), dtype=np.int16)
+    np.cumsum(gt_masks, axis=-1, dtype=np.int16, out=cumsum[..., 1:])
+
+    n_gt_pixel = cumsum[..., -1].sum(axis=-1, dtype=np.int64)
+    overlap = np.take_along_axis(cumsum, col_stop[..., None], axis=-1) - np.take_along_axis(
+        cumsum, col_start[..., None], axis=-1
+    )
+    n_intersection = overlap.sum(axis=(1, 2), dtype=np.int64)
+    n_lane_pixel = (col_stop - col_start).sum(axis=-1, dtype=np.int64)
+    return n_lane_pixel, n_gt_pixel, n_intersection
+
+
+def score_lane_iou(lane_points: np.ndarray, gt_mask: np.ndarray) -> np.ndarray:
+    """Score lane detections of one frame by the IoU of the area between the lanes with its mask
+
+    Args:
+        lane_points: (n_detection, 2, 2, 2) = (detection, lane, point, xy) endpoints; NaN if not
+                     found
+        gt_mask: (n_row, n_col) bool ground truth mask
+
+    Returns:
+        iou: (n_detection,) intersection over union; 0 if a lane is missing
+    """
+    col_start, col_stop = compute_lane_spans(lane_points, gt_mask.shape)
+    n_lane_pixel, n_gt_pixel, n_intersection = score_lane_spans(col_start, col_stop, gt_mask[None])
+    n_union = n_lane_pixel + n_gt_pixel - n_intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n_union > 0, n_intersection / n_union, 0.0)
+
+
+def evaluate_chunk(records: np.ndarray, gt_cache: frame_cache.KittiGtMaskCache) -> np.ndarray:
+    """Score a chunk of result records against ground truth masks
+
+    Args:
+        records: (n_frame,) RESULT_DTYPE records
+        gt_cache: Ground truth masks; frames without a mask (e.g. the testing split) are
+                  returned with has_gt False and NaN metrics
+
+    Returns:
+        metrics: (n_frame,) METRIC_DTYPE per-frame metrics; iou is 0 when a lane is missing
+    """
+    metrics = np.zeros(records.size, dtype=METRIC_DTYPE)
+    for name in ("data_type", "prefix", "frame_num"):
+        metrics[name] = records[name]
+    for name in ("iou", "precision", "recall"):
+        metrics[name] = np.nan
+
+    # Zero-copy views into the memory-mapped cache
+    gt_masks = [
+        (
+            gt_cache.read_mask(prefix=prefix, frame_num=int(frame_num))
+            if data_type == "training"
+            else None
+        )
+        for data_type, prefix, frame_num in zip(
+            records["data_type"], records["prefix"], records["frame_num"]
+        )
+    ]
+    metrics["has_gt"] = [gt_mask is not None for gt_mask in gt_masks]
+    scored = np.flatnonzero(metrics["has_gt"])
+    lane_points = get_lane_points(records)
+
+    for i_start in range(0, scored.size, EVALUATION_BATCH_SIZE):
+        batch = scored[i_start : i_start + EVALUATION_BATCH_SIZE]
+        gt_masks_batch = np.stack([gt_masks[i_frame] for i_frame in batch])
+        col_start, col_stop = compute_lane_spans(lane_points[batch], gt_masks_batch.shape[1:])
+        n_lane_pixel, n_gt_pixel, n_intersection = score_lane_spans(
+            col_start, col_stop, gt_masks_batch
+        )
+        metrics["n_lane_pixel"][batch] = n_lane_pixel
+        metrics["n_gt_pixel"][batch] = n_gt_pixel
+        metrics["n_intersection"][batch] = n_intersection
+
+    n_lane_pixel = metrics["n_lane_pixel"][scored]
+    n_gt_pixel = metrics["n_gt_pixel"][scored]
+    n_intersection = metrics["n_intersection"][scored]
+    n_union = n_lane_pixel + n_gt_pixel - n_intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["iou"][scored] = np.where(n_union > 0, n_intersection / n_union, 0.0)
+        metrics["precision"][scored] = n_intersection / n_lane_pixel
+        metrics["recall"][scored] = n_intersection / n_gt_pixel
+    return metrics
+
+
+def summarize_metrics(metrics: np.ndarray) -> dict:
+    """Aggregate per-frame metrics
+
+    Args:
+        metrics: (n_frame,) METRIC_DTYPE per-frame metrics
+
+    Returns:
+        summary: 'n_frame', 'n_scored' (frames with ground truth), 'mean_iou',
+                 'mean_precision' (over frames with a lane area), 'mean_recall', 'pixel_iou'
+                 (over all pixels of all scored frames) and per road category 'mean_iou_<prefix>'
+    """
+    scored = metrics[metrics["has_gt"]]
+    n_union = scored["n_lane_pixel"].sum() + scored["n_gt_pixel"].sum()
+    n_union -= scored["n_intersection"].sum()
+
+    with np.errstate(invalid="ignore"):
+        summary = {
+            "n_frame": int(metrics.size),
+            "n_scored": int(scored.size),
+            "mean_iou": float(np.mean(scored["iou"])) if scored.size else np.nan,
+            "mean_precision": float(np.nanmean(scored["precision"])) if scored.size else np.nan,
+            "mean_recall": float(np.nanmean(scored["recall"])) if scored.size else np.nan,
+            "pixel_iou": float(scored["n_intersection"].sum() / n_union) if n_union else np.nan,
+        }
+    for prefix in kitti.KITTI_ROAD_PREFIXES:
+        is_prefix = scored["prefix"] == prefix
+        if is_prefix.any():
+            summary[f"mean_iou_{prefix}"] = float(np.mean(scored["iou"][is_prefix]))
+    return summary
+
+
+def evaluate_results(
+    output_dir: typing.Union[str, pathlib.Path],
+    data_road_path: typing.Union[str, pathlib.Path],
+    gt_type: str = "road",
+    cache_dir: typing.Union[str, pathlib.Path] = None,
+) -> typing.Tuple[np.ndarray, dict]:
+    """Score every result of a results folder against the KITTI Road ground truth
+
+    Args:
+        output_dir: Results folder written by ResultChunkWriter
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        gt_type: 'road' or 'lane'; see kitti.read_kitti_road_gt()
+        cache_dir: Folder of the ground truth mask cache; defaults to data_road_path/.frame_cache
+
+    Returns:
+        metrics: (n_frame,) METRIC_DTYPE per-frame metrics
+        summary: Aggregate metrics; see summarize_metrics()
+    """
+    gt_cache = frame_cache.KittiGtMaskCache(
+        data_road_path=data_road_path, gt_type=gt_type, cache_dir=cache_dir
+    )
+    chunks = [evaluate_chunk(records, gt_cache) for records in read_result_chunks(output_dir)]
+    metrics = np.concatenate(chunks) if chunks else np.empty(0, dtype=METRIC_DTYPE)
+    return metrics, summarize_metrics(metrics)
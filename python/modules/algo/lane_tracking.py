@@ -0,0 +1,337 @@
+"""Temporal lane tracking which narrows the line search using previous frames"""
+# Standard Imports
+import logging
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import lane_detection
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+# %% ENCAPSULATIONS
+class AlphaBetaFilter:
+    """Alpha-beta filter tracking a vector quantity and its rate of change per frame"""
+
+    def __init__(self, alpha: float = 0.5, beta: float = 0.1):
+        """Initialize instance
+
+        Args:
+            alpha: Gain (0 to 1) applied to the measurement residual for the value
+            beta: Gain (0 to 1) applied to the measurement residual for the rate
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.value = None
+        self.rate = None
+
+    @property
+    def is_initialized(self) -> bool:
+        """Whether the filter has received a measurement since the last reset"""
+        return self.value is not None
+
+    def reset(self):
+        """Forget the tracked state"""
+        self.value = None
+        self.rate = None
+
+    def predict(self) -> np.ndarray:
+        """Predict the value one frame ahead
+
+        Returns:
+            prediction: Predicted value
+        """
+        return self.value + self.rate
+
+    def update(self, measurement: typing.Optional[np.ndarray]) -> np.ndarray:
+        """Advance the filter by one frame
+
+        Args:
+            measurement: Measured value, or None if nothing was measured this frame (coast on the
+                         prediction)
+
+        Returns:
+            value: Filtered value
+        """
+        if not self.is_initialized:
+            self.value = np.array(measurement, dtype=np.float64)
+            self.rate = np.zeros_like(self.value)
+            return self.value
+
+        prediction = self.predict()
+        if measurement is None:
+            self.value = prediction
+        else:
+            residual = measurement - prediction
+            self.value = prediction + self.alpha * residual
+            self.rate = self.rate + self.beta * residual
+        return self.value
+
+
+class LaneTracker:
+    """Stateful wrapper around LaneLineDetector for sequential video frames
+
+    Each lane is tracked as (angle, intercept) in the image, where angle is the line's angle from
+    vertical (rad) and intercept is its column at the bottom image row. Lines of a tracked lane are
+    only searched for in a narrow band around its predicted position, while a lane which is not
+    tracked is searched for in its half (left / right of the center column) of the ROI, so one
+    missing lane does not stop tracking of the other. A lane is no longer tracked once it has been
+    missed for more than `max_missed` consecutive frames.
+
+    The bands only narrow the edges passed to HoughLinesP; Canny still runs on the whole ROI. On
+    the bundled KITTI frames, the default 20 px half-width bands cut the edge pixels reaching Hough
+    by about 2x (2871 -> ~1300 and 1138 -> ~630), not by an order of magnitude: most edges inside
+    the ROI belong to the lane markings themselves, and bands narrower than ~16 px no longer cover
+    both edges of a marking, so lanes are intermittently lost.
+    """
+
+    def __init__(
+        self,
+        detector: lane_detection.LaneLineDetector,
+        band_half_width: float = 20.0,
+        alpha: float = 0.5,
+        beta: float = 0.1,
+        max_missed: int = 3,
+    ):
+        """Initialize instance
+
+        Args:
+            detector: Lane line detector used for edge detection, line search and projection
+            band_half_width: Half width (pixels) of the search band around each predicted lane
+            alpha: Alpha-beta filter value gain
+            beta: Alpha-beta filter rate gain
+            max_missed: Number of consecutive frames a lane may be missed before tracking is lost
+        """
+        self.detector = detector
+        self.band_half_width = band_half_width
+        self.max_missed = max_missed
+        self.filters = [AlphaBetaFilter(alpha=alpha, beta=beta) for _ in range(2)]
+        self.n_missed = np.zeros(2, dtype=int)
+
+    def reset(self):
+        """Forget all tracked lanes; the next frame searches the full ROI"""
+        for lane_filter in self.filters:
+            lane_filter.reset()
+        self.n_missed[:] = 0
+
+    def run(self, image: np.ndarray, logger: logging.Logger = None) -> dict:
+        """Run lane line detection and tracking on the next frame
+
+        Args:
+            image: (n_row, n_col, 3) BGR image
+            logger: Logger
+
+        Returns:
+            out: Contains output parameters
+                'left_lane_angle': Angle of filtered left lane w.r.t. road coordinates (rad); 0 to
+                                   pi radians; NaN if not tracked
+                'right_lane_angle': Angle of filtered right lane w.r.t. road coordinates (rad); 0
+                                    to pi radians; NaN if not tracked
+                'is_left_found': Whether a left lane line was found in this frame
+                'is_right_found': Whether a right lane line was found in this frame
+                'is_left_coasting': Whether left lane was missed in this frame but is still
+                                    tracked; its angle is then the filter's prediction
+                'is_right_coasting': Whether right lane was missed in this frame but is still
+                                     tracked
+                'is_tracking': Whether the search was narrowed around at least one tracked lane
+                'n_edge_pixels': Number of edge pixels fed to the line search
+        """
+        if logger is None:
+            logger = LOGGER
+
+        geometry = self.detector.get_geometry(image.shape)
+        n_row = geometry.image_shape[0]
+        y_ref = n_row - 1.0
+        y_top = float(geometry.roi_polygon[:, 1].min())
+
+        is_tracked = np.array([lane_filter.is_initialized for lane_filter in self.filters])
+        is_tracking = bool(is_tracked.any())
+        if is_tracking:
+            predictions = np.stack(
+                [self.filters[i_lane].predict() for i_lane in np.flatnonzero(is_tracked)]
+            )
+            search_mask = make_band_mask(
+                line_params=predictions,
+                y_ref=y_ref,
+                y_top=y_top,
+                band_half_width=self.band_half_width,
+                roi_mask=geometry.roi_mask,
+            )
+            # Lanes which are not tracked are searched for in their half of the ROI
+            center_col = geometry.image_shape[1] // 2
+            for i_lane in np.flatnonzero(~is_tracked):
+                cols = slice(None, center_col) if i_lane == 0 else slice(center_col, None)
+                search_mask[:, cols] = geometry.roi_mask[:, cols]
+
+            lane_points, stages = self.detector.detect_lane_points(
+                image=image, geometry=geometry, logger=logger, roi_mask=search_mask
+            )
+            lane_points[is_tracked] = assign_lines_to_lanes(
+                lines=stages["lines"],
+                line_params=predictions,
+                y_ref=y_ref,
+                max_distance=self.band_half_width,
+            )
+        else:
+            logger.debug("Searching full ROI for lanes")
+            lane_points, stages = self.detector.detect_lane_points(
+                image=image, geometry=geometry, logger=logger
+            )
+
+        # Update per-lane filters
+        measurements = points_to_line_params(points=lane_points, y_ref=y_ref)
+        is_found = ~np.isnan(measurements).any(axis=-1)
+        for i_lane, lane_filter in enumerate(self.filters):
+            if is_found[i_lane]:
+                lane_filter.update(measurements[i_lane])
+                self.n_missed[i_lane] = 0
+            elif lane_filter.is_initialized:
+                lane_filter.update(None)
+                self.n_missed[i_lane] += 1
+                if self.n_missed[i_lane] > self.max_missed:
+                    logger.debug("Lost track of lane %d", i_lane)
+                    lane_filter.reset()
+                    self.n_missed[i_lane] = 0
+
+        # Project filtered lanes between the bottom row and the top of the ROI
+        line_params = np.full((2, 2), np.nan)
+        for i_lane, lane_filter in enumerate(self.filters):
+            if lane_filter.is_initialized:
+                line_params[i_lane] = lane_filter.value
+        filtered_points = line_params_to_points(
+            line_params=line_params, y_ref=y_ref, y_values=np.array([y_ref, y_top])
+        )
+        p_bevs = lane_detection.project_to_bev(points=filtered_points, geometry=geometry)
+        left_lane_angle, right_lane_angle = lane_detection.compute_lane_angles(p_bevs)
+
+        out = {
+            "left_lane_angle": left_lane_angle,
+            "right_lane_angle": right_lane_angle,
+            "is_left_found": bool(is_found[0]),
+            "is_right_found": bool(is_found[1]),
+            "is_left_coasting": self.filters[0].is_initialized and not is_found[0],
+            "is_right_coasting": self.filters[1].is_initialized and not is_found[1],
+            "is_tracking": is_tracking,
+            "n_edge_pixels": cv2.countNonZero(stages["image_edges_with_mask"]),
+        }
+        return out
+
+
+# %% FUNCTIONS
+def points_to_line_params(points: np.ndarray, y_ref: float) -> np.ndarray:
+    """Convert line endpoints to (angle, intercept) line parameters
+
+    Args:
+        points: (..., 2, 2) = (..., point, xy) line endpoints in pixels
+        y_ref: Image row at which the intercept is measured
+
+    Returns:
+        line_params: (..., 2) = (angle from vertical (rad), column at row y_ref); NaN for
+                     horizontal lines or NaN endpoints
+    """
+    d_xy = points[..., 1, :] - points[..., 0, :]
+    d_xy = np.where(d_xy[..., 1:2] < 0.0, -d_xy, d_xy)  # point downward so angle in +/- pi/2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_slope = np.where(d_xy[..., 1] > 0.0, d_xy[..., 0] / d_xy[..., 1], np.nan)
+    angle = np.arctan(inv_slope)
+    intercept = points[..., 0, 0] + inv_slope * (y_ref - points[..., 0, 1])
+    return np.stack((angle, intercept), axis=-1)
+
+
+def line_params_to_points(
+    line_params: np.ndarray, y_ref: float, y_values: np.ndarray
+) -> np.ndarray:
+    """Sample points along lines given by (angle, intercept) parameters
+
+    Args:
+        line_params: (..., 2) = (angle from vertical (rad), column at row y_ref)
+        y_ref: Image row at which the intercept is measured
+        y_values: (n_point,) image rows to sample
+
+    Returns:
+        points: (..., n_point, 2) = (..., point, xy) pixel coordinates
+    """
+    angle = line_params[..., 0:1]
+    intercept = line_params[..., 1:2]
+    x_values = intercept + np.tan(angle) * (y_values - y_ref)
+    y_values = np.broadcast_to(y_values, x_values.shape)
+    return np.stack((x_values, y_values), axis=-1)
+
+
+def make_band_mask(
+    line_params: np.ndarray,
+    y_ref: float,
+    y_top: float,
+    band_half_width: float,
+    roi_mask: np.ndarray,
+) -> np.ndarray:
+    """Create a search mask covering narrow bands around predicted lane lines within the ROI
+
+    Args:
+        line_params: (n_lane, 2) predicted (angle, intercept) of each lane
+        y_ref: Image row at which the intercept is measured (bottom of each band)
+        y_top: Image row at the top of each band
+        band_half_width: Half width (pixels) of each band
+        roi_mask: (n_row, n_col) uint8 ROI mask (0 or 255)
+
+    Returns:
+        band_mask: (n_row, n_col) uint8 mask (0 or 255)
+    """
+    centers = line_params_to_points(
+        line_params=line_params, y_ref=y_ref, y_values=np.array([y_ref, y_top])
+    )  # (n_lane, bottom/top, xy)
+    offset = np.array([band_half_width, 0.0])
+    polygons = np.stack(
+        (
+            centers[:, 0] - offset,
+            centers[:, 0] + offset,
+            centers[:, 1] + offset,
+            centers[:, 1] - offset,
+        ),
+        axis=1,
+    )  # (n_lane, vertex, xy)
+
+    band_mask = np.zeros_like(roi_mask)
+    cv2.fillPoly(band_mask, np.round(polygons).astype(np.int32), 255)
+    cv2.bitwise_and(band_mask, roi_mask, dst=band_mask)
+    return band_mask
+
+
+def assign_lines_to_lanes(
+    lines: np.ndarray, line_params: np.ndarray, y_ref: float, max_distance: float
+) -> np.ndarray:
+    """Assign each lane the most confident line lying close to its predicted position
+
+    Args:
+        lines: (n_line, 1, 4) HoughLinesP lines ordered by confidence
+        line_params: (n_lane, 2) predicted (angle, intercept) of each lane
+        y_ref: Image row at which the intercept is measured
+        max_distance: Maximum column distance (pixels) between a line's midpoint and a lane
+
+    Returns:
+        lane_points: (n_lane, 2, 2) = (lane, point, xy) endpoints; NaN where no line was assigned
+    """
+    n_lane = line_params.shape[0]
+    lane_points = np.full((n_lane, 2, 2), np.nan)
+    if len(lines) == 0:
+        return lane_points
+
+    points = lines[:, 0, :].reshape((-1, 2, 2)).astype(np.float64)  # (n_line, point, xy)
+    midpoints = points.mean(axis=1)  # (n_line, xy)
+    x_pred = line_params[:, 1] + np.tan(line_params[:, 0]) * (
+        midpoints[:, 1:2] - y_ref
+    )  # (n_line, n_lane)
+    distance = np.abs(midpoints[:, 0:1] - x_pred)
+    nearest_lane = np.argmin(distance, axis=1)
+    is_close = distance[np.arange(len(points)), nearest_lane] <= max_distance
+
+    for i_lane in range(n_lane):
+        candidates = np.flatnonzero(is_close & (nearest_lane == i_lane))
+        if candidates.size > 0:
+            lane_points[i_lane] = points[candidates[0]]  # lines ordered by confidence
+    return lane_points
@@ -0,0 +1,184 @@
+"""Lane line detection on several calibrated cameras at once, fused into one road-frame estimate
+
+Each camera gets its own LaneLineDetector (and therefore its own cached geometry and buffers) built
+from its 'Pk:' projection matrix and the shared 'Tr_cam_to_road:' calibration. Cameras of a frame
+are processed in parallel on a thread pool (OpenCV releases the GIL). Lane endpoints of every
+camera are lifted onto the road plane with that camera's road homography, so all estimates share
+the road frame (+x right, +z forward, metres) and can be fused directly.
+"""
+
+# Standard Imports
+import concurrent.futures
+import logging
+import typing
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import bev_remap
+from modules.algo import lane_detection
+from modules.common import computer_vision as cvision
+from modules.data import kitti
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+LANE_SIDES = ("left", "right")
+
+
+# %% ENCAPSULATIONS
+class MultiCameraLaneDetector:
+    """Run lane line detection on several cameras in parallel and fuse the results"""
+
+    def __init__(
+        self,
+        config: dict,
+        calib: dict,
+        cameras: typing.Sequence[int] = kitti.KITTI_COLOR_CAMERAS,
+        n_threads: int = None,
+        reuse_buffers: bool = True,
+    ):
+        """Initialize instance
+
+        Args:
+            config: LaneLineDetector configuration parameters, shared by all cameras
+            calib: Dictionary of calibration parameters as from kitti.read_calib_to_dict()
+            cameras: Camera numbers to run on; e.g. (2, 3) for the KITTI color stereo pair
+            n_threads: Number of threads; defaults to one per camera
+            reuse_buffers: Whether each camera's detector reuses its work arrays across frames
+        """
+        self.cameras = tuple(cameras)
+        self.detectors = {}
+        self.image_to_road = {}
+        for camera in self.cameras:
+            tr_cam_to_road, camera_matrix = kitti.get_camera_calib(calib=calib, camera=camera)
+            self.detectors[camera] = lane_detection.LaneLineDetector(
+                config=config,
+                tr_cam_to_road=tr_cam_to_road,
+                camera_matrix=camera_matrix,
+                reuse_buffers=reuse_buffers,
+            )
+            road_to_image = bev_remap.compute_road_to_image_homography(
+                tr_cam_to_road=tr_cam_to_road, camera_matrix=camera_matrix
+            )
+            self.image_to_road[camera] = np.linalg.inv(road_to_image)
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=n_threads or len(self.cameras), thread_name_prefix="lane_camera"
+        )
+
+    def __enter__(self) -> "MultiCameraLaneDetector":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the thread pool"""
+        self._executor.shutdown(wait=True)
+
+    def run(self, images: typing.Dict[int, np.ndarray], logger: logging.Logger = None) -> dict:
+        """Run lane line detection on one frame of every camera and fuse the estimates
+
+        Args:
+            images: (n_row, n_col, 3) BGR image keyed by camera number; cameras without an image
+                    (e.g. a blocked or dropped view) count as not having found any lane
+            logger: Logger
+
+        Returns:
+            out: Contains output parameters
+                'left_lane_angle': Fused angle of left lane w.r.t. road +x axis (rad); 0 to pi
+                'right_lane_angle': Fused angle of right lane w.r.t. road +x axis (rad); 0 to pi
+                'left_lateral_offset': Fused road frame x (m) where left lane crosses z = 0
+                'right_lateral_offset': Fused road frame x (m) where right lane crosses z = 0
+                'left_confidence': 0-1 confidence of fused left lane (see fuse_lane_estimates())
+                'right_confidence': 0-1 confidence of fused right lane
+                'is_left_found': Whether any camera found the left lane; if not, values are NaN
+                'is_right_found': Whether any camera found the right lane
+                'road_points': (n_camera, 2, 2, 2) = (camera, lane, point, xz) lane endpoints of
+                               every camera on the road plane (m); NaN where not found
+        """
+        if logger is None:
+            logger = LOGGER
+
+        futures = [
+            self._executor.submit(self._detect_camera, camera, images[camera], logger)
+            for camera in self.cameras
+            if images.get(camera) is not None
+        ]
+        road_points = np.full((len(self.cameras), 2, 2, 2), np.nan)
+        for future in futures:
+            camera, points = future.result()
+            road_points[self.cameras.index(camera)] = points
+        logger.info("Ran lane line detection on %d of %d cameras", len(futures), len(self.cameras))
+
+        out = fuse_lane_estimates(road_points)
+        out["road_points"] = road_points
+        return out
+
+    def _detect_camera(
+        self, camera: int, image: np.ndarray, logger: logging.Logger
+    ) -> typing.Tuple[int, np.ndarray]:
+        """Detect lane endpoints of one camera and lift them onto the road plane
+
+        Args:
+            camera: Camera number
+            image: (n_row, n_col, 3) BGR image
+            logger: Logger
+
+        Returns:
+            camera: Camera number
+            road_points: (2, 2, 2) = (lane, point, xz) lane endpoints on the road plane (m)
+        """
+        detector = self.detectors[camera]
+        geometry = detector.get_geometry(image.shape)
+        lane_points, _ = detector.detect_lane_points(image=image, geometry=geometry, logger=logger)
+        return camera, cvision.apply_perspective_transform(lane_points, self.image_to_road[camera])
+
+
+# %% FUNCTIONS
+def fuse_lane_estimates(road_points: np.ndarray) -> dict:
+    """Fuse per-camera lane lines on the road plane into one estimate per lane
+
+    Lines are weighted by their length on the road plane (longer lines have more edge support).
+    Angles are averaged as doubled angles, since a line's direction is only defined modulo pi,
+    and lateral offsets are averaged linearly. The confidence of a lane is the fraction of cameras
+    which found it times the weighted agreement of their directions (1 for identical directions, 0
+    for perpendicular ones).
+
+    Args:
+        road_points: (n_camera, 2, 2, 2) = (camera, lane, point, xz) lane endpoints on the road
+                     plane (m); NaN where a camera did not find a lane
+
+    Returns:
+        out: '<side>_lane_angle', '<side>_lateral_offset', '<side>_confidence' and
+             'is_<side>_found' for side in LANE_SIDES; see MultiCameraLaneDetector.run()
+    """
+    v_lane = road_points[..., 1, :] - road_points[..., 0, :]  # (camera, lane, xz)
+    is_found = ~np.isnan(v_lane).any(axis=-1)  # (camera, lane)
+    lengths = np.where(is_found, np.hypot(v_lane[..., 0], v_lane[..., 1]), 0.0)
+    angles = np.arctan2(v_lane[..., 1], v_lane[..., 0])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # x where the line through both endpoints crosses z = 0
+        x_start, z_start = road_points[..., 0, 0], road_points[..., 0, 1]
+        offsets = x_start - z_start * v_lane[..., 0] / v_lane[..., 1]
+
+        total_weight = lengths.sum(axis=0)  # (lane,)
+        resultant = np.where(is_found, lengths * np.exp(2j * angles), 0.0).sum(axis=0)
+        fused_angles = np.mod(np.angle(resultant) / 2.0, np.pi)
+        fused_offsets = np.where(is_found, lengths * offsets, 0.0).sum(axis=0) / total_weight
+        agreement = np.abs(resultant) / total_weight
+
+    is_any_found = total_weight > 0.0
+    confidence = np.where(is_any_found, np.minimum(agreement, 1.0) * is_found.mean(axis=0), 0.0)
+
+    out = {}
+    for i_side, side in enumerate(LANE_SIDES):
+        is_side_found = bool(is_any_found[i_side])
+        out[f"{side}_lane_angle"] = fused_angles[i_side] if is_side_found else np.nan
+        out[f"{side}_lateral_offset"] = fused_offsets[i_side] if is_side_found else np.nan
+        out[f"{side}_confidence"] = float(confidence[i_side])
+        out[f"is_{side}_found"] = is_side_found
+    return out
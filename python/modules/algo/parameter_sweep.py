@@ -0,0 +1,537 @@
+"""Grid search over LaneLineDetector configurations sharing preprocessing between configurations
+
+The detection pipeline is split into a chain of stages, each reading only a subset of the config
+(e.g. blur only reads 'blur_kernel_shape', Canny only the two thresholds). A stage's output is
+cached under the config subsets of that stage and every stage upstream of it, so configurations
+differing only in e.g. Hough parameters share a single blur and Canny result per frame.
+Configurations are evaluated in sorted stage-key order, which keeps a small bounded LRU cache
+effective. The stages call the same functions as LaneLineDetector.detect_lane_points(), with the
+pyramid levels, ROI cropping and refinement of each configuration. Frames are spread across a
+process pool and every configuration is scored against the KITTI Road ground truth masks.
+"""
+# Standard Imports
+import collections
+import concurrent.futures
+import itertools
+import logging
+import pathlib
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import canny_edges
+from modules.algo import frame_buffers
+from modules.algo import lane_detection
+from modules.algo import lane_results
+from modules.data import frame_cache
+from modules.data import kitti
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+# Per-process sweep state set by _init_worker()
+_WORKER_STATE = None
+
+
+# %% ENCAPSULATIONS
+class SweepStage:
+    """One pipeline stage: the config keys it reads and the function computing its output"""
+
+    def __init__(
+        self,
+        name: str,
+        keys: typing.Sequence[str],
+        func: typing.Callable[[dict, dict, lane_detection.CalibratedGeometry], typing.Any],
+    ):
+        """Initialize instance
+
+        Args:
+            name: Stage name
+            keys: Config keys read by the stage
+            func: Computes the stage output from (outputs of the frame 'image' and of the upstream
+                  stages by stage name, config, geometry)
+        """
+        self.name = name
+        self.keys = tuple(keys)
+        self.func = func
+
+    def get_params(self, config: dict) -> tuple:
+        """Get the hashable config subset read by this stage
+
+        Args:
+            config: LaneLineDetector configuration
+
+        Returns:
+            params: Values of the stage's keys; lists converted to tuples
+        """
+        return tuple(_freeze(config.get(key)) for key in self.keys)
+
+
+class StageCache:
+    """Bounded LRU cache of stage outputs which counts how often each stage is computed"""
+
+    def __init__(self, max_size: int = 32):
+        """Initialize instance
+
+        Args:
+            max_size: Maximum number of cached stage outputs
+        """
+        self.max_size = max_size
+        self.n_computed = collections.Counter()
+        self.n_hit = 0
+        self._items = collections.OrderedDict()
+
+    def clear(self):
+        """Drop all cached outputs (e.g. when moving to the next frame)"""
+        self._items.clear()
+
+    def get_or_compute(
+        self, key: tuple, stage_name: str, compute: typing.Callable[[], typing.Any]
+    ) -> typing.Any:
+        """Get a cached output, computing and caching it on a miss
+
+        Args:
+            key: Hashable key identifying the output
+            stage_name: Name of the stage, for the computation counts
+            compute: Computes the output
+
+        Returns:
+            output: Cached or computed output
+        """
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.n_hit += 1
+            return self._items[key]
+
+        output = compute()
+        self.n_computed[stage_name] += 1
+        self._items[key] = output
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        return output
+
+
+# %% FUNCTIONS
+def _freeze(value: typing.Any) -> typing.Any:
+    """Convert (nested) lists to tuples so config values can be used as cache keys"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _uncrop(
+    image: np.ndarray, shape: tuple, crop_windows: typing.Optional[list], level: int
+) -> np.ndarray:
+    """Place a stage image computed on a crop window into a zero image of the uncropped shape"""
+    if crop_windows is None:
+        return image
+    image_full = np.zeros(shape, dtype=image.dtype)
+    image_full[crop_windows[level]] = image
+    return image_full
+
+
+def _compute_value(
+    outputs: dict, _config: dict, geometry: lane_detection.CalibratedGeometry
+) -> np.ndarray:
+    """Value channel; of the padded ROI bounding box only with 'roi_crop'"""
+    image = outputs["image"]
+    if geometry.crop_windows is not None:
+        image = image[geometry.crop_windows[0]]
+    return frame_buffers.compute_value_channel(image)
+
+
+def _downscale(
+    outputs: dict, _config: dict, geometry: lane_detection.CalibratedGeometry
+) -> np.ndarray:
+    """Value channel at the processing resolution"""
+    return frame_buffers.downscale_image(outputs["value"], levels=geometry.pyramid_levels)
+
+
+def _blur(outputs: dict, config: dict, _geometry: lane_detection.CalibratedGeometry) -> np.ndarray:
+    """Gaussian blur at the processing resolution"""
+    return cv2.GaussianBlur(outputs["pyramid"], tuple(config["blur_kernel_shape"]), 0)
+
+
+def _detect_edges(
+    outputs: dict, config: dict, geometry: lane_detection.CalibratedGeometry
+) -> np.ndarray:
+    """Canny edges intersected with the ROI mask, at the full processing resolution"""
+    roi_mask = geometry.processing_roi_mask
+    if geometry.crop_windows is not None:
+        roi_mask = roi_mask[geometry.crop_windows[-1]]
+    roi_stats = geometry.get_roi_stats(
+        config.get("canny_sample_step", canny_edges.ADAPTIVE_CANNY_DEFAULTS["canny_sample_step"])
+    )
+    _, image_edges_with_mask, _ = canny_edges.detect_canny_edges(
+        image_blur=outputs["blur"], roi_mask=roi_mask, config=config, roi_stats=roi_stats
+    )
+    return _uncrop(image_edges_with_mask, geometry.processing_shape, geometry.crop_windows, -1)
+
+
+def _detect_lines(
+    outputs: dict, config: dict, geometry: lane_detection.CalibratedGeometry
+) -> np.ndarray:
+    """Hough line segments in full-resolution pixels"""
+    return lane_detection.detect_lines(
+        outputs["canny"], config=config, scale=geometry.processing_scale
+    )
+
+
+def _select_lanes(
+    outputs: dict, config: dict, geometry: lane_detection.CalibratedGeometry
+) -> np.ndarray:
+    """Select the left and right lane lines"""
+    n_row, n_col = geometry.image_shape
+    return lane_detection.select_lane_points(
+        lines=outputs["hough"],
+        n_row=n_row,
+        n_col=n_col,
+        strategy=config.get("lane_selection", "first"),
+    )
+
+
+def _refine_lanes(
+    outputs: dict, config: dict, geometry: lane_detection.CalibratedGeometry
+) -> np.ndarray:
+    """Refine lane lines found on a downscaled image against the full-resolution value channel"""
+    half_width = config.get("pyramid_refine_half_width", 0)
+    if (geometry.processing_scale == 1) or (half_width <= 0):
+        return outputs["select"]
+    image_value = _uncrop(outputs["value"], geometry.image_shape, geometry.crop_windows, 0)
+    return lane_detection.refine_lane_points(
+        image_value=image_value, lane_points=outputs["select"], half_width=half_width
+    )
+
+
+# Config keys of the CalibratedGeometry every stage depends on (see get_geometry_params())
+GEOMETRY_KEYS = ("roi_polygon", "pyramid_levels", "roi_crop", "roi_crop_padding")
+
+# Stages of LaneLineDetector.detect_lane_points(), in order
+STAGES = (
+    SweepStage("value", (), _compute_value),
+    SweepStage("pyramid", (), _downscale),
+    SweepStage("blur", ("blur_kernel_shape",), _blur),
+    SweepStage(
+        "canny",
+        ("canny_low_threshold", "canny_high_threshold", "canny_mode")
+        + tuple(canny_edges.ADAPTIVE_CANNY_DEFAULTS),
+        _detect_edges,
+    ),
+    SweepStage(
+        "hough",
+        (
+            "hough_rho_res",
+            "hough_theta_res_deg",
+            "hough_accumulator_threshold",
+            "hough_min_line_length",
+            "hough_max_line_gap",
+        ),
+        _detect_lines,
+    ),
+    SweepStage("select", ("lane_selection",), _select_lanes),
+    SweepStage("refine", ("pyramid_refine_half_width",), _refine_lanes),
+)
+
+
+def expand_grid(base_config: dict, param_grid: typing.Dict[str, list]) -> typing.List[dict]:
+    """Expand a parameter grid into one configuration per combination of values
+
+    Args:
+        base_config: Configuration providing every key which is not swept
+        param_grid: Values to try per config key
+
+    Returns:
+        configs: Copies of base_config with each combination of swept values
+    """
+    keys = list(param_grid)
+    configs = []
+    for values in itertools.product(*(param_grid[key] for key in keys)):
+        config = dict(base_config)
+        config.update(zip(keys, values))
+        configs.append(config)
+    return configs
+
+
+def get_geometry_params(config: dict) -> tuple:
+    """Get the config subset the calibrated geometry, and with it every stage, depends on
+
+    Args:
+        config: LaneLineDetector configuration
+
+    Returns:
+        params: Values of GEOMETRY_KEYS; lists converted to tuples
+    """
+    return tuple(_freeze(config.get(key)) for key in GEOMETRY_KEYS)
+
+
+def get_stage_keys(config: dict) -> tuple:
+    """Get the config subsets read by each stage, in stage order
+
+    Args:
+        config: LaneLineDetector configuration
+
+    Returns:
+        stage_keys: One params tuple per stage in STAGES
+    """
+    return tuple(stage.get_params(config) for stage in STAGES)
+
+
+def run_pipeline(
+    image: np.ndarray,
+    config: dict,
+    geometry: lane_detection.CalibratedGeometry,
+    cache: StageCache,
+) -> np.ndarray:
+    """Run the stage chain for one configuration, reusing cached upstream outputs
+
+    Args:
+        image: (n_row, n_col, 3) BGR image
+        config: LaneLineDetector configuration
+        geometry: Calibrated geometry of config for this image shape
+        cache: Stage output cache of this frame
+
+    Returns:
+        lane_points: (2, 2, 2) = (lane, point, xy) endpoints of the left and right lane lines;
+                     NaN for a lane which was not found
+    """
+    outputs = {"image": image}
+    key = (geometry.key,)
+    for stage in STAGES:
+        key = key + (stage.get_params(config),)
+        outputs[stage.name] = cache.get_or_compute(
+            key=key,
+            stage_name=stage.name,
+            compute=lambda stage=stage: stage.func(outputs, config, geometry),
+        )
+    return outputs[STAGES[-1].name]
+
+
+def evaluate_frame(
+    image: np.ndarray,
+    calib: dict,
+    gt_mask: typing.Optional[np.ndarray],
+    configs: typing.Sequence[dict],
+    cache: StageCache,
+) -> typing.List[dict]:
+    """Evaluate every configuration on one frame
+
+    Args:
+        image: (n_row, n_col, 3) BGR image
+        calib: KITTI calibration dictionary
+        gt_mask: (n_row, n_col) bool ground truth road mask, or None if unavailable
+        configs: Configurations to evaluate
+        cache: Stage output cache; cleared before and after the frame
+
+    Returns:
+        results: Per configuration (in input order): 'left_lane_angle', 'right_lane_angle',
+                 'is_left_found', 'is_right_found' and 'iou' (NaN without ground truth; see
+                 lane_results.score_lane_iou())
+    """
+    # Geometry is only rebuilt when it changes between consecutive configurations
+    detector = lane_detection.LaneLineDetector(
+        config=configs[0],
+        tr_cam_to_road=calib["Tr_cam_to_road:"],
+        camera_matrix=calib["P2:"][:3, :3],
+    )
+
+    # Neighbouring configurations in stage-key order share the longest upstream chains
+    order = sorted(
+        range(len(configs)),
+        key=lambda i_config: repr(
+            (get_geometry_params(configs[i_config]), get_stage_keys(configs[i_config]))
+        ),
+    )
+    lane_points = np.empty((len(configs), 2, 2, 2))
+    cache.clear()
+    for i_config in order:
+        detector.config = configs[i_config]
+        lane_points[i_config] = run_pipeline(
+            image=image,
+            config=configs[i_config],
+            geometry=detector.get_geometry(image.shape),
+            cache=cache,
+        )
+    cache.clear()
+
+    # The projection only depends on the calibration, which all configurations share
+    lane_angles = lane_detection.compute_lane_angles(
+        lane_detection.project_to_bev(
+            points=lane_points, geometry=detector.get_geometry(image.shape)
+        )
+    )
+    is_found = ~np.isnan(lane_points).any(axis=(-2, -1))
+    ious = np.full(len(configs), np.nan)
+    if gt_mask is not None:
+        ious = lane_results.score_lane_iou(lane_points=lane_points, gt_mask=gt_mask)
+    results = []
+    for i_config in range(len(configs)):
+        results.append(
+            {
+                "left_lane_angle": float(lane_angles[i_config, 0]),
+                "right_lane_angle": float(lane_angles[i_config, 1]),
+                "is_left_found": bool(is_found[i_config, 0]),
+                "is_right_found": bool(is_found[i_config, 1]),
+                "iou": float(ious[i_config]),
+            }
+        )
+    return results
+
+
+def run_sweep(
+    data_road_path: typing.Union[str, pathlib.Path],
+    base_config: dict,
+    param_grid: typing.Dict[str, list],
+    data_type: str = "training",
+    prefixes: typing.Sequence[str] = kitti.KITTI_ROAD_PREFIXES,
+    gt_type: str = "road",
+    n_workers: int = None,
+    cache_size: int = 32,
+    use_frame_cache: bool = True,
+    frame_cache_dir: typing.Union[str, pathlib.Path] = None,
+) -> typing.Tuple[typing.List[dict], typing.List[dict]]:
+    """Evaluate every combination of a parameter grid on every frame of a KITTI Road split
+
+    Each worker process evaluates all configurations on one frame at a time, sharing stage
+    outputs between configurations through a bounded LRU cache.
+
+    Args:
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        base_config: Configuration providing every key which is not swept
+        param_grid: Values to try per config key
+        data_type: 'training' or 'testing' (no ground truth; IoU is NaN)
+        prefixes: Road category filename prefixes to include
+        gt_type: Ground truth mask type; 'road' or 'lane'
+        n_workers: Number of worker processes; None uses all CPUs, 0 runs in this process
+        cache_size: Maximum number of stage outputs cached per worker
+        use_frame_cache: If True, decoded frames are read from a frame_cache.KittiFrameCache
+        frame_cache_dir: Folder of the frame cache; defaults to data_road_path/.frame_cache
+
+    Returns:
+        summary: One row per configuration with the swept values, 'n_frame',
+                 'left_found_rate', 'right_found_rate' and 'mean_iou' (NaN-ignoring mean)
+        frame_results: One row per (configuration, frame) with the swept values, 'prefix',
+                       'frame_num' and the per-frame results of evaluate_frame()
+    """
+    data_road_path = pathlib.Path(data_road_path)
+    configs = expand_grid(base_config=base_config, param_grid=param_grid)
+    cache = None
+    if use_frame_cache:
+        cache = frame_cache.KittiFrameCache(
+            data_road_path=data_road_path,
+            data_type=data_type,
+            prefixes=prefixes,
+            cache_dir=frame_cache_dir,
+        )
+        frames = cache.frames
+    else:
+        frames = kitti.list_kitti_road_frames(
+            data_road_path=data_road_path, data_type=data_type, prefixes=prefixes
+        )
+    LOGGER.info("Sweeping %d configurations over %d frames", len(configs), len(frames))
+
+    initargs = (data_road_path, data_type, gt_type, configs, cache_size, cache)
+    if n_workers == 0:
+        _init_worker(*initargs)
+        frame_outputs = list(map(_evaluate_worker_frame, frames))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker, initargs=initargs
+        ) as executor:
+            frame_outputs = list(executor.map(_evaluate_worker_frame, frames))
+
+    frame_results = []
+    summary = []
+    for i_config, config in enumerate(configs):
+        swept = {key: config[key] for key in param_grid}
+        rows = [
+            dict(swept, prefix=prefix, frame_num=frame_num, **results[i_config])
+            for (prefix, frame_num), results in zip(frames, frame_outputs)
+        ]
+        frame_results.extend(rows)
+
+        ious = np.array([row["iou"] for row in rows], dtype=np.float64)
+        summary.append(
+            dict(
+                swept,
+                n_frame=len(rows),
+                left_found_rate=float(np.mean([row["is_left_found"] for row in rows])),
+                right_found_rate=float(np.mean([row["is_right_found"] for row in rows])),
+                mean_iou=float(np.nanmean(ious)) if np.isfinite(ious).any() else np.nan,
+            )
+        )
+    return summary, frame_results
+
+
+def _init_worker(
+    data_road_path: pathlib.Path,
+    data_type: str,
+    gt_type: str,
+    configs: typing.List[dict],
+    cache_size: int,
+    cache: frame_cache.KittiFrameCache = None,
+):
+    """Initialize worker process state
+
+    Args:
+        data_road_path: Path to data_road/ folder
+        data_type: 'training' or 'testing'
+        gt_type: Ground truth mask type
+        configs: Configurations to evaluate
+        cache_size: Maximum number of cached stage outputs
+        cache: Optional frame cache to read frames from instead of decoding them
+    """
+    global _WORKER_STATE  # pylint: disable=global-statement
+    _WORKER_STATE = {
+        "data_road_path": data_road_path,
+        "data_type": data_type,
+        "gt_type": gt_type,
+        "configs": configs,
+        "stage_cache": StageCache(max_size=cache_size),
+        "frame_cache": cache,
+    }
+
+
+def _evaluate_worker_frame(frame: typing.Tuple[str, int]) -> typing.List[dict]:
+    """Evaluate every configuration on one frame inside a worker
+
+    Args:
+        frame: (prefix, frame_num)
+
+    Returns:
+        results: Output of evaluate_frame()
+    """
+    prefix, frame_num = frame
+    state = _WORKER_STATE
+    if state["frame_cache"] is not None:
+        image, calib = state["frame_cache"].read(prefix=prefix, frame_num=frame_num)
+    else:
+        image, calib = kitti.read_kitti_road_data(
+            data_road_path=state["data_road_path"],
+            data_type=state["data_type"],
+            frame_num=frame_num,
+            prefix=prefix,
+        )
+
+    gt_mask = None
+    if state["data_type"] == "training":
+        gt_mask = kitti.read_kitti_road_gt(
+            data_road_path=state["data_road_path"],
+            frame_num=frame_num,
+            prefix=prefix,
+            gt_type=state["gt_type"],
+        )
+
+    results = evaluate_frame(
+        image=image,
+        calib=calib,
+        gt_mask=gt_mask,
+        configs=state["configs"],
+        cache=state["stage_cache"],
+    )
+    LOGGER.debug(
+        "%s_%06d: computed stages %r", prefix, frame_num, dict(state["stage_cache"].n_computed)
+    )
+    return results
@@ -1,55 +1,141 @@
 """Computer vision support functions"""
 # Standard Imports
 import typing
-import warnings
 
 # Third Party Imports
 import numpy as np
-import cv2
 
 
-def augment(v: np.ndarray) -> np.ndarray:
+def get_float_dtype(v: np.ndarray) -> np.dtype:
+    """Get the floating point dtype computations on vector(s) should use
+
+    float32 vectors stay float32 (half the memory traffic of float64); integer vectors are
+    promoted to float64. Transform matrices are cast to this dtype.
+
+    Args:
+        v: Input vector(s)
+
+    Returns:
+        dtype: Floating point dtype
+    """
+    dtype = np.asarray(v).dtype
+    return dtype if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+
+
+def augment(v: np.ndarray, out: np.ndarray = None) -> np.ndarray:
     """Augment vector(s) with a '1' to excend dimension by one
 
     Args:
         v: input vector(s) of shape (..., N)
+        out: Optional (..., N + 1) output array
 
     Returns:
         out: Output vector(s) of shape (..., N + 1)
     """
-    if np.ndim(v) == 1:
-        out = np.append(v, 1)
-    else:
-        front_shape = v.shape[:-1]
-        ones_vec = np.ones(front_shape)
-        out = np.concatenate((v, ones_vec[:, np.newaxis]), axis=-1)
+    v = np.asarray(v)
+    if out is None:
+        out = np.empty(v.shape[:-1] + (v.shape[-1] + 1,), dtype=np.result_type(v, 1))
+    out[..., :-1] = v
+    out[..., -1] = 1
     return out
 
 
-def homo_to_cart(v_homo: np.ndarray) -> np.ndarray:
+def homo_to_cart(v_homo: np.ndarray, out: np.ndarray = None) -> np.ndarray:
     """Convert homogeneous coordinate vector(s) to cartesian
 
     Args:
         v_homo: Input homogeneous vector(s) (..., N+1)
+        out: Optional (..., N) output array
 
     Returns:
         v_out: Output cartesian vector(s) (..., N)
     """
-    v_out = v_homo[..., :-1] / v_homo[..., -1][..., np.newaxis]
-    return v_out
+    v_homo = np.asarray(v_homo)
+    return np.divide(v_homo[..., :-1], v_homo[..., -1:], out=out)
 
 
-def apply_perspective_transform(v: np.ndarray, transform: np.ndarray) -> np.ndarray:
+def apply_perspective_transform(
+    v: np.ndarray, transform: np.ndarray, out: np.ndarray = None
+) -> np.ndarray:
     """Apply a perspective transformation (one dimension higher)
 
+    The transform is split into its linear, translation and projective parts so no augmented copy
+    of the input is built. Computation is done in the floating dtype of v (see
+    get_float_dtype()).
+
     Args:
         v: (..., N) input vector(s)
-        transform: (..., N+1, N+1) transformation matrix(es)
+        transform: (N+1, N+1) transformation matrix, or (..., N+1, N+1) matrices broadcast
+                   against the leading dimensions of v
+        out: Optional (..., N) output array; must be C-contiguous for a single transform
 
     Returns:
         out: (..., N) output transformed vectors
     """
-    aug = augment(v)
-    out = np.einsum("...ij, ...j -> ...i", transform, aug)
-    out = homo_to_cart(out)
+    v = np.asarray(v)
+    dtype = get_float_dtype(v)
+    transform = np.asarray(transform, dtype=dtype)
+    linear = transform[..., :-1, :-1]
+    translation = transform[..., :-1, -1]
+    projective = transform[..., -1, :-1]
+    scale = transform[..., -1, -1]
+
+    if transform.ndim == 2:
+        # Single transform: one matrix multiply over all vectors
+        if out is None:
+            out = np.empty(v.shape, dtype=dtype)
+        assert out.flags.c_contiguous, "out must be C-contiguous"
+        n_dim = v.shape[-1]
+        v_flat = v.reshape((-1, n_dim))
+        np.matmul(v_flat, linear.T, out=out.reshape((-1, n_dim)), dtype=dtype)
+        denominator = (v_flat @ projective + scale).reshape(v.shape[:-1])
+    else:
+        out_shape = np.broadcast_shapes(v.shape[:-1], transform.shape[:-2]) + v.shape[-1:]
+        if out is None:
+            out = np.empty(out_shape, dtype=dtype)
+        np.matmul(linear, v[..., np.newaxis], out=out[..., np.newaxis], dtype=dtype)
+        denominator = np.einsum("...j, ...j -> ...", projective, v) + scale
+    out += translation
+    out /= denominator[..., np.newaxis]
+    return out
+
+
+def project_points(
+    points: np.ndarray,
+    K_inv: np.ndarray,
+    R: np.ndarray,
+    depth: typing.Union[float, np.ndarray],
+    out: np.ndarray = None,
+) -> np.ndarray:
+    """Lift pixels to 3D: depth * K_inv @ augment(apply_perspective_transform(points, R))
+
+    Fused into one (3, 3) matrix multiply: augment(apply_perspective_transform(p, R)) is
+    R @ augment(p) divided by its last element, so K_inv @ R is applied once and the division is
+    folded into the depth scale.
+
+    Args:
+        points: (..., 2) pixel coordinates (x, y)
+        K_inv: (3, 3) inverse intrinsic camera matrix
+        R: (3, 3) perspective transform applied to pixels first
+        depth: Depth (scalar or (...,) per point) the rays are scaled to
+        out: Optional C-contiguous (..., 3) output array
+
+    Returns:
+        out: (..., 3) 3D points
+    """
+    points = np.asarray(points)
+    dtype = get_float_dtype(points)
+    R = np.asarray(R, dtype=dtype)
+    combined = np.asarray(K_inv, dtype=dtype) @ R
+
+    if out is None:
+        out = np.empty(points.shape[:-1] + (3,), dtype=dtype)
+    assert out.flags.c_contiguous, "out must be C-contiguous"
+    points_flat = points.reshape((-1, 2))
+    out_flat = out.reshape((-1, 3))
+    np.matmul(points_flat, combined[:, :2].T, out=out_flat, dtype=dtype)
+    out_flat += combined[:, 2]
+
+    denominator = (points_flat @ R[2, :2] + R[2, 2]).reshape(points.shape[:-1])
+    out *= (np.asarray(depth, dtype=dtype) / denominator)[..., np.newaxis]
     return out
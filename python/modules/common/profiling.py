@@ -0,0 +1,168 @@
+"""Lightweight timing instrumentation and profiling hooks"""
+# Standard Imports
+import contextlib
+import cProfile
+import pathlib
+import pstats
+import sys
+import time
+import typing
+
+# Third Party Imports
+import numpy as np
+
+
+# %% ENCAPSULATIONS
+class StageTimer:
+    """Record the duration of consecutive stages of one frame with perf_counter_ns
+
+    Call lap(stage) at the end of each stage; the time since the previous lap (or construction)
+    is added to that stage.
+    """
+
+    def __init__(self):
+        """Initialize instance and start timing"""
+        self.timings_ns = {}
+        self._last_ns = time.perf_counter_ns()
+
+    def lap(self, stage: str):
+        """Mark the end of a stage
+
+        Args:
+            stage: Stage name
+        """
+        now_ns = time.perf_counter_ns()
+        self.timings_ns[stage] = self.timings_ns.get(stage, 0) + now_ns - self._last_ns
+        self._last_ns = now_ns
+
+    def total_ns(self) -> int:
+        """Total time over all stages (ns)"""
+        return sum(self.timings_ns.values())
+
+
+class NullStageTimer:
+    """Stand-in for StageTimer when timing is disabled; lap() does nothing"""
+
+    timings_ns = None
+
+    def lap(self, stage: str):
+        """Do nothing"""
+
+    def total_ns(self) -> int:
+        """No time is recorded"""
+        return 0
+
+
+# Shared instance used whenever timing is disabled
+NULL_TIMER = NullStageTimer()
+
+
+class LatencyRecorder:
+    """Timing sink collecting per-stage latencies across frames for percentile summaries
+
+    Instances are callable with a frame's {stage: duration_ns} dict, so they can be passed
+    wherever a timing sink is accepted.
+    """
+
+    def __init__(self):
+        """Initialize instance"""
+        self._timings_ns = {}
+
+    def __call__(self, timings_ns: typing.Dict[str, int]):
+        """Record one frame's stage timings
+
+        Args:
+            timings_ns: Duration (ns) of each stage; a 'total' entry is added automatically
+        """
+        for stage, duration_ns in timings_ns.items():
+            self._timings_ns.setdefault(stage, []).append(duration_ns)
+        self._timings_ns.setdefault("total", []).append(sum(timings_ns.values()))
+
+    @property
+    def n_frame(self) -> int:
+        """Number of frames recorded"""
+        return len(self._timings_ns.get("total", []))
+
+    def summary(
+        self, percentiles: typing.Sequence[float] = (50, 95, 99)
+    ) -> typing.Dict[str, dict]:
+        """Summarize recorded latencies
+
+        Args:
+            percentiles: Percentiles to compute
+
+        Returns:
+            summary: Per stage: {'count', 'mean_ms', 'p<percentile>_ms' for each percentile}
+        """
+        summary = {}
+        for stage, durations_ns in self._timings_ns.items():
+            durations_ms = np.array(durations_ns) / 1e6
+            stage_summary = {"count": len(durations_ms), "mean_ms": durations_ms.mean()}
+            for percentile, value in zip(
+                percentiles, np.percentile(durations_ms, percentiles)
+            ):
+                stage_summary[f"p{percentile:g}_ms"] = value
+            summary[stage] = stage_summary
+        return summary
+
+    def format_summary(self, percentiles: typing.Sequence[float] = (50, 95, 99)) -> str:
+        """Format summary as a text table
+
+        Args:
+            percentiles: Percentiles to show
+
+        Returns:
+            table: One line per stage
+        """
+        columns = ["mean_ms"] + [f"p{percentile:g}_ms" for percentile in percentiles]
+        lines = [f"{'stage':<16s}{'count':>8s}" + "".join(f"{col:>10s}" for col in columns)]
+        for stage, stage_summary in self.summary(percentiles).items():
+            lines.append(
+                f"{stage:<16s}{stage_summary['count']:>8d}"
+                + "".join(f"{stage_summary[col]:>10.3f}" for col in columns)
+            )
+        return "\n".join(lines)
+
+
+# %% FUNCTIONS
+@contextlib.contextmanager
+def profile(mode: str = None, output_path: typing.Union[str, pathlib.Path] = None):
+    """Profile the enclosed block
+
+    Args:
+        mode: None (no profiling), 'cprofile' or 'pyinstrument' (requires pyinstrument package)
+        output_path: If given, save profile here (.prof stats for cProfile, .html for
+                     pyinstrument); otherwise print a report to stdout
+    """
+    if mode is None:
+        yield
+        return
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output_path is not None:
+                profiler.dump_stats(str(output_path))
+            else:
+                pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(25)
+
+    elif mode == "pyinstrument":
+        import pyinstrument  # pylint: disable=import-outside-toplevel
+
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            if output_path is not None:
+                pathlib.Path(output_path).write_text(profiler.output_html(), encoding="utf-8")
+            else:
+                print(profiler.output_text())
+
+    else:
+        raise ValueError(f"Unknown profiling mode {mode}")
@@ -0,0 +1,342 @@
+"""Cache of decoded KITTI Road frames in a single memory-mapped file
+
+Decoding PNGs costs more than running lane detection on them, so repeated passes over a split
+(e.g. parameter sweeps) decode each image only once. The first pass writes every decoded image of
+a split back to back into one raw uint8 file alongside a JSON index sidecar with frame names,
+shapes, byte offsets, calibration and the size / modification time of every source file. Later
+passes (and worker processes) map the file and read frames as zero-copy views; the cache is
+rebuilt whenever a source file changes. Ground truth masks are cached the same way for fast bulk
+evaluation.
+"""
+# Standard Imports
+import json
+import os
+import pathlib
+import typing
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.data import kitti
+
+# Bump when the file layout changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+
+# %% ENCAPSULATIONS
+class KittiFrameCache:
+    """Decoded frames and calibration of one KITTI Road split, memory-mapped from disk
+
+    Instances can be pickled to worker processes; the file is mapped again lazily on first access
+    without revalidating the cache.
+    """
+
+    def __init__(
+        self,
+        data_road_path: typing.Union[str, pathlib.Path],
+        data_type: str = "training",
+        prefixes: typing.Sequence[str] = kitti.KITTI_ROAD_PREFIXES,
+        cache_dir: typing.Union[str, pathlib.Path] = None,
+    ):
+        """Initialize instance; builds the cache if it is missing or out of date
+
+        Args:
+            data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+            data_type: 'training' or 'testing'
+            prefixes: Road category filename prefixes to include
+            cache_dir: Folder holding the cache files; defaults to data_road_path/.frame_cache
+        """
+        self.data_road_path = pathlib.Path(data_road_path)
+        self.data_type = data_type
+        self.prefixes = tuple(prefixes)
+        if cache_dir is None:
+            cache_dir = self.data_road_path / ".frame_cache"
+        self.cache_dir = pathlib.Path(cache_dir)
+
+        name = self._get_cache_name()
+        self.data_path = self.cache_dir / f"{name}.bin"
+        self.index_path = self.cache_dir / f"{name}.json"
+
+        self._entries = None
+        self._calibs = None
+        self._positions = None
+        self._data = None
+
+        index = self._load_index()
+        if (index is None) or (not self._is_index_current(index)):
+            index = self.build()
+        self._set_index(index)
+
+    def __len__(self) -> int:
+        """Number of cached frames"""
+        return len(self._entries)
+
+    def __getstate__(self) -> dict:
+        """Pickle everything except the memory map"""
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    @property
+    def frames(self) -> typing.List[typing.Tuple[str, int]]:
+        """Sorted (prefix, frame_num) pairs of the cached frames"""
+        return [(entry["prefix"], entry["frame_num"]) for entry in self._entries]
+
+    def get(self, index: int) -> typing.Tuple[np.ndarray, dict]:
+        """Get a cached frame by position
+
+        Args:
+            index: Position of the frame in `frames`
+
+        Returns:
+            image_2: (n_row, n_col, 3) read-only BGR image; a view into the memory map
+            calib: Dictionary of read-only calibration arrays as from kitti.read_calib_to_dict()
+        """
+        if self._data is None:
+            self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+
+        entry = self._entries[index]
+        n_byte = int(np.prod(entry["shape"]))
+        image = self._data[entry["offset"] : entry["offset"] + n_byte].reshape(entry["shape"])
+        return image, dict(self._calibs[index])
+
+    def read(self, prefix: str, frame_num: int) -> typing.Tuple[np.ndarray, dict]:
+        """Get a cached frame by name; drop-in replacement for kitti.read_kitti_road_data()
+
+        Args:
+            prefix: Road category filename prefix
+            frame_num: Frame number
+
+        Returns:
+            image_2: (n_row, n_col, 3) read-only BGR image; a view into the memory map
+            calib: Dictionary of read-only calibration arrays
+        """
+        return self.get(self._positions[(prefix, frame_num)])
+
+    def build(self) -> dict:
+        """Decode every frame of the split into the cache files
+
+        The data file and index are written to temporary files first and then renamed, so readers
+        never see a partially written cache.
+
+        Returns:
+            index: Index sidecar contents
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        frames = self._list_frames()
+
+        entries = []
+        offset = 0
+        tmp_data_path = self.data_path.with_name(f"{self.data_path.name}.{os.getpid()}.tmp")
+        with open(tmp_data_path, "wb") as data_file:
+            for prefix, frame_num in frames:
+                image, calib = self._read_frame(prefix, frame_num)
+                assert image is not None, f"Image for {prefix}_{frame_num:06d} could not be read"
+                data_file.write(np.ascontiguousarray(image).data)
+
+                source_paths = self._get_source_paths(prefix, frame_num)
+                entries.append(
+                    {
+                        "prefix": prefix,
+                        "frame_num": frame_num,
+                        "shape": list(image.shape),
+                        "offset": offset,
+                        "sources": [_stat_file(path) for path in source_paths],
+                        "calib": {name: value.tolist() for name, value in calib.items()},
+                    }
+                )
+                offset += image.nbytes
+
+        index = {
+            "version": CACHE_FORMAT_VERSION,
+            "data_type": self.data_type,
+            "prefixes": list(self.prefixes),
+            "n_byte": offset,
+            "frames": entries,
+        }
+        tmp_index_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_index_path, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+        os.replace(tmp_data_path, self.data_path)
+        os.replace(tmp_index_path, self.index_path)
+        return index
+
+    def _get_cache_name(self) -> str:
+        """Get the file name (without suffix) of the cache files"""
+        return f"{self.data_type}_{'_'.join(self.prefixes)}"
+
+    def _list_frames(self) -> typing.List[typing.Tuple[str, int]]:
+        """List the sorted (prefix, frame_num) pairs to cache"""
+        return kitti.list_kitti_road_frames(
+            data_road_path=self.data_road_path, data_type=self.data_type, prefixes=self.prefixes
+        )
+
+    def _read_frame(self, prefix: str, frame_num: int) -> typing.Tuple[np.ndarray, dict]:
+        """Read the array and calibration of a frame to cache"""
+        return kitti.read_kitti_road_data(
+            data_road_path=self.data_road_path,
+            data_type=self.data_type,
+            frame_num=frame_num,
+            prefix=prefix,
+        )
+
+    def _get_source_paths(self, prefix: str, frame_num: int) -> typing.Tuple[str, ...]:
+        """Get the image and calibration file paths of a frame"""
+        split_path = self.data_road_path / self.data_type
+        image_path = split_path / "image_2" / f"{prefix}_{frame_num:06d}.png"
+        calib_path = split_path / "calib" / f"{prefix}_{frame_num:06d}.txt"
+        return str(image_path), str(calib_path)
+
+    def _load_index(self) -> typing.Optional[dict]:
+        """Load the index sidecar, or None if there is no usable cache"""
+        if not (self.index_path.is_file() and self.data_path.is_file()):
+            return None
+        with open(self.index_path, encoding="utf-8") as index_file:
+            index = json.load(index_file)
+        if index.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        if os.path.getsize(self.data_path) != index["n_byte"]:
+            return None
+        return index
+
+    def _is_index_current(self, index: dict) -> bool:
+        """Check that the cached frames match the current source files
+
+        Args:
+            index: Index sidecar contents
+
+        Returns:
+            is_current: False if frames were added/removed or any source's size or mtime changed
+        """
+        frames = self._list_frames()
+        cached_frames = [(entry["prefix"], entry["frame_num"]) for entry in index["frames"]]
+        if frames != cached_frames:
+            return False
+
+        for entry in index["frames"]:
+            source_paths = self._get_source_paths(entry["prefix"], entry["frame_num"])
+            for source_path, source_stat in zip(source_paths, entry["sources"]):
+                if not os.path.isfile(source_path) or _stat_file(source_path) != source_stat:
+                    return False
+        return True
+
+    def _set_index(self, index: dict):
+        """Set up frame lookup from the index sidecar
+
+        Args:
+            index: Index sidecar contents
+        """
+        self._entries = [
+            {
+                "prefix": entry["prefix"],
+                "frame_num": entry["frame_num"],
+                "shape": tuple(entry["shape"]),
+                "offset": entry["offset"],
+            }
+            for entry in index["frames"]
+        ]
+        self._positions = {
+            (entry["prefix"], entry["frame_num"]): position
+            for position, entry in enumerate(self._entries)
+        }
+        self._calibs = []
+        for entry in index["frames"]:
+            calib = {}
+            for name, value in entry["calib"].items():
+                value = np.array(value, dtype=np.float64)
+                value.flags.writeable = False
+                calib[name] = value
+            self._calibs.append(calib)
+        self._data = None
+
+
+class KittiGtMaskCache(KittiFrameCache):
+    """Ground truth masks of the KITTI Road training split, memory-mapped from disk
+
+    Only frames with a ground truth image of the requested type are cached. Masks are stored as
+    one byte per pixel (0 or 1) and read back as zero-copy bool views.
+    """
+
+    def __init__(
+        self,
+        data_road_path: typing.Union[str, pathlib.Path],
+        gt_type: str = "road",
+        prefixes: typing.Sequence[str] = kitti.KITTI_ROAD_PREFIXES,
+        cache_dir: typing.Union[str, pathlib.Path] = None,
+    ):
+        """Initialize instance; builds the cache if it is missing or out of date
+
+        Args:
+            data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+            gt_type: 'road' or 'lane'; see kitti.read_kitti_road_gt()
+            prefixes: Road category filename prefixes to include
+            cache_dir: Folder holding the cache files; defaults to data_road_path/.frame_cache
+        """
+        self.gt_type = gt_type
+        super().__init__(
+            data_road_path=data_road_path,
+            data_type="training",
+            prefixes=prefixes,
+            cache_dir=cache_dir,
+        )
+
+    def get_mask(self, index: int) -> np.ndarray:
+        """Get a cached mask by position
+
+        Args:
+            index: Position of the frame in `frames`
+
+        Returns:
+            gt_mask: (n_row, n_col) read-only bool mask; a view into the memory map
+        """
+        image, _ = self.get(index)
+        return image.view(bool)
+
+    def read_mask(self, prefix: str, frame_num: int) -> typing.Optional[np.ndarray]:
+        """Get a cached mask by name; drop-in replacement for kitti.read_kitti_road_gt()
+
+        Args:
+            prefix: Road category filename prefix
+            frame_num: Frame number
+
+        Returns:
+            gt_mask: (n_row, n_col) read-only bool mask, or None if the frame has no ground truth
+        """
+        position = self._positions.get((prefix, frame_num))
+        return None if position is None else self.get_mask(position)
+
+    def _get_cache_name(self) -> str:
+        return f"gt_{self.gt_type}_{'_'.join(self.prefixes)}"
+
+    def _list_frames(self) -> typing.List[typing.Tuple[str, int]]:
+        return [
+            (prefix, frame_num)
+            for prefix, frame_num in super()._list_frames()
+            if os.path.isfile(self._get_source_paths(prefix, frame_num)[0])
+        ]
+
+    def _read_frame(self, prefix: str, frame_num: int) -> typing.Tuple[np.ndarray, dict]:
+        gt_mask = kitti.read_kitti_road_gt(
+            data_road_path=self.data_road_path,
+            frame_num=frame_num,
+            prefix=prefix,
+            gt_type=self.gt_type,
+        )
+        return None if gt_mask is None else gt_mask.view(np.uint8), {}
+
+    def _get_source_paths(self, prefix: str, frame_num: int) -> typing.Tuple[str, ...]:
+        gt_path = (
+            self.data_road_path
+            / "training"
+            / "gt_image_2"
+            / f"{prefix}_{self.gt_type}_{frame_num:06d}.png"
+        )
+        return (str(gt_path),)
+
+
+# %% FUNCTIONS
+def _stat_file(path: str) -> typing.List[int]:
+    """Get the [size, mtime_ns] of a file used to detect changes"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,204 @@
+"""Stream frames from video files, image sequences or cameras with background decoding"""
+# Standard Imports
+import glob
+import pathlib
+import queue
+import threading
+import time
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Marks the end of the stream in the frame queue
+_END_OF_STREAM = object()
+
+
+# %% ENCAPSULATIONS
+class FrameStream:
+    """Iterate over frames decoded on a background thread into a bounded queue
+
+    Decoding runs ahead of the consumer by at most `max_queue_size` frames. When the queue is full
+    the reader either blocks (backpressure; every frame is delivered) or, with `drop_oldest`,
+    discards the oldest queued frame so the consumer always gets the most recent frames, as needed
+    for real-time use.
+
+    Iterating yields (frame_index, frame) tuples, where frame_index counts frames read from the
+    source (so gaps indicate dropped frames).
+    """
+
+    def __init__(
+        self,
+        source: typing.Union[str, pathlib.Path, int, cv2.VideoCapture],
+        max_queue_size: int = 8,
+        drop_oldest: bool = False,
+    ):
+        """Initialize instance and start decoding
+
+        Args:
+            source: One of:
+                    - cv2.VideoCapture instance
+                    - int camera index
+                    - glob pattern for an image sequence (e.g. 'drive/image_2/*.png'); frames are
+                      read in sorted filename order
+                    - path to a video file
+            max_queue_size: Maximum number of decoded frames waiting to be consumed
+            drop_oldest: If True, drop oldest queued frame when the queue is full instead of
+                         blocking the reader
+        """
+        assert max_queue_size > 0, "Queue size must be positive"
+        self.drop_oldest = drop_oldest
+        self.n_read = 0
+        self.n_dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._read_frame = _make_frame_reader(source)
+        self._thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of decoded frames currently waiting to be consumed"""
+        return self._queue.qsize()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> typing.Tuple[int, np.ndarray]:
+        if self._stop_event.is_set():
+            raise StopIteration
+        item = self._queue.get()
+        if item is _END_OF_STREAM:
+            self._queue.put_nowait(_END_OF_STREAM)  # keep stream exhausted for later calls
+            raise StopIteration
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop decoding and release the source"""
+        self._stop_event.set()
+
+        # Unblock reader if it is waiting on a full queue
+        while self._thread.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.01)
+
+    def _decode_loop(self):
+        """Read frames from the source until exhausted or stopped"""
+        try:
+            while not self._stop_event.is_set():
+                frame = self._read_frame()
+                if frame is None:
+                    break
+                self._put((self.n_read, frame))
+                self.n_read += 1
+        except Exception as error:  # pylint: disable=broad-except
+            self._put(error)
+        finally:
+            self._read_frame.release()
+            self._put(_END_OF_STREAM, is_final=True)
+
+    def _put(self, item, is_final: bool = False):
+        """Put item into the queue, applying backpressure or drop-oldest policy
+
+        Args:
+            item: Item to queue
+            is_final: Whether this is the end-of-stream marker, which is queued even when stopped
+        """
+        while True:
+            try:
+                self._queue.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                if self._stop_event.is_set():
+                    if not is_final:
+                        return
+                elif self.drop_oldest:
+                    try:
+                        self._queue.get_nowait()
+                        self.n_dropped += 1
+                    except queue.Empty:
+                        pass
+
+
+class StreamStats:
+    """Achieved throughput of a frame stream"""
+
+    def __init__(self):
+        """Initialize instance"""
+        self.n_frame = 0
+        self.start_time = None
+        self.fps = 0.0
+
+    def update(self) -> float:
+        """Record a processed frame
+
+        Returns:
+            fps: Achieved frames per second since the first processed frame
+        """
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        self.n_frame += 1
+        elapsed = now - self.start_time
+        if elapsed > 0.0:
+            self.fps = (self.n_frame - 1) / elapsed
+        return self.fps
+
+
+# %% FUNCTIONS
+def _make_frame_reader(source) -> typing.Callable[[], typing.Optional[np.ndarray]]:
+    """Create a callable returning the next BGR frame of a source, or None when exhausted
+
+    The callable also has a release() attribute which frees the underlying source.
+
+    Args:
+        source: See FrameStream
+
+    Returns:
+        read_frame: Frame reader
+    """
+    is_path = isinstance(source, (str, pathlib.Path))
+    if is_path and any(char in str(source) for char in "*?["):
+        image_paths = iter(sorted(glob.glob(str(source))))
+
+        def read_image() -> typing.Optional[np.ndarray]:
+            image_path = next(image_paths, None)
+            if image_path is None:
+                return None
+            image = cv2.imread(image_path)
+            if image is None:
+                raise IOError(f"Image {image_path} could not be read")
+            return image
+
+        read_image.release = lambda: None
+        return read_image
+
+    if isinstance(source, cv2.VideoCapture):
+        capture = source
+    elif isinstance(source, int):
+        capture = cv2.VideoCapture(source)
+    else:
+        assert pathlib.Path(source).is_file(), f"Video file {source} does not exist"
+        capture = cv2.VideoCapture(str(source))
+    if not capture.isOpened():
+        raise IOError(f"Video source {source} could not be opened")
+
+    def read_video() -> typing.Optional[np.ndarray]:
+        is_read, frame = capture.read()
+        return frame if is_read else None
+
+    read_video.release = capture.release
+    return read_video
@@ -1,34 +1,83 @@
 """Functions and code relating to working with KITTI datasets"""
 # Standard Imports
+import functools
+import os
 import pathlib
 import typing
 
 # Third Party Imports
 import numpy as np
-import pandas as pd
 import cv2
 
+# Image filename prefixes of the KITTI road categories: urban marked, urban multiple marked and
+# urban unmarked
+KITTI_ROAD_PREFIXES = ("um", "umm", "uu")
+
+# Color cameras; camera k has projection matrix 'Pk:' and images in image_k/
+KITTI_COLOR_CAMERAS = (2, 3)
+
+# Number of parsed calibration files kept in memory; frames of a sequence share calibration
+CALIB_CACHE_SIZE = 256
+
 
 # %% KITTI ROAD DATASET
 def read_calib_to_dict(path: typing.Union[str, pathlib.Path]) -> dict:
     """Read calibration text file from KITTI dataset into dictionary
 
+    Parsed files are cached by path, modification time and size, so repeated reads of the same
+    calibration only cost a stat() call. The returned arrays are shared with the cache and are
+    therefore read-only; copy them before modifying.
+
     Args:
         calib_path: Path to calibration .txt. file
 
     Returns:
-        calib: Dictionary of calibration parameters
+        calib: Dictionary of calibration parameters keyed by name (e.g. 'P2:'); 12-value entries
+               are (3, 4) matrices, 9-value entries are (3, 3) matrices
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    calib = _parse_calib_file(path, stat.st_mtime_ns, stat.st_size)
+    return dict(calib)
+
+
+@functools.lru_cache(maxsize=CALIB_CACHE_SIZE)
+def _parse_calib_file(path: str, mtime_ns: int, size: int) -> dict:
+    """Parse calibration text file; cached per (path, mtime_ns, size)
+
+    Args:
+        path: Absolute path to calibration .txt file
+        mtime_ns: File modification time (ns); part of the cache key only
+        size: File size (bytes); part of the cache key only
+
+    Returns:
+        calib: Dictionary of read-only calibration arrays
     """
-    calib_df = pd.read_csv(path, delimiter=" ", header=None, index_col=0)
-    calib = {
-        index: np.array(calib_df.loc[index]).reshape((3, 4))
-        for index in calib_df.index.values.tolist()
-    }
+    del mtime_ns, size  # only used to invalidate the cache
+    calib = {}
+    with open(path, encoding="utf-8") as calib_file:
+        for line in calib_file:
+            fields = line.split()
+            if not fields:
+                continue
+
+            values = np.array(fields[1:], dtype=np.float64)
+            if values.size == 12:
+                values = values.reshape((3, 4))
+            elif values.size == 9:
+                values = values.reshape((3, 3))
+            values.flags.writeable = False
+            calib[fields[0]] = values
+
     return calib
 
 
 def read_kitti_road_data(
-    data_road_path: pathlib.Path, data_type: str = "training", frame_num: int = 0
+    data_road_path: pathlib.Path,
+    data_type: str = "training",
+    frame_num: int = 0,
+    prefix: str = "um",
+    camera: int = 2,
 ):
     """Read from the Kitti Road dataset found at http://www.cvlibs.net/datasets/kitti/eval_road.php
 
@@ -39,23 +88,103 @@ def read_kitti_road_data(
         data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
         data_type: 'training' or 'testing'
         frame_num: Frame number
+        prefix: Road category filename prefix; one of KITTI_ROAD_PREFIXES
+        camera: Color camera to read; 2 (left, image_2/) or 3 (right, image_3/)
 
     Returns:
-        image_2: Image from camera 2
+        image: Image from the camera; None if it does not exist
         calib: Dictionary containing calibration information for all sensors
     """
     # Load image
     assert data_type in ["training", "testing"], "Unknown data type"
-    image_path = data_road_path / f"{data_type}/image_2/um_{frame_num:06d}.png"
+    assert camera in KITTI_COLOR_CAMERAS, "Unknown camera"
+    image_path = data_road_path / f"{data_type}/image_{camera}/{prefix}_{frame_num:06d}.png"
     image = cv2.imread(str(image_path))
 
     # Load calibration
-    calib_path = data_road_path / f"{data_type}/calib/um_{frame_num:06d}.txt"
-    calib_df = pd.read_csv(calib_path, delimiter=" ", header=None, index_col=0)
-
-    calib = {
-        index: np.array(calib_df.loc[index]).reshape((3, 4))
-        for index in calib_df.index.values.tolist()
-    }
+    calib_path = data_road_path / f"{data_type}/calib/{prefix}_{frame_num:06d}.txt"
+    calib = read_calib_to_dict(calib_path)
 
     return image, calib
+
+
+def get_camera_calib(calib: dict, camera: int = 2) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Get the camera-to-road transform and intrinsics of one camera from a calibration dictionary
+
+    'Tr_cam_to_road:' is given for the rectified reference camera 0. The other cameras are
+    rectified to the same orientation and only offset from it, by K^-1 times the last column of
+    their projection matrix 'Pk:'.
+
+    Args:
+        calib: Dictionary of calibration parameters as from read_calib_to_dict()
+        camera: Camera number; e.g. 2 (left color) or 3 (right color)
+
+    Returns:
+        tr_cam_to_road: (3, 4) transformation matrix from this camera to road; [R | t]
+        camera_matrix: (3, 3) intrinsic camera matrix
+    """
+    projection = calib[f"P{camera}:"]
+    camera_matrix = projection[:3, :3]
+    tr_cam0_to_road = calib["Tr_cam_to_road:"]
+
+    # p_cam = p_cam0 + t_cam, i.e. the camera center is at -t_cam in camera 0 coordinates
+    t_cam = np.linalg.solve(camera_matrix, projection[:, 3])
+    tr_cam_to_road = np.array(tr_cam0_to_road, dtype=np.float64)
+    tr_cam_to_road[:, 3] -= tr_cam0_to_road[:, :3] @ t_cam
+    return tr_cam_to_road, np.array(camera_matrix, dtype=np.float64)
+
+
+def read_kitti_road_gt(
+    data_road_path: pathlib.Path,
+    frame_num: int = 0,
+    prefix: str = "um",
+    gt_type: str = "road",
+) -> typing.Optional[np.ndarray]:
+    """Read a ground truth mask of the KITTI Road training split
+
+    Ground truth images mark road pixels with a non-zero blue channel.
+
+    Args:
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        frame_num: Frame number
+        prefix: Road category filename prefix; one of KITTI_ROAD_PREFIXES
+        gt_type: 'road' (whole road area) or 'lane' (ego-lane; only available for 'um' frames)
+
+    Returns:
+        gt_mask: (n_row, n_col) bool road mask, or None if there is no ground truth for the frame
+    """
+    gt_path = pathlib.Path(data_road_path) / (
+        f"training/gt_image_2/{prefix}_{gt_type}_{frame_num:06d}.png"
+    )
+    if not gt_path.is_file():
+        return None
+    gt_image = cv2.imread(str(gt_path))
+    return gt_image[:, :, 0] > 0
+
+
+def list_kitti_road_frames(
+    data_road_path: pathlib.Path,
+    data_type: str = "training",
+    prefixes: typing.Sequence[str] = KITTI_ROAD_PREFIXES,
+) -> typing.List[typing.Tuple[str, int]]:
+    """List every frame of a KITTI Road dataset split
+
+    Args:
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        data_type: 'training' or 'testing'
+        prefixes: Road category filename prefixes to search for
+
+    Returns:
+        frames: Sorted (prefix, frame_num) pairs, each accepted by read_kitti_road_data()
+    """
+    assert data_type in ["training", "testing"], "Unknown data type"
+    image_dir = pathlib.Path(data_road_path) / data_type / "image_2"
+
+    frames = []
+    for prefix in prefixes:
+        for image_path in image_dir.glob(f"{prefix}_*.png"):
+            frame_str = image_path.stem[len(prefix) + 1 :]
+            if frame_str.isdigit():
+                frames.append((prefix, int(frame_str)))
+
+    return sorted(frames)
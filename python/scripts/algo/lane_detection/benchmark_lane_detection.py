@@ -0,0 +1,475 @@
+"""Script to benchmark lane detection throughput, latency and memory
+
+Runs LaneLineDetector on the bundled KITTI road frames and on synthetic road frames at several
+resolutions, in single-frame, batch and multi-process modes, and the sliding-window polynomial
+engine (PolyfitLaneDetector) frame by frame on the same frames. Results are saved as JSON so runs on
+different commits can be compared. Each case runs in a freshly spawned process, so the peak
+resident memory reported per case is that case's own:
+
+    python benchmark_lane_detection.py --output-path new.json --compare-path old.json
+
+With --compare-path, any latency (end-to-end or per-stage) or throughput metric worse than the
+baseline by more than --threshold is reported and the script exits with a non-zero status.
+"""
+
+# Standard Imports
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import time
+import typing
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.algo import lane_polyfit
+from modules.common import profiling
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[4]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+# Resolution (n_col, n_row) the default config ROI and KITTI calibration are defined for
+KITTI_RESOLUTION = (1242, 375)
+SYNTHETIC_RESOLUTIONS = {
+    "synthetic_kitti": KITTI_RESOLUTION,
+    "synthetic_720p": (1280, 720),
+    "synthetic_1080p": (1920, 1080),
+}
+
+# Cases run per frame set; see run_case()
+CASES = ("single", "single_reuse_buffers", "single_polyfit", "batch", "multiprocess")
+
+# Worker process state for multi-process mode
+_WORKER_DETECTOR = None
+_WORKER_FRAMES = None
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--output-path", type=str, required=True, help="Path to output .json results"
+    )
+    parser.add_argument(
+        "--compare-path",
+        type=str,
+        default=None,
+        help="Path to baseline .json results to check for regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown (e.g. 0.1 = 10%%) flagged as a regression",
+    )
+    parser.add_argument(
+        "--datasets",
+        type=str,
+        nargs="+",
+        default=["kitti"] + list(SYNTHETIC_RESOLUTIONS),
+        choices=["kitti"] + list(SYNTHETIC_RESOLUTIONS),
+        help="Frame sets to benchmark",
+    )
+    parser.add_argument(
+        "--n-frame", type=int, default=100, help="Number of frames processed per case"
+    )
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes for multi-process mode",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+def load_config() -> dict:
+    """Load default LaneLineDetector configuration"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def scale_setup(config: dict, calib: dict, resolution: tuple) -> tuple:
+    """Scale KITTI-resolution ROI and intrinsics to another resolution
+
+    Args:
+        config: LaneLineDetector configuration for KITTI_RESOLUTION
+        calib: KITTI calibration dictionary
+        resolution: Target (n_col, n_row)
+
+    Returns:
+        config: Configuration with scaled ROI polygon
+        tr_cam_to_road: (3, 4) road to camera transformation
+        camera_matrix: (3, 3) scaled intrinsic camera matrix
+    """
+    scale = np.array(resolution) / np.array(KITTI_RESOLUTION)
+    config = dict(config)
+    config["roi_polygon"] = (
+        np.round(np.array(config["roi_polygon"]) * scale).astype(int).tolist()
+    )
+
+    camera_matrix = np.array(calib["P2:"][:3, :3])
+    camera_matrix[0] *= scale[0]
+    camera_matrix[1] *= scale[1]
+    return config, np.array(calib["Tr_cam_to_road:"]), camera_matrix
+
+
+def make_synthetic_frames(config: dict, resolution: tuple, n_frame: int) -> list:
+    """Create noisy road frames with two lane markings inside the ROI
+
+    Args:
+        config: Configuration whose ROI polygon is defined for this resolution
+        resolution: (n_col, n_row)
+        n_frame: Number of frames (distinct noise per frame, up to 8 unique frames)
+
+    Returns:
+        frames: List of (n_row, n_col, 3) BGR images
+    """
+    n_col, n_row = resolution
+    bottom_left, apex, bottom_right = np.array(config["roi_polygon"], dtype=float)
+    rng = np.random.default_rng(0)
+
+    unique_frames = []
+    for _ in range(min(n_frame, 8)):
+        frame = np.full((n_row, n_col, 3), 90, dtype=np.uint8)
+        frame += rng.integers(0, 20, size=frame.shape, dtype=np.uint8)
+        thickness = max(n_row // 100, 2)
+        for fraction in [0.15, 0.85]:
+            start = bottom_left + fraction * (bottom_right - bottom_left)
+            end = start + 0.8 * (apex - start)
+            cv2.line(
+                frame,
+                tuple(np.round(start).astype(int)),
+                tuple(np.round(end).astype(int)),
+                (255, 255, 255),
+                thickness,
+            )
+        unique_frames.append(frame)
+    return [unique_frames[i_frame % len(unique_frames)] for i_frame in range(n_frame)]
+
+
+def make_frame_set(name: str, n_frame: int) -> tuple:
+    """Create the frames and detector setup for a named frame set
+
+    Args:
+        name: 'kitti' or a key of SYNTHETIC_RESOLUTIONS
+        n_frame: Number of frames
+
+    Returns:
+        frames: List of (n_row, n_col, 3) BGR images
+        setup: (config, tr_cam_to_road, camera_matrix)
+    """
+    config = load_config()
+    images = []
+    calib = None
+    for data_type in ["training", "testing"]:
+        for prefix, frame_num in kitti.list_kitti_road_frames(
+            DATA_ROAD_PATH, data_type
+        ):
+            image, calib = kitti.read_kitti_road_data(
+                DATA_ROAD_PATH, data_type, frame_num, prefix
+            )
+            images.append(cv2.resize(image, KITTI_RESOLUTION))
+
+    if name == "kitti":
+        setup = scale_setup(config, calib, KITTI_RESOLUTION)
+        frames = [images[i_frame % len(images)] for i_frame in range(n_frame)]
+    else:
+        resolution = SYNTHETIC_RESOLUTIONS[name]
+        setup = scale_setup(config, calib, resolution)
+        frames = make_synthetic_frames(setup[0], resolution, n_frame)
+    return frames, setup
+
+
+# Detection engines selectable by make_detector()
+ENGINES = {
+    "hough": lane_detection.LaneLineDetector,
+    "polyfit": lane_polyfit.PolyfitLaneDetector,
+}
+
+
+def make_detector(
+    setup: tuple, engine: str = "hough", **kwargs
+) -> typing.Union[lane_detection.LaneLineDetector, lane_polyfit.PolyfitLaneDetector]:
+    """Create a detector of an engine from a (config, tr_cam_to_road, camera_matrix) setup"""
+    config, tr_cam_to_road, camera_matrix = setup
+    return ENGINES[engine](
+        config=config,
+        tr_cam_to_road=tr_cam_to_road,
+        camera_matrix=camera_matrix,
+        **kwargs,
+    )
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and its finished children (MB)
+
+    ru_maxrss is a high-water mark over the whole life of the process, so this only measures one
+    case when the case runs in a process of its own; see run_case_in_child().
+    """
+    usage_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1.0 / 1024.0 if sys.platform != "darwin" else 1.0 / 1024.0**2
+    return max(usage_self, usage_children) * scale
+
+
+def benchmark_single(
+    frames: list, setup: tuple, reuse_buffers: bool, engine: str = "hough"
+) -> dict:
+    """Benchmark an engine's run() frame by frame
+
+    Returns:
+        result: Throughput, end-to-end and per-stage latency percentiles
+    """
+    recorder = profiling.LatencyRecorder()
+    detector = make_detector(setup, engine=engine, reuse_buffers=reuse_buffers)
+    detector.run(frames[0])  # warm-up
+    detector.timing_sink = recorder
+
+    latencies_ns = []
+    start_time = time.perf_counter()
+    for frame in frames:
+        frame_start_ns = time.perf_counter_ns()
+        detector.run(frame)
+        latencies_ns.append(time.perf_counter_ns() - frame_start_ns)
+    elapsed = time.perf_counter() - start_time
+
+    latencies_ms = np.array(latencies_ns) / 1e6
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    result = {
+        "fps": len(frames) / elapsed,
+        "latency_p50_ms": p50,
+        "latency_p95_ms": p95,
+        "latency_p99_ms": p99,
+        "stages": recorder.summary(),
+    }
+    return result
+
+
+def benchmark_batch(frames: list, setup: tuple, batch_size: int = 16) -> dict:
+    """Benchmark LaneLineDetector.run_batch()
+
+    Returns:
+        result: Throughput and per-batch latency
+    """
+    detector = make_detector(setup)
+    detector.run_batch(frames[:1])  # warm-up
+
+    latencies_ns = []
+    start_time = time.perf_counter()
+    for i_start in range(0, len(frames), batch_size):
+        batch_start_ns = time.perf_counter_ns()
+        detector.run_batch(frames[i_start : i_start + batch_size])
+        latencies_ns.append(time.perf_counter_ns() - batch_start_ns)
+    elapsed = time.perf_counter() - start_time
+
+    result = {
+        "fps": len(frames) / elapsed,
+        "batch_size": batch_size,
+        "batch_latency_p50_ms": np.percentile(np.array(latencies_ns) / 1e6, 50),
+    }
+    return result
+
+
+def _init_worker(name: str, n_frame: int):
+    """Build frames and detector once per worker process"""
+    global _WORKER_DETECTOR, _WORKER_FRAMES  # pylint: disable=global-statement
+    _WORKER_FRAMES, setup = make_frame_set(name, n_frame)
+    _WORKER_DETECTOR = make_detector(setup, reuse_buffers=True)
+
+
+def _run_worker_frame(i_frame: int) -> float:
+    """Run detection on one of the worker's frames"""
+    return _WORKER_DETECTOR.run(_WORKER_FRAMES[i_frame])["left_lane_angle"]
+
+
+def benchmark_multiprocess(name: str, n_frame: int, n_workers: int) -> dict:
+    """Benchmark a process pool where each worker owns its detector and frames
+
+    Returns:
+        result: Throughput (excluding pool start-up)
+    """
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(name, n_frame)
+    ) as executor:
+        # Warm up every worker before timing
+        list(executor.map(_run_worker_frame, [0] * n_workers * 2, chunksize=1))
+
+        start_time = time.perf_counter()
+        chunk_size = max(n_frame // (4 * n_workers), 1)
+        list(executor.map(_run_worker_frame, range(n_frame), chunksize=chunk_size))
+        elapsed = time.perf_counter() - start_time
+
+    return {"fps": n_frame / elapsed, "n_workers": n_workers}
+
+
+def run_case(dataset: str, case: str, n_frame: int, n_workers: int) -> dict:
+    """Build a frame set and run one benchmark case on it
+
+    Args:
+        dataset: 'kitti' or a key of SYNTHETIC_RESOLUTIONS
+        case: One of CASES
+        n_frame: Number of frames processed
+        n_workers: Number of worker processes of the 'multiprocess' case
+
+    Returns:
+        result: Metrics of the case plus 'peak_rss_mb' of the calling process
+    """
+    frames, setup = make_frame_set(dataset, n_frame)
+    if case == "single":
+        result = benchmark_single(frames, setup, False)
+    elif case == "single_reuse_buffers":
+        result = benchmark_single(frames, setup, True)
+    elif case == "single_polyfit":
+        result = benchmark_single(frames, setup, True, engine="polyfit")
+    elif case == "batch":
+        result = benchmark_batch(frames, setup)
+    else:
+        result = benchmark_multiprocess(dataset, n_frame, n_workers)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_case_in_child(dataset: str, case: str, n_frame: int, n_workers: int) -> dict:
+    """Run one benchmark case in a freshly spawned process so its peak RSS is its own
+
+    Args:
+        dataset: 'kitti' or a key of SYNTHETIC_RESOLUTIONS
+        case: One of CASES
+        n_frame: Number of frames processed
+        n_workers: Number of worker processes of the 'multiprocess' case
+
+    Returns:
+        result: Output of run_case()
+    """
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(run_case, dataset, case, n_frame, n_workers).result()
+
+
+def get_metadata() -> dict:
+    """Describe the environment the benchmark ran in"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    metadata = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    return metadata
+
+
+def flatten_metrics(metrics: dict, prefix: str = "") -> dict:
+    """Flatten nested metric dicts (e.g. per-stage summaries) into 'a/b/metric' keys"""
+    flat = {}
+    for name, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, prefix=f"{prefix}{name}/"))
+        else:
+            flat[f"{prefix}{name}"] = value
+    return flat
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """Compare results against a baseline
+
+    Args:
+        results: Current 'results' section
+        baseline: Baseline 'results' section
+        threshold: Relative slowdown flagged as a regression
+
+    Returns:
+        regressions: Human readable description of each regression
+    """
+    regressions = []
+    for case, metrics in results.items():
+        if case not in baseline:
+            continue
+        base_metrics = flatten_metrics(baseline[case])
+        for metric, value in flatten_metrics(metrics).items():
+            base_value = base_metrics.get(metric)
+            if not isinstance(value, float) or not isinstance(base_value, float):
+                continue
+            if metric == "fps":
+                change = base_value / value - 1.0  # slowdown when fps drops
+            elif metric.endswith("_ms"):
+                change = value / base_value - 1.0
+            else:
+                continue
+            if change > threshold:
+                regressions.append(
+                    f"{case} {metric}: {base_value:.3f} -> {value:.3f} ({change:+.1%} slower)"
+                )
+    return regressions
+
+
+def main():
+    """Run the benchmark cases, save the results and check them against a baseline"""
+    cli_args = parse_cli_args()
+
+    results = {}
+    for dataset in cli_args.datasets:
+        n_col, n_row = SYNTHETIC_RESOLUTIONS.get(dataset, KITTI_RESOLUTION)
+        print(f"=== {dataset} ({n_col}x{n_row}, {cli_args.n_frame} frames)")
+        for case in CASES:
+            result = run_case_in_child(dataset, case, cli_args.n_frame, cli_args.n_workers)
+            results[f"{dataset}/{case}"] = result
+            print(
+                f"{dataset + '/' + case:<40s} {result['fps']:8.1f} FPS"
+                + (
+                    f"  p50 {result['latency_p50_ms']:7.2f} ms"
+                    if "latency_p50_ms" in result
+                    else ""
+                )
+                + f"  peak RSS {result['peak_rss_mb']:7.1f} MB"
+            )
+
+    output = {"metadata": get_metadata(), "results": results}
+    output_path = pathlib.Path(cli_args.output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(output, indent=2, default=float), encoding="utf-8")
+    print(f"Results written to {output_path}")
+
+    if cli_args.compare_path is not None:
+        baseline = json.loads(pathlib.Path(cli_args.compare_path).read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline["results"], cli_args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {cli_args.threshold:.0%} against {cli_args.compare_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Script to check that the python and C++ lane detection backends agree, and compare their speed
+
+Both backends (see lane_detection.make_lane_detector()) run on the same KITTI Road frames with the
+same config. Each frame is run --n-repeat times per backend after a warm-up run; the median run is
+reported as that frame's latency. The script exits with a non-zero status if any frame's lane
+angles differ by more than --tolerance-deg or only one backend found a lane.
+
+The C++ backend needs the lane_detector_capi shared library; see modules/algo/lane_detection_cpp.py.
+"""
+
+# Standard Imports
+import argparse
+import copy
+import csv
+import json
+import logging
+import pathlib
+import sys
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.algo import lane_detection_cpp
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--data-type",
+        type=str,
+        default="training",
+        choices=["training", "testing"],
+        help="Dataset split to run on",
+    )
+    parser.add_argument(
+        "--prefixes",
+        type=str,
+        nargs="+",
+        default=list(kitti.KITTI_ROAD_PREFIXES),
+        help="Road category filename prefixes to include",
+    )
+    parser.add_argument(
+        "--config-path",
+        type=str,
+        required=True,
+        help="Path to configuration .json file for LaneLineDetector; 'backend' is overridden",
+    )
+    parser.add_argument(
+        "--library-path",
+        type=str,
+        default=None,
+        help=f"C++ shared library; defaults to ${lane_detection_cpp.LIBRARY_ENV_VAR} or the build "
+        "directory",
+    )
+    parser.add_argument(
+        "--tolerance-deg",
+        type=float,
+        default=0.1,
+        help="Largest allowed lane angle difference between backends (degrees)",
+    )
+    parser.add_argument(
+        "--n-repeat",
+        type=int,
+        default=5,
+        help="Number of timed runs per frame and backend",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        default=None,
+        help="Optional path to output .csv file with one row per frame",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+    with open(args.config_path, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    frames = kitti.list_kitti_road_frames(
+        data_road_path=pathlib.Path(args.data_road_path),
+        data_type=args.data_type,
+        prefixes=args.prefixes,
+    )
+    assert frames, f"No frames found in {args.data_road_path}"
+    if not lane_detection_cpp.is_available(args.library_path):
+        logger.error(
+            "C++ backend not found at %s; build target lane_detector_capi first",
+            args.library_path or lane_detection_cpp.get_library_path(),
+        )
+        sys.exit(2)
+
+    detectors = {}
+    for backend in lane_detection.LANE_DETECTION_BACKENDS:
+        backend_config = copy.deepcopy(config)
+        backend_config["backend"] = backend
+        kwargs = {"library_path": args.library_path} if backend == "cpp" else {}
+        detectors[backend] = lane_detection.make_lane_detector(
+            config=backend_config,
+            tr_cam_to_road=np.zeros((3, 4)),  # set per frame below
+            camera_matrix=np.eye(3),
+            **kwargs,
+        )
+
+    rows = []
+    for row in lane_detection_cpp.compare_backends(
+        data_road_path=pathlib.Path(args.data_road_path),
+        frames=frames,
+        detectors=detectors,
+        data_type=args.data_type,
+        tolerance=np.deg2rad(args.tolerance_deg),
+        n_repeat=args.n_repeat,
+    ):
+        rows.append(row)
+        if not row["is_match"]:
+            logger.warning("Backends disagree on %s_%06d: %r", row["prefix"], row["frame_num"], row)
+
+    if args.output_path is not None:
+        with open(pathlib.Path(args.output_path), "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    n_mismatch = sum(not row["is_match"] for row in rows)
+    logger.info(
+        "%d of %d frames match within %.3f degrees (largest difference %.4f degrees)",
+        len(rows) - n_mismatch,
+        len(rows),
+        args.tolerance_deg,
+        max(row["max_angle_diff_deg"] for row in rows),
+    )
+    for backend in detectors:
+        latencies_ms = np.array([row[f"{backend}_latency_ms"] for row in rows])
+        logger.info(
+            "%s: per-frame latency p50 %.3f ms, p95 %.3f ms, mean %.3f ms",
+            backend,
+            np.percentile(latencies_ms, 50),
+            np.percentile(latencies_ms, 95),
+            latencies_ms.mean(),
+        )
+    sys.exit(1 if n_mismatch else 0)
@@ -0,0 +1,102 @@
+"""Script to score lane detection results against the KITTI Road ground truth
+
+Reads a results folder written by run_lane_detection_dataset.py one chunk at a time, scores every
+frame by the IoU of the area between its lane lines with the ground truth mask, and logs aggregate
+metrics. Ground truth masks are decoded once into a memory-mapped cache, so repeated evaluations
+only read the results.
+
+    python run_lane_detection_dataset.py --data-road-path data_road --config-path config.json \\
+        --output-path results/
+    python evaluate_lane_detection.py --results-path results/ --data-road-path data_road
+"""
+
+# Standard Imports
+import argparse
+import json
+import logging
+import pathlib
+import sys
+import time
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_results
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--results-path", type=str, required=True, help="Path to folder of result chunks"
+    )
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--gt-type",
+        type=str,
+        default="road",
+        choices=["road", "lane"],
+        help="Ground truth mask type",
+    )
+    parser.add_argument(
+        "--gt-cache-dir",
+        type=str,
+        default=None,
+        help="Folder of the ground truth mask cache; defaults to data_road/.frame_cache",
+    )
+    parser.add_argument(
+        "--metrics-path",
+        type=str,
+        default=None,
+        help="Optional path to output .npz file with per-frame metrics",
+    )
+    parser.add_argument(
+        "--summary-path",
+        type=str,
+        default=None,
+        help="Optional path to output .json file with aggregate metrics",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+
+    start_time = time.perf_counter()
+    metrics, summary = lane_results.evaluate_results(
+        output_dir=args.results_path,
+        data_road_path=args.data_road_path,
+        gt_type=args.gt_type,
+        cache_dir=args.gt_cache_dir,
+    )
+    elapsed = time.perf_counter() - start_time
+    logger.info("Scored %d frames in %.2f s", metrics.size, elapsed)
+    for name, value in summary.items():
+        logger.info("%s: %s", name, value)
+
+    if args.metrics_path is not None:
+        np.savez(pathlib.Path(args.metrics_path), metrics=metrics)
+    if args.summary_path is not None:
+        with open(args.summary_path, "w", encoding="utf-8") as json_file:
+            json.dump(summary, json_file, indent=4)
@@ -0,0 +1,216 @@
+"""Load generator replaying KITTI Road frames against a running lane detection service
+
+Keeps --concurrency requests in flight over --n-connections connections and reports throughput,
+client round-trip and server-side latency percentiles and the mean micro-batch size:
+
+    python run_lane_detection_service.py --config-path config.json --port 8765
+    python load_test_lane_detection_service.py --data-road-path data_road --port 8765
+"""
+
+# Standard Imports
+import argparse
+import asyncio
+import json
+import logging
+import pathlib
+import sys
+import time
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection_service
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--data-type",
+        type=str,
+        default="training",
+        choices=["training", "testing"],
+        help="Dataset split to replay",
+    )
+    parser.add_argument(
+        "--prefixes",
+        type=str,
+        nargs="+",
+        default=list(kitti.KITTI_ROAD_PREFIXES),
+        help="Road category filename prefixes to include",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Service host")
+    parser.add_argument("--port", type=int, default=8765, help="Service port")
+    parser.add_argument(
+        "--encoding",
+        type=str,
+        default="png",
+        choices=["png", "raw"],
+        help="Send the original PNG files or raw decoded pixels",
+    )
+    parser.add_argument(
+        "--n-requests", type=int, default=500, help="Number of timed requests to send"
+    )
+    parser.add_argument(
+        "--n-warmup", type=int, default=20, help="Number of untimed requests sent first"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Number of requests kept in flight"
+    )
+    parser.add_argument(
+        "--n-connections", type=int, default=4, help="Number of connections to the service"
+    )
+    parser.add_argument(
+        "--output-path", type=str, default=None, help="Optional path to output .json results"
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+def load_requests(
+    data_road_path: pathlib.Path, data_type: str, prefixes: list, encoding: str
+) -> list:
+    """Load the frames to replay
+
+    Args:
+        data_road_path: Path to data_road/ folder (top-level of KITTI ROAD dataset)
+        data_type: 'training' or 'testing'
+        prefixes: Road category filename prefixes to include
+        encoding: 'png' or 'raw'
+
+    Returns:
+        requests: Keyword arguments of LaneDetectionClient.detect() per frame
+    """
+    requests = []
+    frames = kitti.list_kitti_road_frames(
+        data_road_path=data_road_path, data_type=data_type, prefixes=prefixes
+    )
+    for prefix, frame_num in frames:
+        image, calib = kitti.read_kitti_road_data(
+            data_road_path=data_road_path, data_type=data_type, frame_num=frame_num, prefix=prefix
+        )
+        request = {
+            "tr_cam_to_road": calib["Tr_cam_to_road:"],
+            "camera_matrix": calib["P2:"][:3, :3],
+            "encoding": encoding,
+        }
+        if encoding == "png":
+            image_path = data_road_path / data_type / "image_2" / f"{prefix}_{frame_num:06d}.png"
+            request["payload"] = image_path.read_bytes()
+        else:
+            request["payload"] = np.ascontiguousarray(image).tobytes()
+            request["shape"] = image.shape
+        requests.append(request)
+    return requests
+
+
+async def run_load(requests: list, args: argparse.Namespace) -> dict:
+    """Replay frames against the service
+
+    Args:
+        requests: Keyword arguments of LaneDetectionClient.detect() per frame
+        args: Command line arguments
+
+    Returns:
+        result: Throughput and latency statistics
+    """
+    clients = []
+    for _ in range(args.n_connections):
+        client = lane_detection_service.LaneDetectionClient()
+        await client.connect(host=args.host, port=args.port)
+        clients.append(client)
+
+    responses = []
+    n_sent = 0
+
+    async def worker(i_worker: int, n_total: int, is_timed: bool):
+        nonlocal n_sent
+        client = clients[i_worker % len(clients)]
+        while n_sent < n_total:
+            request = requests[n_sent % len(requests)]
+            n_sent += 1
+            response = await client.detect(**request)
+            if is_timed:
+                responses.append(response)
+
+    await asyncio.gather(*[worker(i, args.n_warmup, False) for i in range(args.concurrency)])
+    n_sent = 0
+    start_ns = time.perf_counter_ns()
+    await asyncio.gather(*[worker(i, args.n_requests, True) for i in range(args.concurrency)])
+    elapsed_s = (time.perf_counter_ns() - start_ns) / 1e9
+
+    for client in clients:
+        await client.close()
+
+    ok = [response for response in responses if "error" not in response]
+    round_trip_ms = np.array([response["round_trip_ms"] for response in ok])
+    server_ms = np.array([response["latency_ms"] for response in ok])
+    result = {
+        "n_request": len(responses),
+        "n_error": len(responses) - len(ok),
+        "concurrency": args.concurrency,
+        "n_connections": args.n_connections,
+        "encoding": args.encoding,
+        "throughput_fps": len(ok) / elapsed_s,
+        "mean_batch_size": float(np.mean([response["batch_size"] for response in ok])),
+    }
+    for name, latencies_ms in (("round_trip", round_trip_ms), ("server", server_ms)):
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        result[f"{name}_p50_ms"] = p50
+        result[f"{name}_p95_ms"] = p95
+        result[f"{name}_p99_ms"] = p99
+    return result
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+    requests = load_requests(
+        data_road_path=pathlib.Path(args.data_road_path),
+        data_type=args.data_type,
+        prefixes=args.prefixes,
+        encoding=args.encoding,
+    )
+    assert requests, f"No frames found in {args.data_road_path}"
+
+    result = asyncio.run(run_load(requests=requests, args=args))
+    logger.info(
+        "%d requests (%d errors): %.1f FPS, mean batch size %.2f",
+        result["n_request"],
+        result["n_error"],
+        result["throughput_fps"],
+        result["mean_batch_size"],
+    )
+    for name in ("round_trip", "server"):
+        logger.info(
+            "%s latency p50 %.2f ms, p95 %.2f ms, p99 %.2f ms",
+            name,
+            result[f"{name}_p50_ms"],
+            result[f"{name}_p95_ms"],
+            result[f"{name}_p99_ms"],
+        )
+
+    if args.output_path is not None:
+        with open(args.output_path, "w", encoding="utf-8") as json_file:
+            json.dump(result, json_file, indent=4)
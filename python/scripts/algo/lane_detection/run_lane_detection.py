@@ -13,12 +13,12 @@ import logging
 import sys
 
 # Third Party Imports
-import matplotlib.pyplot as plt
 import cv2
 import numpy as np
 
 # Local Imports
 from modules.algo import lane_detection
+from modules.common import profiling
 from modules.data import kitti
 
 def parse_cli_args() -> argparse.Namespace:
@@ -46,6 +46,31 @@ def parse_cli_args() -> argparse.Namespace:
         default=False,
         help="Whether to show plots and halt execution",
     )
+    parser.add_argument(
+        "--timings",
+        action="store_true",  # default false
+        default=False,
+        help="Whether to log per-stage timings and latency percentiles",
+    )
+    parser.add_argument(
+        "--n-repeat",
+        type=int,
+        default=1,
+        help="Number of times to run detection on the image (for timing/profiling)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        choices=["cprofile", "pyinstrument"],
+        help="Profile detection with cProfile or pyinstrument",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        default=None,
+        help="Save profile here (.prof for cprofile, .html for pyinstrument) instead of printing",
+    )
     cli_args = parser.parse_args()
     return cli_args
 
@@ -71,26 +96,36 @@ if __name__ == "__main__":
 
     config_path = pathlib.Path(args.config_path)
     config = None
-    with open(config_path) as json_file:
+    with open(config_path, encoding="utf-8") as json_file:
         config = json.load(json_file)
 
     camera_matrix = calib["P2:"][:3, :3]
-    LaneDetector = lane_detection.LaneLineDetector(
+    latency_recorder = profiling.LatencyRecorder() if args.timings else None
+    LaneDetector = lane_detection.make_lane_detector(
         config=config,
         tr_cam_to_road=calib["Tr_cam_to_road:"],
         camera_matrix=camera_matrix,
+        timing_sink=latency_recorder,
     )
 
-    out = LaneDetector.run(
-        image=image,
-        fig_num=1,
-        logger=logger,
-    )
+    with profiling.profile(mode=args.profile, output_path=args.profile_output):
+        for i_repeat in range(args.n_repeat):
+            is_last = i_repeat == args.n_repeat - 1
+            out = LaneDetector.run(
+                image=image,
+                fig_num=1 if (args.show_plots and is_last) else None,
+                logger=logger if is_last else None,
+            )
     # for key, value in out.items():
     #     print(f"{key}: {value}")
 
     logger.info("Left lane angle: %f degrees", np.rad2deg(out['left_lane_angle']))
     logger.info("Right lane angle: %f degrees", np.rad2deg(out['right_lane_angle']))
 
+    if latency_recorder is not None:
+        logger.info("Stage latencies (ms):\n%s", latency_recorder.format_summary())
+
     if args.show_plots:
+        import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
         plt.show()
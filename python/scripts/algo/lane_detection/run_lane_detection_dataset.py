@@ -0,0 +1,156 @@
+"""Script to run lane detection algorithm on every frame of a KITTI Road dataset split
+
+Frames from all road categories (um/umm/uu) are processed in parallel across a process pool and
+results are streamed to a folder of .npz or .parquet chunk files (see
+modules/algo/lane_results.py), which evaluate_lane_detection.py scores against ground truth and
+lane_results.read_results() loads as one record array.
+
+To use this:
+1) Go to http://www.cvlibs.net/datasets/kitti/eval_road.php
+2) Select the "Download base kit with: left color images, calibration and training labels (0.5 GB)"
+3) Unzip contents into data_road/ folder
+"""
+# Standard Imports
+import argparse
+import json
+import logging
+import pathlib
+import sys
+import time
+
+# Local Imports
+from modules.algo import lane_detection_runner
+from modules.algo import lane_results
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--data-type",
+        type=str,
+        default="training",
+        choices=["training", "testing"],
+        help="Dataset split to run on",
+    )
+    parser.add_argument(
+        "--prefixes",
+        type=str,
+        nargs="+",
+        default=list(kitti.KITTI_ROAD_PREFIXES),
+        help="Road category filename prefixes to include",
+    )
+    parser.add_argument(
+        "--config-path",
+        type=str,
+        required=True,
+        help="Path to configuration .json file for LaneLineDetector",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        required=True,
+        help="Path to output folder of result chunk files; appended to if it exists",
+    )
+    parser.add_argument(
+        "--chunk-format",
+        type=str,
+        default="npz",
+        choices=list(lane_results.CHUNK_FORMATS),
+        help="File format of the result chunk files",
+    )
+    parser.add_argument(
+        "--rows-per-chunk",
+        type=int,
+        default=1024,
+        help="Number of rows per result chunk file",
+    )
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes; defaults to number of CPUs, 0 runs serially",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=4,
+        help="Number of frames sent to a worker process at a time",
+    )
+    parser.add_argument(
+        "--frame-cache",
+        action="store_true",
+        help="Decode frames once into a memory-mapped cache reused by later runs",
+    )
+    parser.add_argument(
+        "--frame-cache-dir",
+        type=str,
+        default=None,
+        help="Folder of the frame cache; defaults to data_road/.frame_cache",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+
+    config_path = pathlib.Path(args.config_path)
+    config = None
+    with open(config_path, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    output_path = pathlib.Path(args.output_path)
+    if output_path.suffix != "":
+        raise ValueError(f"Output path {output_path} must be a folder of result chunks")
+    writer = lane_results.ResultChunkWriter(
+        output_path, chunk_size=args.rows_per_chunk, file_format=args.chunk_format
+    )
+
+    n_frame = 0
+    start_time = time.perf_counter()
+    try:
+        for result in lane_detection_runner.run_on_dataset(
+            data_road_path=args.data_road_path,
+            config=config,
+            data_type=args.data_type,
+            prefixes=args.prefixes,
+            n_workers=args.n_workers,
+            chunk_size=args.chunk_size,
+            use_frame_cache=args.frame_cache,
+            frame_cache_dir=args.frame_cache_dir,
+        ):
+            writer.write(result)
+            n_frame += 1
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    logger.info(
+        "Processed %d frames in %.2f s (%.1f frames/s); results written to %s",
+        n_frame,
+        elapsed,
+        n_frame / max(elapsed, 1e-9),
+        output_path,
+    )
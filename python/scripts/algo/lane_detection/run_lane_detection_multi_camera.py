@@ -0,0 +1,111 @@
+"""Script to run lane detection on both KITTI color cameras of a frame and fuse the results
+
+To use this:
+1) Go to http://www.cvlibs.net/datasets/kitti/eval_road.php
+2) Download the base kit and the "right color images" (image_3) of the road dataset
+3) Unzip contents into data_road/ folder
+
+Cameras whose image is missing are reported and treated as not having found any lane.
+"""
+# Standard Imports
+import argparse
+import json
+import logging
+import pathlib
+import sys
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import multi_camera_lane_detection
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--data-type",
+        type=str,
+        default="training",
+        choices=["training", "testing"],
+        help="Dataset split to read from",
+    )
+    parser.add_argument(
+        "--prefix",
+        type=str,
+        default="um",
+        choices=list(kitti.KITTI_ROAD_PREFIXES),
+        help="Road category filename prefix",
+    )
+    parser.add_argument("--frame-num", type=int, default=0, help="Frame number")
+    parser.add_argument(
+        "--cameras",
+        type=int,
+        nargs="+",
+        default=list(kitti.KITTI_COLOR_CAMERAS),
+        choices=list(kitti.KITTI_COLOR_CAMERAS),
+        help="Cameras to run on",
+    )
+    parser.add_argument(
+        "--config-path",
+        type=str,
+        required=True,
+        help="Path to configuration .json file for LaneLineDetector",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+    with open(pathlib.Path(args.config_path), encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    images = {}
+    calib = None
+    for camera in args.cameras:
+        images[camera], calib = kitti.read_kitti_road_data(
+            data_road_path=pathlib.Path(args.data_road_path),
+            data_type=args.data_type,
+            frame_num=args.frame_num,
+            prefix=args.prefix,
+            camera=camera,
+        )
+        if images[camera] is None:
+            logger.warning("No image for camera %d; treating it as blocked", camera)
+
+    with multi_camera_lane_detection.MultiCameraLaneDetector(
+        config=config, calib=calib, cameras=args.cameras
+    ) as detector:
+        out = detector.run(images, logger=logger)
+
+    for side in multi_camera_lane_detection.LANE_SIDES:
+        logger.info(
+            "%s lane: %.2f degrees, lateral offset %.2f m, confidence %.2f",
+            side.capitalize(),
+            np.rad2deg(out[f"{side}_lane_angle"]),
+            out[f"{side}_lateral_offset"],
+            out[f"{side}_confidence"],
+        )
@@ -0,0 +1,95 @@
+"""Script to serve lane detection over a local TCP socket
+
+Keeps LaneLineDetectors warm per calibration and groups concurrent requests into micro-batches,
+see modules/algo/lane_detection_service.py for the message format. Frames can be replayed against
+the service with load_test_lane_detection_service.py:
+
+    python run_lane_detection_service.py --config-path config.json --port 8765
+"""
+
+# Standard Imports
+import argparse
+import asyncio
+import json
+import logging
+import pathlib
+import sys
+
+# Local Imports
+from modules.algo import lane_detection_service
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--config-path",
+        type=str,
+        required=True,
+        help="Path to configuration .json file for LaneLineDetector",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument(
+        "--max-batch-size", type=int, default=8, help="Maximum number of requests per batch"
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=2.0,
+        help="Maximum time a batch waits for more requests (ms)",
+    )
+    parser.add_argument(
+        "--n-threads",
+        type=int,
+        default=None,
+        help="Number of detection threads; defaults to ThreadPoolExecutor's default",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+async def serve(config: dict, args: argparse.Namespace):
+    """Run the service until interrupted
+
+    Args:
+        config: LaneLineDetector configuration parameters
+        args: Command line arguments
+    """
+    service = lane_detection_service.LaneDetectionService(
+        config=config,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        n_threads=args.n_threads,
+    )
+    host, port = await service.start(host=args.host, port=args.port)
+    logging.getLogger("MyLogger").info("Serving lane detection on %s:%d", host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+    with open(pathlib.Path(args.config_path), encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    try:
+        asyncio.run(serve(config=config, args=args))
+    except KeyboardInterrupt:
+        logger.info("Stopped")
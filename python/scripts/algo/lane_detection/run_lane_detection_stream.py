@@ -0,0 +1,113 @@
+"""Script to run lane detection algorithm on a recorded drive (video file or image sequence)
+
+Frames are decoded on a background thread so decoding overlaps with detection. Example for a
+KITTI image sequence:
+
+    python run_lane_detection_stream.py --source "data_road/training/image_2/um_*.png" \\
+        --calib-path data_road/training/calib/um_000000.txt --config-path config.json
+"""
+# Standard Imports
+import argparse
+import json
+import logging
+import pathlib
+import sys
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--source",
+        type=str,
+        required=True,
+        help="Video file path, quoted image sequence glob pattern or integer camera index",
+    )
+    parser.add_argument(
+        "--calib-path", type=str, required=True, help="Path to calibration .txt file"
+    )
+    parser.add_argument(
+        "--config-path",
+        type=str,
+        required=True,
+        help="Path to configuration .json file for LaneLineDetector",
+    )
+    parser.add_argument(
+        "--max-queue-size",
+        type=int,
+        default=8,
+        help="Maximum number of decoded frames waiting to be processed",
+    )
+    parser.add_argument(
+        "--drop-oldest",
+        action="store_true",  # default false
+        default=False,
+        help="Drop oldest queued frames when detection falls behind (real-time use)",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+    source = int(args.source) if args.source.isdigit() else args.source
+
+    # Load calibration
+    calib_path = pathlib.Path(args.calib_path)
+    assert calib_path.is_file(), f"Calibration file {calib_path} does not exist"
+    calib = kitti.read_calib_to_dict(path=calib_path)
+
+    config_path = pathlib.Path(args.config_path)
+    config = None
+    with open(config_path, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    detector = lane_detection.LaneLineDetector(
+        config=config,
+        tr_cam_to_road=calib["Tr_cam_to_road:"],
+        camera_matrix=calib["P2:"][:3, :3],
+    )
+
+    out = None
+    for out in detector.run_stream(
+        source=source,
+        max_queue_size=args.max_queue_size,
+        drop_oldest=args.drop_oldest,
+    ):
+        logger.info(
+            "Frame %d: left %.2f deg, right %.2f deg (%.1f FPS, queue depth %d)",
+            out["frame_index"],
+            np.rad2deg(out["left_lane_angle"]),
+            np.rad2deg(out["right_lane_angle"]),
+            out["fps"],
+            out["queue_depth"],
+        )
+
+    if out is not None:
+        logger.info(
+            "Done; %d frames read, %d dropped, %.1f FPS",
+            out["frame_index"] + 1,
+            out["n_dropped"],
+            out["fps"],
+        )
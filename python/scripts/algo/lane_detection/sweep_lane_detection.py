@@ -0,0 +1,173 @@
+"""Script to grid search LaneLineDetector parameters on a KITTI Road dataset split
+
+Every combination of the values in a parameter grid .json file (config key -> list of values)
+is run on every frame and scored by the IoU of the area between the detected lane lines with the
+KITTI ground truth road masks (training split only). Blur and Canny results are shared between
+all combinations which only differ in later stages, see modules/algo/parameter_sweep.py.
+
+To use this:
+1) Go to http://www.cvlibs.net/datasets/kitti/eval_road.php
+2) Select the "Download base kit with: left color images, calibration and training labels (0.5 GB)"
+3) Unzip contents into data_road/ folder
+"""
+
+# Standard Imports
+import argparse
+import csv
+import json
+import logging
+import math
+import pathlib
+import sys
+import time
+
+# Local Imports
+from modules.algo import parameter_sweep
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--data-type",
+        type=str,
+        default="training",
+        choices=["training", "testing"],
+        help="Dataset split to run on; only 'training' has ground truth",
+    )
+    parser.add_argument(
+        "--prefixes",
+        type=str,
+        nargs="+",
+        default=list(kitti.KITTI_ROAD_PREFIXES),
+        help="Road category filename prefixes to include",
+    )
+    parser.add_argument(
+        "--config-path",
+        type=str,
+        required=True,
+        help="Path to base configuration .json file for LaneLineDetector",
+    )
+    parser.add_argument(
+        "--grid-path",
+        type=str,
+        required=True,
+        help="Path to .json file mapping config keys to lists of values to try",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        required=True,
+        help="Path to output .csv file with one row per configuration, best first",
+    )
+    parser.add_argument(
+        "--frame-results-path",
+        type=str,
+        default=None,
+        help="Optional path to output .csv file with one row per configuration and frame",
+    )
+    parser.add_argument(
+        "--gt-type",
+        type=str,
+        default="road",
+        choices=["road", "lane"],
+        help="Ground truth mask type",
+    )
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes; defaults to number of CPUs, 0 runs serially",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=32,
+        help="Maximum number of intermediate stage outputs cached per worker",
+    )
+    parser.add_argument(
+        "--no-frame-cache",
+        action="store_true",
+        help="Decode PNGs on every pass instead of using the memory-mapped frame cache",
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+def write_csv(path: pathlib.Path, rows: list):
+    """Write rows to a .csv file; list values (e.g. kernel shapes) are written as JSON
+
+    Args:
+        path: Output .csv path
+        rows: Rows sharing the same keys
+    """
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    key: json.dumps(value) if isinstance(value, (list, tuple)) else value
+                    for key, value in row.items()
+                }
+            )
+
+
+if __name__ == "__main__":
+    # Setup a logger
+    logger = logging.getLogger("MyLogger")
+    logger.setLevel(logging.INFO)  # logging.DEBUG
+    handler = logging.StreamHandler(sys.stdout)
+    formatter = logging.Formatter(
+        "%(name)s: [%(asctime)s] (%(levelname)s) [thread %(thread)d] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    args = parse_cli_args()
+    with open(args.config_path, encoding="utf-8") as json_file:
+        base_config = json.load(json_file)
+    with open(args.grid_path, encoding="utf-8") as json_file:
+        param_grid = json.load(json_file)
+
+    start_time = time.perf_counter()
+    summary, frame_results = parameter_sweep.run_sweep(
+        data_road_path=args.data_road_path,
+        base_config=base_config,
+        param_grid=param_grid,
+        data_type=args.data_type,
+        prefixes=args.prefixes,
+        gt_type=args.gt_type,
+        n_workers=args.n_workers,
+        cache_size=args.cache_size,
+        use_frame_cache=not args.no_frame_cache,
+    )
+    elapsed = time.perf_counter() - start_time
+
+    summary.sort(
+        key=lambda row: -1.0 if math.isnan(row["mean_iou"]) else row["mean_iou"], reverse=True
+    )
+    write_csv(pathlib.Path(args.output_path), summary)
+    if args.frame_results_path is not None:
+        write_csv(pathlib.Path(args.frame_results_path), frame_results)
+
+    logger.info(
+        "Evaluated %d configurations x %d frames in %.2f s; results written to %s",
+        len(summary),
+        summary[0]["n_frame"] if summary else 0,
+        elapsed,
+        args.output_path,
+    )
+    if summary:
+        logger.info("Best configuration: %r", summary[0])
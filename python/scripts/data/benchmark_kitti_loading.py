@@ -0,0 +1,152 @@
+"""Script to benchmark per-frame loading time of KITTI Road data
+
+Compares the previous pandas-based calibration parser against the pandas-free parser in
+modules/data/kitti.py, both uncached (first read of a file) and cached (frames of a sequence
+sharing calibration), along with the full per-frame load (image + calibration) from PNG and from
+the memory-mapped frame cache in modules/data/frame_cache.py.
+"""
+# Standard Imports
+import argparse
+import pathlib
+import tempfile
+import time
+import timeit
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.data import frame_cache
+from modules.data import kitti
+
+
+def parse_cli_args() -> argparse.Namespace:
+    """Parse command line arguments
+
+    Returns:
+        cli_args: Command line arguments accessible via cli_args.name
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-road-path",
+        type=str,
+        required=True,
+        help="Path to data_road/ folder (top-level of KITTI ROAD dataset)",
+    )
+    parser.add_argument(
+        "--data-type",
+        type=str,
+        default="training",
+        choices=["training", "testing"],
+        help="Dataset split to load",
+    )
+    parser.add_argument(
+        "--n-repeat", type=int, default=200, help="Number of timed repetitions"
+    )
+    cli_args = parser.parse_args()
+    return cli_args
+
+
+def read_calib_to_dict_pandas(path: pathlib.Path) -> dict:
+    """Previous pandas-based calibration parser, kept here as the benchmark baseline
+
+    Args:
+        path: Path to calibration .txt file
+
+    Returns:
+        calib: Dictionary of calibration parameters
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    calib_df = pd.read_csv(path, delimiter=" ", header=None, index_col=0)
+    calib = {
+        index: np.array(calib_df.loc[index]).reshape((3, 4))
+        for index in calib_df.index.values.tolist()
+    }
+    return calib
+
+
+def read_calib_to_dict_uncached(path: pathlib.Path) -> dict:
+    """Pandas-free parser with its cache cleared before every read
+
+    Args:
+        path: Path to calibration .txt file
+
+    Returns:
+        calib: Dictionary of calibration parameters
+    """
+    kitti._parse_calib_file.cache_clear()  # pylint: disable=protected-access
+    return kitti.read_calib_to_dict(path)
+
+
+def time_per_call(func, n_repeat: int) -> float:
+    """Time a function call
+
+    Args:
+        func: Function taking no arguments
+        n_repeat: Number of timed repetitions
+
+    Returns:
+        time_per_call: Best-of-5 mean time per call (s)
+    """
+    times = timeit.repeat(func, number=n_repeat, repeat=5)
+    return min(times) / n_repeat
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    data_road_path = pathlib.Path(args.data_road_path)
+    prefix, frame_num = kitti.list_kitti_road_frames(data_road_path, args.data_type)[0]
+    calib_path = data_road_path / f"{args.data_type}/calib/{prefix}_{frame_num:06d}.txt"
+
+    start_time = time.perf_counter()
+    import pandas  # pylint: disable=import-outside-toplevel,unused-import,wrong-import-position
+
+    pandas_import_time = time.perf_counter() - start_time
+
+    calib_pandas = read_calib_to_dict_pandas(calib_path)
+    calib_new = kitti.read_calib_to_dict(calib_path)
+    for name, value in calib_new.items():
+        if value.size == 12:
+            np.testing.assert_array_equal(value, calib_pandas[name])
+
+    cache_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    start_time = time.perf_counter()
+    cache = frame_cache.KittiFrameCache(
+        data_road_path, args.data_type, prefixes=(prefix,), cache_dir=cache_dir.name
+    )
+    cache_build_time = time.perf_counter() - start_time
+    np.testing.assert_array_equal(
+        cache.read(prefix, frame_num)[0],
+        kitti.read_kitti_road_data(data_road_path, args.data_type, frame_num, prefix)[0],
+    )
+
+    timings = {
+        "calib (pandas)": time_per_call(
+            lambda: read_calib_to_dict_pandas(calib_path), args.n_repeat
+        ),
+        "calib (no pandas, uncached)": time_per_call(
+            lambda: read_calib_to_dict_uncached(calib_path), args.n_repeat
+        ),
+        "calib (no pandas, cached)": time_per_call(
+            lambda: kitti.read_calib_to_dict(calib_path), args.n_repeat
+        ),
+        "frame (image + cached calib)": time_per_call(
+            lambda: kitti.read_kitti_road_data(
+                data_road_path, args.data_type, frame_num, prefix
+            ),
+            max(args.n_repeat // 20, 1),
+        ),
+        "frame (memmap frame cache)": time_per_call(
+            lambda: cache.read(prefix, frame_num), args.n_repeat
+        ),
+        "frame (memmap cache + copy)": time_per_call(
+            lambda: cache.read(prefix, frame_num)[0].copy(), args.n_repeat
+        ),
+    }
+    cache_dir.cleanup()
+
+    print(f"One-time pandas import: {pandas_import_time * 1e3:10.3f} ms")
+    print(f"One-time frame cache build ({len(cache)} frames): {cache_build_time * 1e3:10.3f} ms")
+    for name, seconds in timings.items():
+        print(f"{name:<30s}: {seconds * 1e6:10.1f} us/call")
@@ -0,0 +1,73 @@
+"""Unit tests for bev_remap.py"""
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import bev_remap
+from unittests.algo.lane_detection_test import make_detector
+
+
+def test_bev_remap_geometry():
+    """Road plane points land on the BEV pixels matching their metric coordinates"""
+    detector, image = make_detector()
+    remap = detector.get_bev_remap(image.shape)
+    assert remap.bev_shape == (800, 400)
+    assert remap.map_xy.dtype == np.int16
+
+    # Project road plane points (x, 0, z) into the camera with the full camera model
+    points_road = np.array([[-1.5, 8.0], [1.5, 8.0], [0.0, 20.0], [-3.0, 40.0]])
+    p_road = np.stack((points_road[:, 0], np.zeros(len(points_road)), points_road[:, 1]), axis=-1)
+    cam_to_road = detector.tr_cam_to_road[:3, :3]
+    p_cam = (p_road - detector.tr_cam_to_road[:3, 3]) @ cam_to_road  # R^T * (p - t)
+    pixels = p_cam @ detector.camera_matrix.T
+    pixels = pixels[:, :2] / pixels[:, 2:]
+
+    points_bev = remap.image_to_bev_points(pixels)
+    np.testing.assert_allclose(remap.bev_to_road_points(points_bev), points_road, atol=1e-9)
+    np.testing.assert_allclose(points_bev[0], [170.0, 760.0], atol=1e-9)
+
+
+def test_bev_warp():
+    """Remap tables reproduce cv2.warpPerspective exactly and are only rebuilt on change"""
+    detector, image = make_detector()
+    remap = detector.get_bev_remap(image.shape)
+    image_bev = remap.warp(image)
+    expected = cv2.warpPerspective(
+        image,
+        remap.bev_to_image,
+        remap.bev_shape[::-1],
+        flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+    )
+    np.testing.assert_array_equal(image_bev, expected)
+
+    image_strip = detector.warp_to_bev(image)  # config warps ROI rows only
+    np.testing.assert_array_equal(image_strip, image_bev[remap.roi_rows])
+    dst = np.empty_like(image_strip)
+    assert detector.warp_to_bev(image, dst=dst) is dst
+    assert detector.get_bev_remap(image.shape) is remap
+
+    detector.config["bev"] = dict(detector.config["bev"], meters_per_pixel=0.1)
+    remap_coarse = detector.get_bev_remap(image.shape)
+    assert remap_coarse is not remap
+    assert remap_coarse.bev_shape == (400, 200)
+
+
+def test_roi_rows():
+    """Only BEV rows seeing the ROI are kept in the ROI strip"""
+    detector, image = make_detector()
+    n_row, n_col, _ = image.shape
+    roi_polygon = [[0, n_row - 1], [0, n_row - 60], [n_col - 1, n_row - 60], [n_col - 1, n_row - 1]]
+    remap = bev_remap.BevRemap(
+        image_shape=image.shape,
+        tr_cam_to_road=detector.tr_cam_to_road,
+        camera_matrix=detector.camera_matrix,
+        roi_polygon=roi_polygon,
+    )
+    assert 0 < remap.roi_rows.start < remap.roi_rows.stop <= remap.bev_shape[0]
+
+    # Rows above the strip only see the image above the ROI
+    src_x, src_y = np.moveaxis(remap.map_xy[: remap.roi_rows.start], -1, 0)
+    is_inside = (src_x >= 0) & (src_x < n_col)
+    assert (src_y[is_inside] < n_row - 60).all()
@@ -0,0 +1,42 @@
+"""Unit tests for canny_edges.py"""
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import canny_edges
+
+
+def test_compute_canny_thresholds():
+    """Median thresholds spread around the median; Otsu thresholds split a bimodal sample"""
+    samples = np.array([10, 20, 100, 200, 210], dtype=np.uint8)
+    low, high = canny_edges.compute_canny_thresholds(samples, mode="median", sigma=0.5)
+    assert (low, high) == (50.0, 150.0)
+
+    low, high = canny_edges.compute_canny_thresholds(samples, mode="otsu", low_high_ratio=0.5)
+    assert 20 <= high < 200
+    assert low == 0.5 * high
+
+    empty = np.empty(0, dtype=np.uint8)
+    for mode in ["median", "otsu"]:
+        assert canny_edges.compute_canny_thresholds(empty, mode=mode) == (
+            canny_edges.CANNY_MIN_THRESHOLD,
+            canny_edges.CANNY_MIN_THRESHOLD,
+        )
+
+
+def test_compute_roi_stats():
+    """Crops sample the same pixels as the full mask"""
+    roi_mask = np.zeros((40, 60), dtype=np.uint8)
+    roi_mask[10:30, 5:50] = 255
+    (rows, cols), roi_area = canny_edges.compute_roi_stats(roi_mask, sample_step=4)
+    assert roi_area == 20 * 45
+    assert (rows % 4 == 0).all() and (cols % 4 == 0).all()
+    assert (roi_mask[rows, cols] == 255).all()
+
+    (crop_rows, crop_cols), crop_area = canny_edges.compute_roi_stats(
+        roi_mask[7:, 3:], sample_step=4, origin=(7, 3)
+    )
+    assert crop_area == roi_area
+    np.testing.assert_array_equal(crop_rows + 7, rows)
+    np.testing.assert_array_equal(crop_cols + 3, cols)
@@ -0,0 +1,54 @@
+"""Import-time budget tests for modules used by headless workers"""
+# Standard Imports
+import os
+import pathlib
+import subprocess
+import sys
+
+PYTHON_DIR = pathlib.Path(__file__).resolve().parents[2]
+
+# Cumulative import time budget (ms); override with LANE_DETECTION_IMPORT_BUDGET_MS
+IMPORT_BUDGET_MS = float(os.environ.get("LANE_DETECTION_IMPORT_BUDGET_MS", 600.0))
+
+# Modules which must never be pulled in by importing the detector
+HEAVY_MODULES = ("matplotlib", "pandas", "pyarrow")
+
+
+def measure_import(module_name: str) -> dict:
+    """Import a module in a fresh interpreter with `python -X importtime`
+
+    Args:
+        module_name: Dotted module name to import
+
+    Returns:
+        cumulative_us: Cumulative import time (us) of each imported module keyed by name
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=PYTHON_DIR,
+        env={**os.environ, "PYTHONPATH": str(PYTHON_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative_us = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        cumulative_us[name.strip()] = int(cumulative)
+    return cumulative_us
+
+
+def test_lane_detection_import_time():
+    """Importing the detector stays under budget and does not import plotting/dataframe libs"""
+    for module_name in ["modules.algo.lane_detection", "modules.data.kitti"]:
+        cumulative_us = measure_import(module_name)
+        heavy = [name for name in cumulative_us if name.split(".")[0] in HEAVY_MODULES]
+        assert not heavy, f"{module_name} imports {heavy}"
+
+        import_time_ms = cumulative_us[module_name] / 1e3
+        assert (
+            import_time_ms < IMPORT_BUDGET_MS
+        ), f"Importing {module_name} took {import_time_ms:.0f} ms"
@@ -0,0 +1,114 @@
+"""Unit tests for lane_detection_cpp.py"""
+
+# Standard Imports
+import copy
+import json
+import math
+import pathlib
+
+# Third Party Imports
+import numpy as np
+import pytest
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.algo import lane_detection_cpp
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def load_config(**overrides) -> dict:
+    """Load the default config with some keys replaced"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+    config.update(overrides)
+    return config
+
+
+def test_make_c_config():
+    """Config values are passed through; options the C++ detector lacks are rejected"""
+    config = load_config()
+    c_config = lane_detection_cpp.make_c_config(config)
+    assert (c_config.blurKernelWidth, c_config.blurKernelHeight) == tuple(
+        config["blur_kernel_shape"]
+    )
+    assert c_config.cannyLowThreshold == config["canny_low_threshold"]
+    assert c_config.houghMaxLineGap == config["hough_max_line_gap"]
+
+    with pytest.raises(ValueError):
+        lane_detection_cpp.make_c_config(load_config(lane_selection="longest"))
+    with pytest.raises(ValueError):
+        lane_detection_cpp.make_c_config(load_config(pyramid_levels=1))
+
+
+def test_compare_outputs():
+    """Angles match modulo pi within tolerance and lanes must be found by both"""
+    out = {
+        "left_lane_angle": 0.5,
+        "right_lane_angle": np.nan,
+        "is_left_found": True,
+        "is_right_found": False,
+    }
+    assert lane_detection_cpp.compare_outputs(out, out) == (True, 0.0)
+
+    other = dict(out, left_lane_angle=0.5 + math.pi - 1e-4)
+    is_match, max_diff = lane_detection_cpp.compare_outputs(out, other, tolerance=1e-3)
+    assert is_match
+    np.testing.assert_allclose(max_diff, 1e-4, rtol=1e-6)
+    assert not lane_detection_cpp.compare_outputs(out, other, tolerance=1e-5)[0]
+    assert not lane_detection_cpp.compare_outputs(out, dict(out, is_right_found=True))[0]
+
+
+def test_make_lane_detector(tmp_path, monkeypatch):
+    """The config selects the backend; a missing C++ library raises OSError"""
+    _, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+    setup = {"tr_cam_to_road": calib["Tr_cam_to_road:"], "camera_matrix": calib["P2:"][:3, :3]}
+    detector = lane_detection.make_lane_detector(config=load_config(), **setup)
+    assert isinstance(detector, lane_detection.LaneLineDetector)
+
+    monkeypatch.setenv(lane_detection_cpp.LIBRARY_ENV_VAR, str(tmp_path / "missing.so"))
+    assert not lane_detection_cpp.is_available()
+    with pytest.raises(OSError):
+        lane_detection.make_lane_detector(config=load_config(backend="cpp"), **setup)
+
+
+@pytest.mark.skipif(
+    not lane_detection_cpp.is_available(), reason="C++ lane detector library is not built"
+)
+@pytest.mark.parametrize("data_type", ["training", "testing"])
+def test_backend_parity(data_type):
+    """Both backends find the same lanes at the same angles"""
+    image, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH, data_type=data_type)
+    outs = []
+    for backend in lane_detection.LANE_DETECTION_BACKENDS:
+        detector = lane_detection.make_lane_detector(
+            config=load_config(backend=backend),
+            tr_cam_to_road=calib["Tr_cam_to_road:"],
+            camera_matrix=calib["P2:"][:3, :3],
+        )
+        outs.append(detector.run(copy.deepcopy(image)))
+    assert lane_detection_cpp.compare_outputs(*outs, tolerance=1e-3)[0]
+
+
+def test_compare_backends():
+    """The comparison loop reads frames from a str path and reports per-detector rows"""
+    detectors = {
+        name: lane_detection.make_lane_detector(
+            config=load_config(), tr_cam_to_road=np.zeros((3, 4)), camera_matrix=np.eye(3)
+        )
+        for name in ("python", "other")
+    }
+    frames = kitti.list_kitti_road_frames(data_road_path=DATA_ROAD_PATH, data_type="training")
+    rows = list(
+        lane_detection_cpp.compare_backends(
+            data_road_path=str(DATA_ROAD_PATH), frames=frames, detectors=detectors, n_repeat=1
+        )
+    )
+    assert len(rows) == len(frames)
+    for row in rows:
+        assert row["is_match"] and row["max_angle_diff_deg"] == 0.0
+        assert row["python_latency_ms"] > 0 and row["other_latency_ms"] > 0
+        assert row["python_left_lane_angle"] == row["other_left_lane_angle"]
@@ -0,0 +1,87 @@
+"""Unit tests for lane_detection_runner.py"""
+# Standard Imports
+import json
+import pathlib
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.algo import lane_detection_runner
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def test_run_on_dataset(tmp_path):
+    """Process pool results match running the detector directly on each frame"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    for data_type in ["training", "testing"]:
+        image, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH, data_type=data_type)
+        detector = lane_detection.LaneLineDetector(
+            config=config,
+            tr_cam_to_road=calib["Tr_cam_to_road:"],
+            camera_matrix=calib["P2:"][:3, :3],
+        )
+        out = detector.run(image)
+
+        for n_workers, use_frame_cache in [(0, False), (2, False), (0, True), (2, True)]:
+            results = list(
+                lane_detection_runner.run_on_dataset(
+                    data_road_path=DATA_ROAD_PATH,
+                    config=config,
+                    data_type=data_type,
+                    n_workers=n_workers,
+                    chunk_size=1,
+                    use_frame_cache=use_frame_cache,
+                    frame_cache_dir=tmp_path,
+                )
+            )
+            assert len(results) == 1
+            result = results[0]
+            assert tuple(result) == lane_detection_runner.RESULT_FIELDS
+            assert (result["data_type"], result["prefix"], result["frame_num"]) == (
+                data_type,
+                "um",
+                0,
+            )
+            np.testing.assert_almost_equal(
+                result["left_lane_angle"], out["left_lane_angle"]
+            )
+            np.testing.assert_almost_equal(
+                result["right_lane_angle"], out["right_lane_angle"]
+            )
+
+    # The frame cache was built for both splits
+    for data_type in ["training", "testing"]:
+        assert len(list(tmp_path.glob(f"{data_type}_*.bin"))) == 1
+        assert len(list(tmp_path.glob(f"{data_type}_*.json"))) == 1
+
+
+def test_run_on_dataset_reads_frame_cache(tmp_path, monkeypatch):
+    """Once the frame cache is built, frames are read from it instead of being decoded"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+    kwargs = {
+        "data_road_path": DATA_ROAD_PATH,
+        "config": config,
+        "n_workers": 0,
+        "use_frame_cache": True,
+        "frame_cache_dir": tmp_path,
+    }
+    first = list(lane_detection_runner.run_on_dataset(**kwargs))
+    data_path = next(tmp_path.glob("*.bin"))
+    mtime_ns = data_path.stat().st_mtime_ns
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("Frame was decoded instead of read from the cache")
+
+    monkeypatch.setattr(kitti, "read_kitti_road_data", fail_decode)
+    second = list(lane_detection_runner.run_on_dataset(**kwargs))
+    assert data_path.stat().st_mtime_ns == mtime_ns
+    assert second == first
@@ -0,0 +1,161 @@
+"""Unit tests for lane_detection_service.py"""
+
+# Standard Imports
+import asyncio
+import json
+import pathlib
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import lane_detection
+from modules.algo import lane_detection_service
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def test_service():
+    """Concurrent pipelined requests are batched and match running the detector directly"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    frames = []
+    for data_type in ["training", "testing"]:
+        image, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH, data_type=data_type)
+        detector = lane_detection.LaneLineDetector(
+            config=config,
+            tr_cam_to_road=calib["Tr_cam_to_road:"],
+            camera_matrix=calib["P2:"][:3, :3],
+        )
+        request = {
+            "payload": (DATA_ROAD_PATH / data_type / "image_2" / "um_000000.png").read_bytes(),
+            "tr_cam_to_road": calib["Tr_cam_to_road:"],
+            "camera_matrix": calib["P2:"][:3, :3],
+        }
+        frames.append((request, detector.run(image)))
+
+    async def run():
+        service = lane_detection_service.LaneDetectionService(
+            config=config, max_batch_size=4, max_wait_ms=50.0, n_threads=2
+        )
+        host, port = await service.start()
+        client = lane_detection_service.LaneDetectionClient()
+        await client.connect(host=host, port=port)
+        try:
+            responses = await asyncio.gather(
+                *[client.detect(**frames[i % len(frames)][0]) for i in range(8)]
+            )
+            error_response = await client.detect(
+                payload=b"not an image",
+                tr_cam_to_road=frames[0][0]["tr_cam_to_road"],
+                camera_matrix=frames[0][0]["camera_matrix"],
+            )
+
+            # Malformed headers are answered with an error instead of dropping the request
+            reader, writer = await asyncio.open_connection(host, port)
+            header = {"request_id": 0, "encoding": "png"}
+            bad_headers = [
+                header,
+                dict(header, tr_cam_to_road=[["a"] * 4] * 3, camera_matrix=np.eye(3).tolist()),
+                dict(header, tr_cam_to_road=np.eye(3).tolist(), camera_matrix=np.eye(3).tolist()),
+            ]
+            bad_header_responses = []
+            for request_id, bad_header in enumerate(bad_headers):
+                bad_header["request_id"] = request_id
+                writer.write(
+                    lane_detection_service.encode_message(bad_header, frames[0][0]["payload"])
+                )
+                await writer.drain()
+                bad_header_responses.append(
+                    (await lane_detection_service.read_message(reader))[0]
+                )
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            await client.close()
+            await service.close()
+        return responses, error_response, bad_header_responses
+
+    responses, error_response, bad_header_responses = asyncio.run(run())
+
+    for i_response, response in enumerate(responses):
+        out = frames[i_response % len(frames)][1]
+        assert "error" not in response
+        np.testing.assert_almost_equal(response["left_lane_angle"], out["left_lane_angle"])
+        np.testing.assert_almost_equal(response["right_lane_angle"], out["right_lane_angle"])
+        assert response["is_left_found"] == bool(out["is_left_found"])
+        assert response["latency_ms"] > 0.0
+    assert max(response["batch_size"] for response in responses) > 1
+    assert "error" in error_response
+    for request_id, response in enumerate(bad_header_responses):
+        assert response["request_id"] == request_id
+        assert "error" in response
+
+
+def test_service_isolates_failures():
+    """A failing frame in a micro-batch only fails its own request; bad headers get an error"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+    image, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+    detector = lane_detection.LaneLineDetector(
+        config=config, tr_cam_to_road=calib["Tr_cam_to_road:"], camera_matrix=calib["P2:"][:3, :3]
+    )
+    out = detector.run(image)
+    good = {
+        "payload": (DATA_ROAD_PATH / "training" / "image_2" / "um_000000.png").read_bytes(),
+        "tr_cam_to_road": calib["Tr_cam_to_road:"],
+        "camera_matrix": calib["P2:"][:3, :3],
+    }
+    bad_requests = [
+        dict(good, camera_matrix=np.zeros((3, 3))),  # decodes, but detection fails
+        dict(good, payload=image[..., :1].tobytes(), encoding="raw", shape=(375, 1242, 1)),
+    ]
+
+    async def run():
+        service = lane_detection_service.LaneDetectionService(
+            config=config, max_batch_size=8, max_wait_ms=200.0, n_threads=1
+        )
+        host, port = await service.start()
+        client = lane_detection_service.LaneDetectionClient()
+        await client.connect(host=host, port=port)
+        try:
+            responses = await asyncio.gather(
+                *[client.detect(**request) for request in [good, *bad_requests, good]]
+            )
+
+            # The connection survives a header which is not JSON
+            reader, writer = await asyncio.open_connection(host, port)
+            header_bytes = b"{not json"
+            prefix = lane_detection_service._PREFIX  # pylint: disable=protected-access
+            writer.write(prefix.pack(len(header_bytes), 0) + header_bytes)
+            header = {
+                "request_id": 1,
+                "encoding": "png",
+                "tr_cam_to_road": good["tr_cam_to_road"].tolist(),
+                "camera_matrix": good["camera_matrix"].tolist(),
+            }
+            writer.write(lane_detection_service.encode_message(header, good["payload"]))
+            await writer.drain()
+            header_responses = [
+                (await lane_detection_service.read_message(reader))[0] for _ in range(2)
+            ]
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            await client.close()
+            await service.close()
+        return responses, header_responses
+
+    responses, header_responses = asyncio.run(run())
+
+    assert max(response.get("batch_size", 0) for response in responses) == len(responses)
+    for response in [responses[0], responses[-1], header_responses[1]]:
+        assert "error" not in response
+        np.testing.assert_almost_equal(response["left_lane_angle"], out["left_lane_angle"])
+    assert "LinAlgError" in responses[1]["error"]
+    assert "(375, 1242, 1)" in responses[2]["error"]
+    assert header_responses[0]["request_id"] is None and "error" in header_responses[0]
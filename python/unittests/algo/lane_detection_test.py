@@ -0,0 +1,404 @@
+"""Unit tests for lane_detection.py"""
+
+# Standard Imports
+import json
+import pathlib
+import tracemalloc
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import frame_buffers
+from modules.algo import lane_detection
+from modules.common import profiling
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def make_detector(data_type: str = "training"):
+    """Build a LaneLineDetector and load its KITTI frame from the bundled data"""
+    image, calib = kitti.read_kitti_road_data(
+        data_road_path=DATA_ROAD_PATH, data_type=data_type, frame_num=0
+    )
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    detector = lane_detection.LaneLineDetector(
+        config=config,
+        tr_cam_to_road=calib["Tr_cam_to_road:"],
+        camera_matrix=calib["P2:"][:3, :3],
+    )
+    return detector, image
+
+
+def test_geometry_cached():
+    """Geometry is computed once and reused across frames with identical inputs"""
+    detector, image = make_detector()
+    out_first = detector.run(image)
+    geometry = detector.get_geometry(image.shape)
+    out_second = detector.run(image)
+
+    assert detector.get_geometry(image.shape) is geometry
+    assert out_first == out_second
+    assert geometry.roi_mask.shape == image.shape[:2]
+    assert geometry.camera_height > 0.0
+
+
+def test_geometry_rebuilt_on_change():
+    """Geometry is rebuilt when the ROI, calibration or image shape changes"""
+    detector, image = make_detector()
+    geometry = detector.get_geometry(image.shape)
+
+    detector.config["roi_polygon"] = [[0, 375], [600, 100], [1241, 375]]
+    geometry_roi = detector.get_geometry(image.shape)
+    assert geometry_roi is not geometry
+    assert geometry_roi.roi_mask.sum() > geometry.roi_mask.sum()
+
+    detector.tr_cam_to_road = detector.tr_cam_to_road.copy()
+    assert detector.get_geometry(image.shape) is geometry_roi
+    detector.tr_cam_to_road[1, 3] -= 0.5
+    geometry_calib = detector.get_geometry(image.shape)
+    assert geometry_calib is not geometry_roi
+    np.testing.assert_almost_equal(
+        geometry_calib.camera_height, geometry_roi.camera_height + 0.5, decimal=2
+    )
+
+    geometry_shape = detector.get_geometry((200, 300, 3))
+    assert geometry_shape.roi_mask.shape == (200, 300)
+
+
+def test_run_batch():
+    """Batch output matches per-frame run() output for stacks and iterables of frames"""
+    detector, image = make_detector()
+    images = np.stack((image, image[:, ::-1], np.zeros_like(image)), axis=0)
+    out_batch = detector.run_batch(images)
+    assert out_batch["left_lane_angle"].shape == (3,)
+    assert out_batch["left_bev_points"].shape == (3, 2, 3)
+    np.testing.assert_array_equal(out_batch["is_left_found"], [True, True, False])
+    np.testing.assert_array_equal(out_batch["is_right_found"], [True, True, False])
+    assert np.isnan(out_batch["left_lane_angle"][2])
+    assert np.isnan(out_batch["right_bev_points"][2]).all()
+
+    for i_frame, frame in enumerate(images[:2]):
+        out = detector.run(frame)
+        np.testing.assert_almost_equal(
+            out_batch["left_lane_angle"][i_frame], out["left_lane_angle"]
+        )
+        np.testing.assert_almost_equal(
+            out_batch["right_lane_angle"][i_frame], out["right_lane_angle"]
+        )
+
+    out_iter = detector.run_batch(frame for frame in images)
+    np.testing.assert_array_equal(
+        out_iter["right_lane_angle"], out_batch["right_lane_angle"]
+    )
+
+    out_empty = detector.run_batch([])
+    assert out_empty["left_lane_angle"].shape == (0,)
+    assert out_empty["right_bev_points"].shape == (0, 2, 3)
+
+
+def test_run_no_lanes_found():
+    """Frames without any lines give NaN angles instead of raising"""
+    detector, image = make_detector()
+    out = detector.run(np.zeros_like(image))
+    assert not out["is_left_found"]
+    assert not out["is_right_found"]
+    assert np.isnan(out["left_lane_angle"])
+    assert np.isnan(out["right_lane_angle"])
+
+
+def test_run_with_plots():
+    """Plotting path runs headless and does not change the output"""
+    import matplotlib  # pylint: disable=import-outside-toplevel
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+    detector, image = make_detector()
+    out = detector.run(image, fig_num="test")
+    assert plt.fignum_exists("test")
+    plt.close("test")
+    assert out == detector.run(image)
+
+
+def test_run_stream():
+    """Streaming output matches run() on each frame of an image sequence"""
+    detector, image = make_detector()
+    out = detector.run(image)
+
+    pattern = str(DATA_ROAD_PATH / "training" / "image_2" / "um_*.png")
+    outs = list(detector.run_stream(pattern, max_queue_size=1))
+    assert len(outs) == 1
+    assert outs[0]["frame_index"] == 0
+    assert outs[0]["n_dropped"] == 0
+    assert outs[0]["left_lane_angle"] == out["left_lane_angle"]
+    assert outs[0]["right_lane_angle"] == out["right_lane_angle"]
+
+
+def test_check_lane_side():
+    """check_lane_side() accepts scalars and arrays and agrees with classify_lines()"""
+    assert lane_detection.check_lane_side(-1.0, 400.0, n_row=375, n_col=1242) == "left"
+    sides = lane_detection.check_lane_side(
+        slope=np.array([-1.0, 1.0]),
+        intercept=np.array([400.0, -800.0]),
+        n_row=375,
+        n_col=1242,
+    )
+    np.testing.assert_array_equal(sides, ["left", "right"])
+    assert lane_detection.check_lane_side(0.0, 200.0, n_row=375, n_col=1242) == "none"
+
+
+def test_classify_lines():
+    """Vectorized classification handles vertical and horizontal segments"""
+    lines = np.array(
+        [
+            [[100, 370, 300, 200]],  # left
+            [[1100, 370, 800, 200]],  # right
+            [[200, 300, 200, 100]],  # vertical, left
+            [[900, 100, 900, 300]],  # vertical, right
+            [[100, 200, 900, 200]],  # horizontal, neither
+            [[500, 100, 800, 300]],  # reaches bottom row right of center
+        ],
+        dtype=np.int32,
+    )
+    is_left, is_right = lane_detection.classify_lines(lines, n_row=375, n_col=1242)
+    np.testing.assert_array_equal(is_left, [True, False, True, False, False, False])
+    np.testing.assert_array_equal(is_right, [False, True, False, True, False, True])
+
+    is_left, is_right = lane_detection.classify_lines(
+        np.empty((0, 1, 4), dtype=np.int32), n_row=375, n_col=1242
+    )
+    assert is_left.shape == is_right.shape == (0,)
+
+
+def test_select_lane_points():
+    """Lane selection strategies"""
+    lines = np.array(
+        [
+            [[110, 360, 200, 270]],  # left, most confident
+            [[100, 370, 300, 170]],  # left, longest
+            [[1000, 370, 900, 270]],  # right, most confident
+            [[1100, 370, 900, 170]],  # right, longest
+        ],
+        dtype=np.int32,
+    )
+    kwargs = {"lines": lines, "n_row": 375, "n_col": 1242}
+
+    lane_points = lane_detection.select_lane_points(strategy="first", **kwargs)
+    np.testing.assert_array_equal(lane_points[0], [[110, 360], [200, 270]])
+    np.testing.assert_array_equal(lane_points[1], [[1000, 370], [900, 270]])
+
+    lane_points = lane_detection.select_lane_points(strategy="longest", **kwargs)
+    np.testing.assert_array_equal(lane_points[0], [[100, 370], [300, 170]])
+    np.testing.assert_array_equal(lane_points[1], [[1100, 370], [900, 170]])
+
+    # Left segments are collinear (x = 470 - y); fit spans all of their rows
+    lane_points = lane_detection.select_lane_points(strategy="least_squares", **kwargs)
+    np.testing.assert_array_almost_equal(lane_points[0], [[100, 370], [300, 170]])
+    assert lane_points[1, 0, 1] == 370 and lane_points[1, 1, 1] == 170
+
+    lane_points = lane_detection.select_lane_points(
+        strategy="first", **{**kwargs, "lines": lines[:2]}
+    )
+    assert np.isnan(lane_points[1]).all()
+
+
+def test_stage_timings():
+    """Stage timings are only collected when requested"""
+    detector, image = make_detector()
+    assert "stage_timings_ns" not in detector.run(image)
+
+    recorder = profiling.LatencyRecorder()
+    detector.collect_timings = True
+    detector.timing_sink = recorder
+    out = detector.run(image)
+    stages = ["geometry", "value", "blur", "canny", "roi_mask", "hough", "select", "project"]
+    assert list(out["stage_timings_ns"]) == stages
+    assert all(duration_ns > 0 for duration_ns in out["stage_timings_ns"].values())
+
+    detector.run_batch([image, image])
+    assert recorder.n_frame == 3
+    assert recorder.summary()["project"]["count"] == 1
+
+
+def measure_peak_allocation(func) -> int:
+    """Measure peak traced heap allocation (bytes) while calling func()"""
+    tracemalloc.start()
+    try:
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_bytes - start_bytes
+
+
+def test_reuse_buffers():
+    """Buffer reuse gives identical output with near-zero steady-state heap allocation"""
+    detector, image = make_detector()
+    detector.config["roi_crop"] = False
+    out = detector.run(image)
+    peak_default = measure_peak_allocation(lambda: detector.run(image))
+
+    detector.reuse_buffers = True
+    assert detector.run(image) == out  # warm-up allocates buffers
+    buffers = detector.get_buffers(image.shape)
+    peak_reuse = measure_peak_allocation(lambda: detector.run(image))
+    assert detector.get_buffers(image.shape) is buffers
+
+    n_row, n_col, _ = image.shape
+    assert peak_default > n_row * n_col
+    assert peak_reuse < n_row * n_col // 20
+
+    assert detector.get_buffers((100, 200, 3)).edges.shape == (100, 200)
+
+    # Cropped stages keep their full-size work arrays across frames even without reuse_buffers
+    detector.reuse_buffers = False
+    detector.config["roi_crop"] = True
+    out_crop = detector.run(image)
+    buffers = detector.get_buffers(image.shape)
+    peak_crop = measure_peak_allocation(lambda: detector.run(image))
+    assert detector.run(image) == out_crop
+    assert detector.get_buffers(image.shape) is buffers
+    assert peak_crop < n_row * n_col // 20
+
+
+def test_compute_value_channel():
+    """Value channel matches the HSV conversion"""
+    _, image = make_detector()
+    image_value = frame_buffers.compute_value_channel(image)
+    np.testing.assert_array_equal(
+        image_value, cv2.cvtColor(image, cv2.COLOR_BGR2HSV)[:, :, 2]
+    )
+
+    dst = np.empty(image.shape[:2], dtype=np.uint8)
+    planes = [np.empty_like(dst) for _ in range(3)]
+    out = frame_buffers.compute_value_channel(image, planes=planes, dst=dst)
+    assert out is dst
+    np.testing.assert_array_equal(out, image_value)
+
+
+def test_pyramid_processing():
+    """Downscaled processing stays within tolerance of full-resolution lane angles"""
+    tolerance = 0.01  # rad
+    for data_type in ["training", "testing"]:
+        detector, image = make_detector(data_type)
+        out_full = detector.run(image)
+
+        for pyramid_levels in [1, 2]:
+            detector.config["pyramid_levels"] = pyramid_levels
+            detector.collect_timings = True
+            out = detector.run(image)
+            assert out["is_left_found"] and out["is_right_found"]
+            for key in ["left_lane_angle", "right_lane_angle"]:
+                assert abs(out[key] - out_full[key]) < tolerance
+            assert "pyramid" in out["stage_timings_ns"]
+            assert "refine" in out["stage_timings_ns"]
+
+            geometry = detector.get_geometry(image.shape)
+            expected_shape = frame_buffers.get_pyramid_shape(
+                image.shape, pyramid_levels
+            )
+            assert geometry.processing_shape == expected_shape
+            assert geometry.processing_roi_mask.shape == expected_shape
+
+            detector.reuse_buffers = True
+            out_reuse = detector.run(image)
+            assert out_reuse["left_lane_angle"] == out["left_lane_angle"]
+            assert out_reuse["right_lane_angle"] == out["right_lane_angle"]
+            detector.reuse_buffers = False
+            detector.collect_timings = False
+
+
+def test_refine_lane_points():
+    """Refinement moves a coarse line onto the nearby intensity edge with sub-pixel accuracy"""
+    n_row, n_col = 200, 300
+    cols = np.arange(n_col)[None, :]
+    rows = np.arange(n_row)[:, None]
+    edge_x = 100.0 + 0.25 * rows  # x = 0.25 * y + 100
+    image_value = np.clip(255.0 * (cols - edge_x + 0.5), 0.0, 255.0).astype(np.uint8)
+    image_value = cv2.GaussianBlur(image_value, (5, 5), 0)
+
+    lane_points = np.full((2, 2, 2), np.nan)
+    lane_points[0] = [[102.0, 20.0], [143.0, 180.0]]  # coarse, a couple pixels off
+    refined = lane_detection.refine_lane_points(
+        image_value=image_value, lane_points=lane_points, half_width=4
+    )
+    expected_x = 0.25 * np.array([20.0, 180.0]) + 100.0
+    np.testing.assert_allclose(refined[0, :, 0], expected_x, atol=0.5)
+    np.testing.assert_array_equal(refined[0, :, 1], lane_points[0, :, 1])
+    assert np.isnan(refined[1]).all()
+
+
+def test_adaptive_canny():
+    """Adaptive thresholds keep the ROI edge density in range on dark and bright frames"""
+    detector, image = make_detector()
+    geometry = detector.get_geometry(image.shape)
+    roi_area = np.count_nonzero(geometry.roi_mask)
+    min_density, max_density = detector.config["canny_edge_density_range"]
+
+    dark_image = (image * 0.4).astype(np.uint8)
+    bright_image = np.clip(image * 1.8, 0, 255).astype(np.uint8)
+    _, _, _, edges_fixed = detector.detect_edges(image=dark_image, geometry=geometry)
+    assert np.count_nonzero(edges_fixed) / roi_area < min_density
+
+    for mode in ["median", "otsu"]:
+        detector.config["canny_mode"] = mode
+        for frame in [image, dark_image, bright_image]:
+            _, _, _, edges_with_mask = detector.detect_edges(image=frame, geometry=geometry)
+            density = np.count_nonzero(edges_with_mask) / roi_area
+            assert min_density <= density <= max_density
+
+        out = detector.run(dark_image)
+        assert out["is_left_found"] and out["is_right_found"]
+
+        # Flat frames have no edges at any threshold: lanes are not found
+        out = detector.run(np.zeros_like(image))
+        assert not out["is_left_found"] and not out["is_right_found"]
+        assert np.isnan(out["left_lane_angle"]) and np.isnan(out["right_lane_angle"])
+
+
+def test_roi_crop():
+    """Cropping stages to the padded ROI bounding box gives identical lines and edge images"""
+    for data_type in ["training", "testing"]:
+        detector, image = make_detector(data_type=data_type)
+        for canny_mode, pyramid_levels, reuse_buffers in [
+            ("fixed", 0, False),
+            ("fixed", 0, True),
+            ("median", 0, True),
+            ("otsu", 1, False),
+            ("fixed", 2, True),
+        ]:
+            results = []
+            for roi_crop in [False, True]:
+                detector.config.update(
+                    canny_mode=canny_mode, pyramid_levels=pyramid_levels, roi_crop=roi_crop
+                )
+                detector.reuse_buffers = reuse_buffers
+                geometry = detector.get_geometry(image.shape)
+                detector.detect_lane_points(image=image, geometry=geometry)  # warm-up
+                lane_points, stages = detector.detect_lane_points(image=image, geometry=geometry)
+                results.append((lane_points, {key: val.copy() for key, val in stages.items()}))
+
+            (lane_points, stages), (lane_points_crop, stages_crop) = results
+            np.testing.assert_array_equal(lane_points_crop, lane_points)
+            np.testing.assert_array_equal(stages_crop["lines"], stages["lines"])
+            np.testing.assert_array_equal(
+                stages_crop["image_edges_with_mask"], stages["image_edges_with_mask"]
+            )
+            for key in ["image_value", "image_blur", "image_edges"]:
+                assert stages_crop[key].shape == stages[key].shape
+
+            # Work is restricted to the padded bounding box; everything outside is zero
+            rows, cols = geometry.crop_windows[-1]
+            outside = np.ones(geometry.processing_shape, dtype=bool)
+            outside[rows, cols] = False
+            assert not stages_crop["image_blur"][outside].any()
+            assert outside.mean() > 0.4
@@ -0,0 +1,92 @@
+"""Unit tests for lane_polyfit.py"""
+
+# Standard Imports
+import json
+import pathlib
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import lane_polyfit
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def make_detector() -> lane_polyfit.PolyfitLaneDetector:
+    """Create a detector with the default config and KITTI calibration"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+    _, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+    return lane_polyfit.PolyfitLaneDetector(
+        config=config,
+        tr_cam_to_road=calib["Tr_cam_to_road:"],
+        camera_matrix=calib["P2:"][:3, :3],
+        reuse_buffers=True,
+    )
+
+
+def test_fit_lanes():
+    """Curved dashed lanes drawn in the bird's eye view are recovered, then tracked"""
+    detector = make_detector()
+    remap = detector.detector.get_bev_remap((375, 1242))
+    n_bev_row, n_bev_col = remap.bev_shape
+    edges_bev = np.zeros((n_bev_row, n_bev_col), dtype=np.uint8)[remap.roi_rows]
+
+    true_fits = np.array([[0.002, -0.05, -1.8], [0.002, -0.05, 1.8]])
+    z = np.linspace(6.0, 46.0, 400)
+    for fit in true_fits:
+        points_bev = np.linalg.solve(
+            remap.bev_to_road, np.stack((np.polyval(fit, z), z, np.ones_like(z)))
+        )[:2].T
+        points_bev[:, 1] -= remap.roi_rows.start
+        for i_dash in range(0, len(z) - 20, 40):  # 2 m dashes with 2 m gaps
+            cv2.polylines(
+                edges_bev, [np.round(points_bev[i_dash : i_dash + 20]).astype(np.int32)], False, 255
+            )
+
+    fits, is_tracked = detector.fit_lanes(edges_bev=edges_bev, remap=remap)
+    np.testing.assert_allclose(fits, true_fits, atol=0.05)
+    assert is_tracked == [False, False]
+
+    fits_tracked, is_tracked = detector.fit_lanes(
+        edges_bev=edges_bev, remap=remap, prev_fits=list(fits)
+    )
+    np.testing.assert_allclose(fits_tracked, true_fits, atol=0.05)
+    assert is_tracked == [True, True]
+
+    angles, curvatures, offsets = lane_polyfit.evaluate_lane_fits(true_fits, z=0.0)
+    np.testing.assert_allclose(angles, np.arctan2(1.0, -0.05))
+    np.testing.assert_allclose(curvatures, 0.004 / (1.0 + 0.05**2) ** 1.5)
+    np.testing.assert_allclose(offsets, [-1.8, 1.8])
+
+
+def test_run():
+    """Lanes of the bundled KITTI frame are found and the next frame is seeded by the fits"""
+    detector = make_detector()
+    image, _ = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+
+    out = detector.run(image)
+    out_next = detector.run(image)
+    for side in ["left", "right"]:
+        assert out[f"is_{side}_found"] and not out[f"is_{side}_tracked"]
+        assert out_next[f"is_{side}_found"] and out_next[f"is_{side}_tracked"]
+        assert 0.0 < out[f"{side}_lane_angle"] < np.pi
+    assert out["left_lateral_offset"] < out["right_lateral_offset"]
+
+    # Nothing to fit on a blank frame; the lanes are searched from scratch afterwards
+    out_blank = detector.run(np.zeros_like(image))
+    assert not out_blank["is_left_found"] and not out_blank["is_right_found"]
+    assert np.isnan(out_blank["left_lane_angle"]) and np.isnan(out_blank["right_curvature"])
+    assert not detector.run(image)["is_left_tracked"]
+
+    # Streams start from scratch and report the polyfit outputs
+    pattern = str(DATA_ROAD_PATH / "training" / "image_2" / "um_*.png")
+    outs = list(detector.run_stream(pattern, max_queue_size=1))
+    assert len(outs) == 1
+    assert outs[0]["left_lane_angle"] == out["left_lane_angle"]
+    assert not outs[0]["is_left_tracked"] and ("left_curvature" in outs[0])
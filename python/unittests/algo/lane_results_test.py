@@ -0,0 +1,141 @@
+"""Unit tests for lane_results.py"""
+
+# Standard Imports
+import json
+import pathlib
+import shutil
+
+# Third Party Imports
+import numpy as np
+import cv2
+import pytest
+
+# Local Imports
+from modules.algo import lane_detection_runner
+from modules.algo import lane_results
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def fill_lane_polygon(lane_points: np.ndarray, image_shape: tuple) -> np.ndarray:
+    """Reference mask of the area between two lane lines, drawn as a polygon"""
+    n_row = image_shape[0]
+    y_top = lane_points[..., 1].min(axis=1).max()
+    polygon = []
+    for i_lane, y_value in [(0, n_row - 1.0), (0, y_top), (1, y_top), (1, n_row - 1.0)]:
+        (x1, y1), (x2, y2) = lane_points[i_lane]
+        polygon.append([x1 + (x2 - x1) * (y_value - y1) / (y2 - y1), y_value])
+    lane_mask = np.zeros(image_shape[:2], dtype=np.uint8)
+    cv2.fillPoly(lane_mask, [np.round(polygon).astype(np.int32)], 1)
+    return lane_mask.astype(bool)
+
+
+def run_split(data_road_path: pathlib.Path, data_type: str) -> list:
+    """Run the default config on every frame of a split"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+    return list(
+        lane_detection_runner.run_on_dataset(
+            data_road_path=data_road_path, config=config, data_type=data_type, n_workers=0
+        )
+    )
+
+
+@pytest.mark.parametrize("file_format", lane_results.CHUNK_FORMATS)
+def test_result_chunk_writer(tmp_path, file_format):
+    """Rows are written as chunks, appended to on reopen, and read back unchanged"""
+    rows = run_split(DATA_ROAD_PATH, "training") + run_split(DATA_ROAD_PATH, "testing")
+    with lane_results.ResultChunkWriter(tmp_path, chunk_size=1, file_format=file_format) as writer:
+        for row in rows:
+            writer.write(row)
+    assert writer.n_written == len(rows)
+    with lane_results.ResultChunkWriter(tmp_path, chunk_size=4, file_format=file_format) as writer:
+        writer.write(rows[0])
+    assert len(lane_results.list_result_chunks(tmp_path)) == len(rows) + 1
+
+    records = lane_results.read_results(tmp_path)
+    assert records.dtype == lane_results.RESULT_DTYPE
+    for record, row in zip(records, rows + rows[:1]):
+        for name in lane_detection_runner.RESULT_FIELDS:
+            np.testing.assert_equal(record[name], row[name])
+
+
+def test_result_chunk_writer_never_overwrites(tmp_path):
+    """New chunks are numbered after the highest existing chunk and never replace a chunk"""
+    row = run_split(DATA_ROAD_PATH, "training")[0]
+    with lane_results.ResultChunkWriter(tmp_path, chunk_size=1) as writer:
+        for _ in range(3):
+            writer.write(row)
+    (tmp_path / "results_00000.npz").unlink()  # e.g. a chunk removed after a failed run
+
+    with lane_results.ResultChunkWriter(tmp_path, chunk_size=1) as writer:
+        writer.write(row)
+    names = [path.name for path in lane_results.list_result_chunks(tmp_path)]
+    assert names == ["results_00001.npz", "results_00002.npz", "results_00003.npz"]
+
+    # A chunk created by another writer since opening is not replaced
+    writer = lane_results.ResultChunkWriter(tmp_path, chunk_size=1)
+    (tmp_path / "results_00004.npz").write_bytes(b"other writer")
+    with pytest.raises(FileExistsError):
+        writer.write(row)
+    assert (tmp_path / "results_00004.npz").read_bytes() == b"other writer"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_evaluate_results(tmp_path):
+    """Bulk scores match per-frame polygon scoring; frames without ground truth are skipped"""
+    data_road_path = tmp_path / "data_road"
+    for data_type in ["training", "testing"]:
+        shutil.copytree(DATA_ROAD_PATH / data_type, data_road_path / data_type)
+    image, _ = kitti.read_kitti_road_data(data_road_path)
+    gt_image = np.zeros_like(image)
+    gt_image[..., 2] = 255
+    road = np.array([[200, 374], [560, 190], [700, 190], [1241, 300], [1241, 374]])
+    cv2.fillPoly(gt_image, [road], (255, 0, 255))
+    (data_road_path / "training" / "gt_image_2").mkdir()
+    cv2.imwrite(str(data_road_path / "training" / "gt_image_2" / "um_road_000000.png"), gt_image)
+
+    rows = run_split(data_road_path, "training") + run_split(data_road_path, "testing")
+    results_dir = tmp_path / "results"
+    with lane_results.ResultChunkWriter(results_dir) as writer:
+        for row in rows:
+            writer.write(row)
+
+    metrics, summary = lane_results.evaluate_results(results_dir, data_road_path)
+    assert metrics["has_gt"].tolist() == [True, False]
+    assert np.isnan(metrics["iou"][1])
+    assert (summary["n_frame"], summary["n_scored"]) == (2, 1)
+
+    gt_mask = kitti.read_kitti_road_gt(data_road_path)
+    lane_points = lane_results.get_lane_points(lane_results.read_results(results_dir))
+    lane_mask = fill_lane_polygon(lane_points[0], gt_mask.shape)
+    iou = np.count_nonzero(lane_mask & gt_mask) / np.count_nonzero(lane_mask | gt_mask)
+    assert 0.0 < iou < 1.0
+    np.testing.assert_allclose(metrics["iou"][0], iou, atol=0.01)
+    assert summary["mean_iou"] == summary["mean_iou_um"] == metrics["iou"][0]
+
+    # Missing lanes score 0
+    lane_points[0, 1] = np.nan
+    col_start, col_stop = lane_results.compute_lane_spans(lane_points[:1], gt_mask.shape)
+    n_lane_pixel, n_gt_pixel, n_intersection = lane_results.score_lane_spans(
+        col_start, col_stop, gt_mask[np.newaxis]
+    )
+    assert n_lane_pixel[0] == n_intersection[0] == 0
+    assert n_gt_pixel[0] == np.count_nonzero(gt_mask)
+
+
+def test_score_lane_iou():
+    """IoU of the area between the lane lines of several detections with one mask"""
+    lane_points = np.array([[[100.0, 199.0], [140.0, 100.0]], [[300.0, 199.0], [260.0, 100.0]]])
+    gt_mask = fill_lane_polygon(lane_points, (200, 400))
+
+    lane_points = np.stack([lane_points, lane_points, lane_points])
+    lane_points[2, 1] = np.nan
+    iou = lane_results.score_lane_iou(lane_points, gt_mask)
+    assert iou.shape == (3,)
+    assert iou[0] == iou[1] > 0.98
+    assert iou[2] == 0.0
+    assert lane_results.score_lane_iou(lane_points[:1], ~gt_mask)[0] < 0.05
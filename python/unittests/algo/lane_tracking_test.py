@@ -0,0 +1,96 @@
+"""Unit tests for lane_tracking.py"""
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import lane_tracking
+from unittests.algo.lane_detection_test import make_detector
+
+
+def test_alpha_beta_filter():
+    """Filter converges onto a constant-rate signal and coasts without measurements"""
+    lane_filter = lane_tracking.AlphaBetaFilter(alpha=0.5, beta=0.2)
+    assert not lane_filter.is_initialized
+
+    for i_frame in range(50):
+        value = lane_filter.update(np.array([1.0, 2.0]) * i_frame)
+    np.testing.assert_array_almost_equal(value, [49.0, 98.0], decimal=3)
+    np.testing.assert_array_almost_equal(lane_filter.rate, [1.0, 2.0], decimal=3)
+
+    value = lane_filter.update(None)
+    np.testing.assert_array_almost_equal(value, [50.0, 100.0], decimal=3)
+
+    lane_filter.reset()
+    assert not lane_filter.is_initialized
+
+
+def test_line_params_round_trip():
+    """Endpoints -> (angle, intercept) -> endpoints round trip, including vertical lines"""
+    points = np.array(
+        [
+            [[100.0, 370.0], [300.0, 200.0]],
+            [[500.0, 200.0], [500.0, 350.0]],
+            [[10.0, 100.0], [90.0, 100.0]],
+        ]
+    )
+    line_params = lane_tracking.points_to_line_params(points, y_ref=374.0)
+    np.testing.assert_almost_equal(line_params[1], [0.0, 500.0])
+    assert np.isnan(line_params[2]).all()  # horizontal line
+
+    points_out = lane_tracking.line_params_to_points(
+        line_params[:2], y_ref=374.0, y_values=np.array([370.0, 200.0])
+    )
+    np.testing.assert_array_almost_equal(points_out[0], points[0])
+    np.testing.assert_array_almost_equal(points_out[1], [[500.0, 370.0], [500.0, 200.0]])
+
+
+def test_lane_tracker():
+    """Tracker narrows search after the first frame and re-searches after losing track"""
+    detector, image = make_detector()
+    out = detector.run(image)
+    tracker = lane_tracking.LaneTracker(detector, max_missed=2)
+
+    out_first = tracker.run(image)
+    assert not out_first["is_tracking"]
+    np.testing.assert_almost_equal(out_first["left_lane_angle"], out["left_lane_angle"])
+    np.testing.assert_almost_equal(
+        out_first["right_lane_angle"], out["right_lane_angle"]
+    )
+
+    for _ in range(3):
+        out_tracked = tracker.run(image)
+        assert out_tracked["is_tracking"]
+        # ~2x fewer edge pixels reach Hough (2871 -> ~1300), not an order of magnitude: the lane
+        # markings make up most of the edges inside the ROI of this frame
+        edge_ratio = out_tracked["n_edge_pixels"] / out_first["n_edge_pixels"]
+        assert 0.35 < edge_ratio < 0.5
+        assert abs(out_tracked["left_lane_angle"] - out["left_lane_angle"]) < 0.01
+        assert abs(out_tracked["right_lane_angle"] - out["right_lane_angle"]) < 0.01
+
+    # Coast through missed frames, then lose track and fall back to full search
+    blank = np.zeros_like(image)
+    outs_blank = [tracker.run(blank) for _ in range(3)]
+    assert not any(out_blank["is_left_found"] for out_blank in outs_blank)
+    assert [out_blank["is_left_coasting"] for out_blank in outs_blank] == [True, True, False]
+    assert not np.isnan(outs_blank[0]["left_lane_angle"])
+    assert np.isnan(outs_blank[2]["left_lane_angle"])
+    assert not tracker.run(blank)["is_tracking"]
+    assert tracker.run(image)["is_left_found"]
+
+
+def test_lane_tracker_single_lane():
+    """A lane which is never found does not stop tracking of the other lane"""
+    detector, image = make_detector()
+    image = np.zeros_like(image)
+    cv2.line(image, (300, 374), (560, 200), (255, 255, 255), 6)  # left lane only
+    tracker = lane_tracking.LaneTracker(detector)
+
+    out_first = tracker.run(image)
+    assert not out_first["is_tracking"]
+    for _ in range(3):
+        out = tracker.run(image)
+        assert out["is_tracking"]
+        assert out["is_left_found"] and not out["is_right_found"]
+        assert not out["is_right_coasting"] and np.isnan(out["right_lane_angle"])
+        assert abs(out["left_lane_angle"] - out_first["left_lane_angle"]) < 0.01
@@ -0,0 +1,66 @@
+"""Unit tests for multi_camera_lane_detection.py"""
+
+# Standard Imports
+import json
+import pathlib
+
+# Third Party Imports
+import numpy as np
+
+# Local Imports
+from modules.algo import multi_camera_lane_detection
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+CONFIG_PATH = REPO_DIR / "config" / "algo" / "lane_line_detector_config.json"
+
+
+def test_multi_camera_lane_detector():
+    """Both cameras agree on the same view; a blocked camera halves the confidence"""
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+    image, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+
+    with multi_camera_lane_detection.MultiCameraLaneDetector(
+        config=config, calib=calib
+    ) as detector:
+        out = detector.run({2: image, 3: image})
+        out_blocked = detector.run({2: image, 3: np.zeros_like(image)})
+        out_missing = detector.run({3: None})
+
+    for side in multi_camera_lane_detection.LANE_SIDES:
+        assert out[f"is_{side}_found"]
+        assert 0.0 < out[f"{side}_lane_angle"] < np.pi
+        np.testing.assert_almost_equal(out[f"{side}_confidence"], 1.0)
+
+        # Fused angle of the remaining camera is unchanged
+        assert out_blocked[f"is_{side}_found"]
+        np.testing.assert_almost_equal(out_blocked[f"{side}_lane_angle"], out[f"{side}_lane_angle"])
+        np.testing.assert_almost_equal(out_blocked[f"{side}_confidence"], 0.5)
+
+        assert not out_missing[f"is_{side}_found"]
+        assert np.isnan(out_missing[f"{side}_lane_angle"])
+        assert out_missing[f"{side}_confidence"] == 0.0
+
+    # Same pixels seen from the right camera lie further right on the road
+    assert (out["road_points"][1, ..., 0] > out["road_points"][0, ..., 0]).all()
+    assert out["left_lateral_offset"] < out["right_lateral_offset"]
+
+
+def test_fuse_lane_estimates():
+    """Unit test for multi_camera_lane_detection.fuse_lane_estimates()"""
+    road_points = np.full((2, 2, 2, 2), np.nan)
+    road_points[0, 0] = [[-2.0, 10.0], [-2.0, 20.0]]  # straight ahead, 2 m left
+    road_points[1, 0] = [[-1.0, 10.0], [-1.0, 40.0]]  # straight ahead, 1 m left, 3x as long
+    road_points[0, 1] = [[2.0, 10.0], [12.0, 20.0]]  # 45 degrees
+    road_points[1, 1] = [[2.0, 10.0], [-8.0, 20.0]]  # 135 degrees
+
+    out = multi_camera_lane_detection.fuse_lane_estimates(road_points)
+    np.testing.assert_almost_equal(out["left_lane_angle"], np.pi / 2.0)
+    np.testing.assert_almost_equal(out["left_lateral_offset"], -1.25)
+    np.testing.assert_almost_equal(out["left_confidence"], 1.0)
+
+    # Perpendicular estimates cancel out entirely
+    assert out["is_right_found"]
+    np.testing.assert_almost_equal(out["right_confidence"], 0.0)
@@ -0,0 +1,130 @@
+"""Unit tests for parameter_sweep.py"""
+
+# Standard Imports
+import json
+import shutil
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.algo import parameter_sweep
+from modules.data import kitti
+from unittests.algo.lane_detection_test import make_detector, DATA_ROAD_PATH, CONFIG_PATH
+
+
+def test_evaluate_frame_matches_detector():
+    """Swept pipeline reproduces LaneLineDetector output"""
+    detector, image = make_detector()
+    out = detector.run(image)
+    _, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+
+    results = parameter_sweep.evaluate_frame(
+        image=image,
+        calib=calib,
+        gt_mask=None,
+        configs=[detector.config],
+        cache=parameter_sweep.StageCache(),
+    )
+    assert len(results) == 1
+    for key in ["left_lane_angle", "right_lane_angle"]:
+        np.testing.assert_allclose(results[0][key], out[key])
+    assert results[0]["is_left_found"] and results[0]["is_right_found"]
+    assert np.isnan(results[0]["iou"])
+
+
+def test_stage_outputs_shared():
+    """Each distinct upstream stage output is computed once per frame"""
+    detector, image = make_detector()
+    _, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+    configs = parameter_sweep.expand_grid(
+        base_config=detector.config,
+        param_grid={
+            "hough_min_line_length": [10, 20, 40],
+            "blur_kernel_shape": [[3, 3], [5, 5]],
+            "canny_low_threshold": [100, 130],
+        },
+    )
+    assert len(configs) == 12
+
+    cache = parameter_sweep.StageCache(max_size=8)
+    results = parameter_sweep.evaluate_frame(
+        image=image, calib=calib, gt_mask=None, configs=configs, cache=cache
+    )
+    assert len(results) == 12
+    assert dict(cache.n_computed) == {
+        "value": 1,
+        "pyramid": 1,
+        "blur": 2,
+        "canny": 4,
+        "hough": 12,
+        "select": 12,
+        "refine": 12,
+    }
+
+
+def test_evaluate_frame_matches_detector_options():
+    """Pyramid levels, ROI cropping and refinement of each configuration are applied"""
+    detector, image = make_detector()
+    _, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+    configs = parameter_sweep.expand_grid(
+        base_config=dict(detector.config, pyramid_refine_half_width=4),
+        param_grid={
+            "pyramid_levels": [0, 1],
+            "roi_crop": [False, True],
+            "canny_mode": ["fixed", "median"],
+        },
+    )
+    results = parameter_sweep.evaluate_frame(
+        image=image, calib=calib, gt_mask=None, configs=configs, cache=parameter_sweep.StageCache()
+    )
+    for config, result in zip(configs, results):
+        detector.config = config
+        out = detector.run(image)
+        for key in ["left_lane_angle", "right_lane_angle", "is_left_found", "is_right_found"]:
+            np.testing.assert_array_equal(result[key], out[key])
+
+
+def test_run_sweep(tmp_path):
+    """Sweep over a dataset split scored against ground truth masks"""
+    data_road_path = tmp_path / "data_road"
+    shutil.copytree(DATA_ROAD_PATH / "training", data_road_path / "training")
+    with open(CONFIG_PATH, encoding="utf-8") as json_file:
+        config = json.load(json_file)
+
+    # Ground truth: the area between the lanes found with the default config, marked in blue
+    detector, image = make_detector()
+    lane_points, _ = detector.detect_lane_points(image, detector.get_geometry(image.shape))
+    gt_image = np.zeros_like(image)
+    gt_image[..., 2] = 255  # non-road in red
+    y_top = lane_points[..., 1].min(axis=1).max()
+    polygon = []
+    for i_lane, y_value in [
+        (0, image.shape[0] - 1.0),
+        (0, y_top),
+        (1, y_top),
+        (1, image.shape[0] - 1.0),
+    ]:
+        (x1, y1), (x2, y2) = lane_points[i_lane]
+        polygon.append([x1 + (x2 - x1) * (y_value - y1) / (y2 - y1), y_value])
+    cv2.fillPoly(gt_image, [np.round(polygon).astype(np.int32)], (255, 0, 255))
+    (data_road_path / "training" / "gt_image_2").mkdir()
+    cv2.imwrite(str(data_road_path / "training" / "gt_image_2" / "um_road_000000.png"), gt_image)
+
+    param_grid = {"canny_low_threshold": [130, 250], "hough_max_line_gap": [5, 10]}
+    for n_workers in [0, 2]:
+        summary, frame_results = parameter_sweep.run_sweep(
+            data_road_path=data_road_path,
+            base_config=config,
+            param_grid=param_grid,
+            n_workers=n_workers,
+            frame_cache_dir=tmp_path / "cache",
+        )
+        assert len(summary) == 4
+        assert len(frame_results) == 4
+        assert summary[0]["canny_low_threshold"] == 130
+        assert summary[0]["n_frame"] == 1
+        assert summary[1]["mean_iou"] > 0.99  # default config
+        assert frame_results[0]["prefix"] == "um"
+        assert all(0.0 <= row["mean_iou"] <= 1.0 for row in summary)
@@ -40,3 +40,76 @@ def test_apply_perspective_transform():
     v_out = cvision.apply_perspective_transform(v=v_in, transform=transform)
     v_out_correct = np.array([2.12132, 0.707107])
     np.testing.assert_array_almost_equal(v_out, v_out_correct)
+
+
+def test_augment_batched():
+    """augment() handles arbitrary leading dimensions, float32 and out= buffers"""
+    v = np.arange(24, dtype=np.float32).reshape((2, 3, 2, 2))
+    out = cvision.augment(v)
+    assert out.shape == (2, 3, 2, 3)
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out[..., :2], v)
+    np.testing.assert_array_equal(out[..., 2], 1.0)
+
+    buffer = np.empty((2, 3, 2, 3), dtype=np.float32)
+    assert cvision.augment(v, out=buffer) is buffer
+    np.testing.assert_array_equal(buffer, out)
+
+
+def test_homo_to_cart_batched():
+    """homo_to_cart() handles arbitrary leading dimensions and out= buffers"""
+    v_in = np.array([[[2.0, 4.0, 2.0], [3.0, 6.0, 3.0]], [[1.0, 1.0, 0.5], [0.0, 8.0, 4.0]]])
+    correct = np.array([[[1.0, 2.0], [1.0, 2.0]], [[2.0, 2.0], [0.0, 2.0]]])
+    np.testing.assert_array_equal(cvision.homo_to_cart(v_in), correct)
+
+    buffer = np.empty((2, 2, 2))
+    assert cvision.homo_to_cart(v_in, out=buffer) is buffer
+    np.testing.assert_array_equal(buffer, correct)
+
+
+def test_apply_perspective_transform_batched():
+    """apply_perspective_transform() matches the augmented einsum for batches of vectors"""
+    rng = np.random.default_rng(0)
+    v_in = rng.uniform(-10.0, 10.0, size=(4, 5, 2))
+    transform = np.array([[1.0, 0.2, 3.0], [-0.1, 0.9, -2.0], [0.01, 0.02, 1.0]])
+
+    v_homo = np.einsum("ij, ...j -> ...i", transform, cvision.augment(v_in))
+    correct = v_homo[..., :2] / v_homo[..., 2:]
+    np.testing.assert_allclose(cvision.apply_perspective_transform(v_in, transform), correct)
+
+    # float32 in, float32 out
+    v_out = cvision.apply_perspective_transform(v_in.astype(np.float32), transform)
+    assert v_out.dtype == np.float32
+    np.testing.assert_allclose(v_out, correct, rtol=1e-5, atol=1e-5)
+
+    # One transform per batch entry, written into a buffer
+    transforms = np.stack([transform, np.eye(3), 2.0 * transform, transform.T])[:, np.newaxis]
+    buffer = np.empty((4, 5, 2))
+    v_out = cvision.apply_perspective_transform(v_in, transforms, out=buffer)
+    assert v_out is buffer
+    for i_batch in range(4):
+        np.testing.assert_allclose(
+            v_out[i_batch],
+            cvision.apply_perspective_transform(v_in[i_batch], transforms[i_batch, 0]),
+        )
+
+
+def test_project_points():
+    """project_points() matches depth * K_inv @ augment(apply_perspective_transform(points, R))"""
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0.0, 1000.0, size=(3, 2, 2, 2))
+    K = np.array([[721.5, 0.0, 609.6], [0.0, 721.5, 172.9], [0.0, 0.0, 1.0]])
+    angle = 0.1
+    R = np.array(
+        [[np.cos(angle), 0.0, np.sin(angle)], [0.0, 1.0, 0.0], [-np.sin(angle), 0.0, np.cos(angle)]]
+    )
+    K_inv = np.linalg.inv(K)
+
+    pixels = cvision.augment(cvision.apply_perspective_transform(points, R))
+    correct = 1.6 * np.einsum("ij, ...j -> ...i", K_inv, pixels)
+    np.testing.assert_allclose(cvision.project_points(points, K_inv, R, 1.6), correct)
+
+    buffer = np.empty((3, 2, 2, 3), dtype=np.float32)
+    out = cvision.project_points(points.astype(np.float32), K_inv, R, 1.6, out=buffer)
+    assert out is buffer
+    np.testing.assert_allclose(out, correct, rtol=1e-5)
@@ -0,0 +1,60 @@
+"""Unit tests for profiling.py"""
+# Standard Imports
+import pstats
+
+# Third Party Imports
+import numpy as np
+import pytest
+
+# Local Imports
+from modules.common import profiling
+
+
+def test_stage_timer():
+    """Unit test for profiling.StageTimer"""
+    timer = profiling.StageTimer()
+    timer.lap("a")
+    timer.lap("b")
+    timer.lap("a")
+    assert list(timer.timings_ns) == ["a", "b"]
+    assert all(duration_ns >= 0 for duration_ns in timer.timings_ns.values())
+    assert timer.total_ns() == sum(timer.timings_ns.values())
+
+    profiling.NULL_TIMER.lap("a")
+    assert profiling.NULL_TIMER.timings_ns is None
+    assert profiling.NULL_TIMER.total_ns() == 0
+
+
+def test_latency_recorder():
+    """Unit test for profiling.LatencyRecorder"""
+    recorder = profiling.LatencyRecorder()
+    for i_frame in range(1, 101):
+        recorder({"a": i_frame * 1_000_000, "b": 1_000_000})
+
+    assert recorder.n_frame == 100
+    summary = recorder.summary(percentiles=(50, 99))
+    assert list(summary) == ["a", "b", "total"]
+    assert summary["a"]["count"] == 100
+    np.testing.assert_almost_equal(summary["a"]["mean_ms"], 50.5)
+    np.testing.assert_almost_equal(summary["a"]["p50_ms"], 50.5)
+    np.testing.assert_almost_equal(summary["b"]["p99_ms"], 1.0)
+    np.testing.assert_almost_equal(summary["total"]["mean_ms"], 51.5)
+
+    table = recorder.format_summary(percentiles=(50, 99))
+    assert table.splitlines()[0].split() == ["stage", "count", "mean_ms", "p50_ms", "p99_ms"]
+    assert len(table.splitlines()) == 4
+
+
+def test_profile(tmp_path):
+    """Unit test for profiling.profile()"""
+    with profiling.profile(mode=None):
+        pass
+
+    output_path = tmp_path / "out.prof"
+    with profiling.profile(mode="cprofile", output_path=output_path):
+        sorted(range(1000))
+    assert pstats.Stats(str(output_path)).total_calls > 0
+
+    with pytest.raises(ValueError):
+        with profiling.profile(mode="unknown"):
+            pass
@@ -0,0 +1,64 @@
+"""Unit tests for frame_cache.py"""
+
+# Standard Imports
+import os
+import pathlib
+import pickle
+import shutil
+
+# Third Party Imports
+import numpy as np
+import cv2
+
+# Local Imports
+from modules.data import frame_cache
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+
+
+def test_frame_cache(tmp_path):
+    """Cached frames match the decoded PNGs and calibration"""
+    cache = frame_cache.KittiFrameCache(DATA_ROAD_PATH, data_type="training", cache_dir=tmp_path)
+    assert cache.frames == [("um", 0)]
+    assert cache.data_path.is_file() and cache.index_path.is_file()
+
+    image, calib = cache.read("um", 0)
+    expected = cv2.imread(str(DATA_ROAD_PATH / "training" / "image_2" / "um_000000.png"))
+    np.testing.assert_array_equal(image, expected)
+    assert isinstance(image.base, np.memmap)  # zero-copy view
+    assert not image.flags.writeable
+    assert calib["P2:"].shape == (3, 4)
+    assert calib["R0_rect:"].shape == (3, 3)
+
+    # Reopening reuses the existing cache; pickled copies map the same file
+    mtime_ns = os.stat(cache.data_path).st_mtime_ns
+    cache_again = frame_cache.KittiFrameCache(
+        DATA_ROAD_PATH, data_type="training", cache_dir=tmp_path
+    )
+    assert os.stat(cache.data_path).st_mtime_ns == mtime_ns
+    image_unpickled, _ = pickle.loads(pickle.dumps(cache_again)).get(0)
+    np.testing.assert_array_equal(image_unpickled, expected)
+
+
+def test_frame_cache_invalidation(tmp_path):
+    """The cache is rebuilt when a source image changes or frames are added"""
+    data_road_path = tmp_path / "data_road"
+    shutil.copytree(DATA_ROAD_PATH / "testing", data_road_path / "testing")
+    cache_dir = tmp_path / "cache"
+    cache = frame_cache.KittiFrameCache(data_road_path, data_type="testing", cache_dir=cache_dir)
+    image, _ = cache.get(0)
+
+    image_path = data_road_path / "testing" / "image_2" / "um_000000.png"
+    cv2.imwrite(str(image_path), 255 - image)
+    cache = frame_cache.KittiFrameCache(data_road_path, data_type="testing", cache_dir=cache_dir)
+    np.testing.assert_array_equal(cache.get(0)[0], 255 - image)
+
+    for folder, suffix in [("image_2", "png"), ("calib", "txt")]:
+        shutil.copy(
+            data_road_path / "testing" / folder / f"um_000000.{suffix}",
+            data_road_path / "testing" / folder / f"um_000007.{suffix}",
+        )
+    cache = frame_cache.KittiFrameCache(data_road_path, data_type="testing", cache_dir=cache_dir)
+    assert cache.frames == [("um", 0), ("um", 7)]
+    np.testing.assert_array_equal(cache.read("um", 7)[0], 255 - image)
@@ -0,0 +1,84 @@
+"""Unit tests for frame_stream.py"""
+# Standard Imports
+import time
+
+# Third Party Imports
+import numpy as np
+import cv2
+import pytest
+
+# Local Imports
+from modules.data import frame_stream
+
+
+def write_image_sequence(folder, n_frame: int) -> str:
+    """Write small images whose pixel values equal their frame number
+
+    Returns:
+        pattern: Glob pattern matching the images
+    """
+    for i_frame in range(n_frame):
+        image = np.full((8, 10, 3), i_frame, dtype=np.uint8)
+        cv2.imwrite(str(folder / f"frame_{i_frame:03d}.png"), image)
+    return str(folder / "frame_*.png")
+
+
+def test_image_sequence(tmp_path):
+    """All frames are delivered in order with backpressure"""
+    pattern = write_image_sequence(tmp_path, n_frame=20)
+    with frame_stream.FrameStream(pattern, max_queue_size=2) as frames:
+        items = []
+        for frame_index, frame in frames:
+            assert frames.queue_depth <= 2
+            items.append((frame_index, frame[0, 0, 0]))
+            time.sleep(0.001)
+
+        # Exhausted stream stays exhausted
+        assert not list(frames)
+
+    assert items == [(i_frame, i_frame) for i_frame in range(20)]
+    assert frames.n_dropped == 0
+
+
+def test_drop_oldest(tmp_path):
+    """Slow consumer with drop_oldest skips frames but always ends on the last one"""
+    pattern = write_image_sequence(tmp_path, n_frame=30)
+    with frame_stream.FrameStream(pattern, max_queue_size=2, drop_oldest=True) as frames:
+        time.sleep(0.5)  # let decoder run ahead
+        frame_indices = [frame_index for frame_index, _ in frames]
+
+    assert frame_indices[-1] == 29
+    assert len(frame_indices) < 30
+    assert frames.n_dropped == 30 - len(frame_indices)
+    assert frame_indices == sorted(frame_indices)
+
+
+def test_video_capture(tmp_path):
+    """Frames are read from video files and from open cv2.VideoCapture instances"""
+    video_path = tmp_path / "video.avi"
+    writer = cv2.VideoWriter(
+        str(video_path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (32, 24)
+    )
+    for _ in range(5):
+        writer.write(np.zeros((24, 32, 3), dtype=np.uint8))
+    writer.release()
+
+    with frame_stream.FrameStream(video_path) as frames:
+        assert [frame_index for frame_index, _ in frames] == list(range(5))
+
+    with frame_stream.FrameStream(cv2.VideoCapture(str(video_path))) as frames:
+        assert [frame.shape for _, frame in frames] == [(24, 32, 3)] * 5
+
+
+def test_close_early_and_errors(tmp_path):
+    """Closing mid-stream stops the decoder; read errors propagate to the consumer"""
+    pattern = write_image_sequence(tmp_path, n_frame=10)
+    frames = frame_stream.FrameStream(pattern, max_queue_size=1)
+    next(frames)
+    frames.close()
+    assert not list(frames)
+
+    (tmp_path / "frame_100.png").write_bytes(b"not an image")
+    with frame_stream.FrameStream(pattern) as frames:
+        with pytest.raises(IOError):
+            list(frames)
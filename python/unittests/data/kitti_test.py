@@ -0,0 +1,123 @@
+"""Unit tests for kitti.py"""
+
+# Standard Imports
+import pathlib
+import os
+import shutil
+
+# Third Party Imports
+import numpy as np
+import pytest
+
+# Local Imports
+from modules.data import kitti
+
+REPO_DIR = pathlib.Path(__file__).resolve().parents[3]
+DATA_ROAD_PATH = REPO_DIR / "data" / "kitti_data_road"
+
+
+def test_read_calib_to_dict(tmp_path):
+    """Unit test for kitti.read_calib_to_dict()"""
+    calib_path = tmp_path / "calib.txt"
+    shutil.copy(DATA_ROAD_PATH / "training" / "calib" / "um_000000.txt", calib_path)
+
+    calib = kitti.read_calib_to_dict(calib_path)
+    assert list(calib) == [
+        "P0:",
+        "P1:",
+        "P2:",
+        "P3:",
+        "R0_rect:",
+        "Tr_velo_to_cam:",
+        "Tr_imu_to_velo:",
+        "Tr_cam_to_road:",
+    ]
+    assert calib["P2:"].shape == (3, 4)
+    assert calib["R0_rect:"].shape == (3, 3)
+    np.testing.assert_array_equal(
+        calib["P2:"][:, 3], [4.485728e01, 2.163791e-01, 2.745884e-03]
+    )
+    np.testing.assert_array_equal(
+        calib["Tr_cam_to_road:"][1],
+        [
+            5.425697507328e-03,
+            9.999234779341e-01,
+            -1.111504746388e-02,
+            -1.597134401910e00,
+        ],
+    )
+
+    # Cached arrays are shared and read-only
+    calib_again = kitti.read_calib_to_dict(str(calib_path))
+    assert calib_again is not calib
+    assert calib_again["P2:"] is calib["P2:"]
+    with pytest.raises(ValueError):
+        calib["P2:"][0, 0] = 0.0
+
+    # Modifying the file invalidates the cached entry
+    calib_path.write_text("P2: " + " ".join(["1.0"] * 12) + "\n")
+    stat = calib_path.stat()
+    os.utime(calib_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    calib_new = kitti.read_calib_to_dict(calib_path)
+    assert list(calib_new) == ["P2:"]
+    np.testing.assert_array_equal(calib_new["P2:"], np.ones((3, 4)))
+
+
+def test_list_kitti_road_frames(tmp_path):
+    """Unit test for kitti.list_kitti_road_frames()"""
+    frames = kitti.list_kitti_road_frames(DATA_ROAD_PATH, data_type="testing")
+    assert frames == [("um", 0)]
+
+    image_dir = tmp_path / "training" / "image_2"
+    image_dir.mkdir(parents=True)
+    for name in [
+        "uu_000012.png",
+        "um_000003.png",
+        "umm_000001.png",
+        "um_road_000003.png",
+    ]:
+        (image_dir / name).touch()
+
+    frames = kitti.list_kitti_road_frames(tmp_path, data_type="training")
+    assert frames == [("um", 3), ("umm", 1), ("uu", 12)]
+
+    frames = kitti.list_kitti_road_frames(tmp_path, prefixes=("umm",))
+    assert frames == [("umm", 1)]
+
+
+def test_read_kitti_road_data_prefix(tmp_path):
+    """Unit test for kitti.read_kitti_road_data() with a non-default prefix"""
+    for folder, suffix in [("image_2", "png"), ("calib", "txt")]:
+        (tmp_path / "training" / folder).mkdir(parents=True)
+        shutil.copy(
+            DATA_ROAD_PATH / "training" / folder / f"um_000000.{suffix}",
+            tmp_path / "training" / folder / f"uu_000007.{suffix}",
+        )
+
+    image, calib = kitti.read_kitti_road_data(
+        tmp_path, data_type="training", frame_num=7, prefix="uu"
+    )
+    assert image.shape == (375, 1242, 3)
+    assert calib["P2:"].shape == (3, 4)
+
+
+def test_get_camera_calib():
+    """Unit test for kitti.get_camera_calib()"""
+    _, calib = kitti.read_kitti_road_data(DATA_ROAD_PATH)
+    tr_cam2_to_road, camera_matrix_2 = kitti.get_camera_calib(calib, camera=2)
+    tr_cam3_to_road, camera_matrix_3 = kitti.get_camera_calib(calib, camera=3)
+    np.testing.assert_array_equal(camera_matrix_2, calib["P2:"][:3, :3])
+    np.testing.assert_array_equal(camera_matrix_3, calib["P3:"][:3, :3])
+
+    # Same orientation; the right camera center is ~0.53 m to the right of the left one
+    np.testing.assert_array_equal(tr_cam2_to_road[:, :3], calib["Tr_cam_to_road:"][:, :3])
+    baseline = tr_cam3_to_road[:, 3] - tr_cam2_to_road[:, 3]
+    np.testing.assert_allclose(baseline, [0.53, 0.0, 0.0], atol=0.01)
+
+    # Projecting a road point through either camera's calibration matches P2 / P3
+    p_road = np.array([1.0, 0.0, 20.0])
+    for camera, tr_cam_to_road in [(2, tr_cam2_to_road), (3, tr_cam3_to_road)]:
+        p_cam = tr_cam_to_road[:, :3].T @ (p_road - tr_cam_to_road[:, 3])
+        p_cam0 = calib["Tr_cam_to_road:"][:, :3].T @ (p_road - calib["Tr_cam_to_road:"][:, 3])
+        pixel = calib[f"P{camera}:"] @ np.append(p_cam0, 1.0)
+        np.testing.assert_allclose(calib[f"P{camera}:"][:, :3] @ p_cam, pixel)